@@ -0,0 +1,54 @@
+import sys
+import os
+sys.path.append(os.getcwd())
+from app.core.database import engine
+from sqlalchemy import text
+
+def add_indexes():
+    sql_commands = [
+        # 1. Keyset pagination on (created_at, id)
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_users_created_id ON users(created_at, id)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_leave_created_id ON leave_requests(created_at, id)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_leave_user_created_id ON leave_requests(user_id, created_at, id)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_leave_status_created_id ON leave_requests(status, created_at, id)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_ot_created_id ON overtime_requests(created_at, id)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_ot_user_created_id ON overtime_requests(user_id, created_at, id)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_ot_status_created_id ON overtime_requests(status, created_at, id)",
+
+        # 2. Dashboard counters
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_users_manager_id ON users(manager_id)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_leave_user_status ON leave_requests(user_id, status)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_leave_status_dates ON leave_requests(status, start_date, end_date)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_ot_user_status ON overtime_requests(user_id, status)",
+
+        # 3. Calendar range queries (overlap on approved leaves)
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_leave_approved_range ON leave_requests USING gist (daterange(start_date, end_date, '[]')) WHERE status = 'APPROVED'",
+        # Superseded by idx_leave_approved_range and idx_leave_status_dates
+        "DROP INDEX CONCURRENTLY IF EXISTS idx_leave_date_range",
+
+        # 4. No overlapping active leaves per user. Fails if overlaps already
+        # exist; resolve those first (cancel or reject the duplicates).
+        """
+        DO $$ BEGIN
+            IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'excl_leave_user_active_range') THEN
+                ALTER TABLE leave_requests ADD CONSTRAINT excl_leave_user_active_range EXCLUDE USING gist (
+                    int4range(user_id, user_id, '[]') WITH &&,
+                    daterange(start_date, end_date, '[]') WITH &&
+                ) WHERE (status IN ('PENDING', 'PENDING_ADMIN', 'APPROVED'));
+            END IF;
+        END $$
+        """,
+    ]
+
+    try:
+        # CONCURRENTLY cannot run inside a transaction block
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            for cmd in sql_commands:
+                print(f"Executing: {cmd}")
+                conn.execute(text(cmd))
+            print("\nIndexes created successfully!")
+    except Exception as e:
+        print(f"\nError creating indexes: {e}")
+
+if __name__ == "__main__":
+    add_indexes()
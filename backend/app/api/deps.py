@@ -1,43 +1,66 @@
+import time
 from typing import Generator, Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
 from pydantic import ValidationError
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.core import security
 from app.core.config import settings
-from app.core.database import get_db
-from app.models.user import User
+from app.core.database import get_async_db
+from app.core.principal import Principal, principal_cache
 from app.schemas.token import TokenPayload
-from app.repositories.user import user_repository
+from app.repositories.user import async_user_repository
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/login/access-token")
 
-def get_current_user(
-    db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)
-) -> User:
-    try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
+async def get_current_user(
+    db: AsyncSession = Depends(get_async_db), token: str = Depends(oauth2_scheme)
+) -> Principal:
+    # Tokens verified recently resolve from memory: no JWT decode, no SELECT
+    cache_key = principal_cache.token_key(token)
+    principal = principal_cache.get(cache_key)
+    if principal is None:
+        try:
+            payload = jwt.decode(
+                token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
+            )
+            token_data = TokenPayload(**payload)
+        except (JWTError, ValidationError):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Could not validate credentials",
+            )
+        user_id = int(token_data.sub)
+        generation = principal_cache.generation(user_id)
+        user = await async_user_repository.get(db, user_id=user_id)
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
+        principal = Principal(
+            id=user.id, role=user.role, manager_id=user.manager_id, is_active=user.is_active
         )
-        token_data = TokenPayload(**payload)
-    except (JWTError, ValidationError):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Could not validate credentials",
-        )
-    user = user_repository.get(db, user_id=int(token_data.sub))
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    if not user.is_active:
+        # Never outlive the token itself
+        ttl = payload.get("exp", 0) - time.time()
+        if ttl > 0:
+            principal_cache.set(cache_key, principal, generation, ttl=ttl)
+    if not principal.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
-    return user
+    return principal
 
-def get_current_active_manager(
-    current_user: User = Depends(get_current_user)
-) -> User:
+async def get_current_active_manager(
+    current_user: Principal = Depends(get_current_user)
+) -> Principal:
     if current_user.role not in ["MANAGER", "ADMIN"]:
          raise HTTPException(
             status_code=400, detail="The user doesn't have enough privileges"
         )
     return current_user
+
+async def get_current_active_admin(
+    current_user: Principal = Depends(get_current_user)
+) -> Principal:
+    if current_user.role != "ADMIN":
+        raise HTTPException(
+            status_code=403, detail="Only Admins can access this resource."
+        )
+    return current_user
@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import auth, users, leaves, ot, dashboard
+from app.api.v1.endpoints import auth, users, leaves, ot, dashboard, system
 
 api_router = APIRouter()
 api_router.include_router(auth.router, tags=["login"])
@@ -7,3 +7,4 @@ api_router.include_router(users.router, prefix="/users", tags=["users"])
 api_router.include_router(leaves.router, prefix="/leaves", tags=["leaves"])
 api_router.include_router(ot.router, prefix="/ot", tags=["ot"])
 api_router.include_router(dashboard.router, prefix="/dashboard", tags=["dashboard"])
+api_router.include_router(system.router, prefix="/system", tags=["system"])
@@ -1,72 +1,24 @@
-from typing import Any, Dict
+from typing import Any, Dict, Literal
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from datetime import date
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api import deps
-from app.models.user import User
-from app.models.leave import LeaveRequest, LeaveStatus
-from app.models.ot import OTRequest, OTStatus
+from app.core.principal import Principal
+from app.repositories.dashboard import async_dashboard_repository
 
 router = APIRouter()
 
 @router.get("/stats", response_model=Dict[str, int])
-def read_dashboard_stats(
-    db: Session = Depends(deps.get_db),
-    current_user: User = Depends(deps.get_current_active_manager),
+async def read_dashboard_stats(
+    depth: Literal["direct", "all"] = "direct",
+    db: AsyncSession = Depends(deps.get_async_db),
+    current_user: Principal = Depends(deps.get_current_active_manager),
 ) -> Any:
     """
     Get dashboard statistics.
+    - Admin: global stats.
+    - Manager: stats for direct reports, or all indirect reports too with `depth=all`.
     """
-    # If Admin, show global stats
     if current_user.role == "ADMIN":
-        total_employees = db.query(User).count()
-        pending_leaves = db.query(LeaveRequest).filter(LeaveRequest.status == LeaveStatus.PENDING).count()
-        pending_ot = db.query(OTRequest).filter(OTRequest.status == OTStatus.PENDING).count()
-        
-        today = date.today()
-        on_leave_today = db.query(LeaveRequest).filter(
-            LeaveRequest.status == LeaveStatus.APPROVED,
-            LeaveRequest.start_date <= today,
-            LeaveRequest.end_date >= today
-        ).count()
-        
-        return {
-            "total_employees": total_employees,
-            "pending_leaves": pending_leaves,
-            "pending_ot": pending_ot,
-            "on_leave_today": on_leave_today
-        }
-    
-    # If Manager, show team stats
-    else:
-        # My Team Count
-        my_team_count = db.query(User).filter(User.manager_id == current_user.id).count()
-        
-        # Pending Leaves (Only from my team)
-        pending_leaves = db.query(LeaveRequest).join(LeaveRequest.user).filter(
-            User.manager_id == current_user.id,
-            LeaveRequest.status == LeaveStatus.PENDING
-        ).count()
-        
-        # Pending OT (Only from my team)
-        pending_ot = db.query(OTRequest).join(OTRequest.user).filter(
-            User.manager_id == current_user.id,
-            OTRequest.status == OTStatus.PENDING
-        ).count()
-        
-        # Approved Today (Leaves + OT actions taken today? Or just approved leaves today?)
-        today = date.today()
-        on_leave_today = db.query(LeaveRequest).join(LeaveRequest.user).filter(
-            User.manager_id == current_user.id,
-            LeaveRequest.status == LeaveStatus.APPROVED,
-            LeaveRequest.start_date <= today,
-            LeaveRequest.end_date >= today
-        ).count()
-        
-        return {
-            "total_employees": my_team_count, 
-            "pending_leaves": pending_leaves,
-            "pending_ot": pending_ot,
-            "on_leave_today": on_leave_today
-        }
+        return await async_dashboard_repository.get_stats_cached(db)
+    return await async_dashboard_repository.get_stats_cached(db, manager_id=current_user.id, depth=depth)
@@ -1,141 +1,348 @@
-from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from typing import Any, List, Literal, Optional, Union
+from fastapi import APIRouter, Depends, HTTPException, Request
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.api import deps
-from app.models.user import User
+from app.core.principal import Principal
 from app.schemas.leave import (
-    LeaveRequest, LeaveRequestCreate, LeaveRequestUpdate,
+    LeaveRequest, LeaveRequestCreate, LeaveRequestUpdate, LeaveBulkStatusUpdate,
     LeaveType, LeaveTypeCreate,
-    Holiday, HolidayCreate
+    LeaveBalance, CalendarLeave,
+    Holiday, HolidayCreate, HolidayOccurrence
 )
-from app.repositories.leave import leave_repository
+from app.schemas.page import CursorPage
+from app.schemas.bulk import BulkStatusResult
+from app.repositories.leave import DuplicateHoliday, LeaveOverlap, async_leave_repository, leave_repository
+from app.repositories.hierarchy import async_hierarchy_repository
+from app.repositories.balance import async_leave_balance_repository
+from app.core.config import settings
+from app.core.pagination import InvalidCursor
+from app.core.responses import rows_response
+from app.services.export import export_response
+from app.services.reference_data import HOLIDAYS, LEAVE_TYPES, reference_data
+from app.services.working_days import days_by_year
+from app.models.leave import LeaveStatus
 import datetime
 
 router = APIRouter()
 
+_leave_types_json = TypeAdapter(List[LeaveType])
+_holidays_json = TypeAdapter(List[Holiday])
+
+def _overlap_conflict(e: LeaveOverlap) -> HTTPException:
+    return HTTPException(
+        status_code=409,
+        detail={"message": str(e), "conflicting_ids": e.conflicting_ids},
+    )
+
 # --- LEAVE TYPES (Admin Config) ---
 @router.post("/types", response_model=LeaveType)
-def create_leave_type(
+async def create_leave_type(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     leave_type_in: LeaveTypeCreate,
-    current_user: User = Depends(deps.get_current_active_manager),
+    current_user: Principal = Depends(deps.get_current_active_manager),
 ) -> Any:
     """
     Create a new Leave Type (Admin/Manager only).
     """
     if current_user.role not in ["ADMIN", "MANAGER"]:
         raise HTTPException(status_code=403, detail="Not authorized")
-    return leave_repository.create_leave_type(db, leave_type_in)
+    return await async_leave_repository.create_leave_type(db, leave_type_in)
 
 @router.get("/types", response_model=List[LeaveType])
-def read_leave_types(
-    db: Session = Depends(deps.get_db),
-    current_user: User = Depends(deps.get_current_user),
+async def read_leave_types(
+    request: Request,
+    db: AsyncSession = Depends(deps.get_async_db),
+    current_user: Principal = Depends(deps.get_current_user),
 ) -> Any:
     """
     Get all leave types.
+    Sent with an ETag; a matching If-None-Match gets a 304.
     """
-    return leave_repository.get_leave_types(db)
+    async def load() -> bytes:
+        types = await async_leave_repository.get_leave_types(db)
+        return _leave_types_json.dump_json(_leave_types_json.validate_python(types, from_attributes=True))
+    return await reference_data.response(request, LEAVE_TYPES, load)
 
 # --- HOLIDAYS ---
 @router.post("/holidays", response_model=Holiday)
-def create_holiday(
+async def create_holiday(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     holiday_in: HolidayCreate,
-    current_user: User = Depends(deps.get_current_active_manager),
+    current_user: Principal = Depends(deps.get_current_active_manager),
 ) -> Any:
     """
     Create a new Holiday.
     """
-    return leave_repository.create_holiday(db, holiday_in)
+    try:
+        return await async_leave_repository.create_holiday(db, holiday_in)
+    except DuplicateHoliday as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/holidays", response_model=List[Holiday])
-def read_holidays(
-    db: Session = Depends(deps.get_db),
-    current_user: User = Depends(deps.get_current_user),
+async def read_holidays(
+    request: Request,
+    db: AsyncSession = Depends(deps.get_async_db),
+    current_user: Principal = Depends(deps.get_current_user),
 ) -> Any:
     """
     Get all holidays.
+    Sent with an ETag; a matching If-None-Match gets a 304.
+    """
+    async def load() -> bytes:
+        holidays = await async_leave_repository.get_holidays(db)
+        return _holidays_json.dump_json(_holidays_json.validate_python(holidays, from_attributes=True))
+    return await reference_data.response(request, HOLIDAYS, load)
+
+@router.get("/holidays/calendar", response_model=List[HolidayOccurrence])
+async def read_holiday_calendar(
+    start_year: Optional[int] = None,
+    end_year: Optional[int] = None,
+    db: AsyncSession = Depends(deps.get_async_db),
+    current_user: Principal = Depends(deps.get_current_user),
+) -> Any:
     """
-    return leave_repository.get_holidays(db)
+    Holidays on concrete dates for [start_year, end_year] (default: this
+    year), with recurring holidays expanded into every year from the one
+    they were defined in.
+    """
+    start_year = start_year or datetime.date.today().year
+    end_year = end_year or start_year
+    if end_year < start_year:
+        raise HTTPException(status_code=400, detail="end_year must not be before start_year")
+    if end_year - start_year >= 20:
+        raise HTTPException(status_code=400, detail="At most 20 years at a time")
+    return await async_leave_repository.get_holiday_occurrences(db, start_year, end_year)
+
+# --- BALANCES ---
+@router.get("/balances", response_model=List[LeaveBalance])
+async def read_leave_balances(
+    db: AsyncSession = Depends(deps.get_async_db),
+    year: Optional[int] = None,
+    user_id: Optional[int] = None,
+    current_user: Principal = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Get leave balances per leave type for a year (default: current year).
+    Admins may pass `user_id`; everyone else sees their own.
+    """
+    if user_id is not None and user_id != current_user.id and current_user.role != "ADMIN":
+        raise HTTPException(status_code=403, detail="Not authorized")
+    return await async_leave_balance_repository.get_balances(
+        db, user_id or current_user.id, year or datetime.date.today().year
+    )
 
 # --- LEAVE REQUESTS ---
 @router.post("/", response_model=LeaveRequest)
-def apply_leave(
+async def apply_leave(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     leave_in: LeaveRequestCreate,
-    current_user: User = Depends(deps.get_current_user),
+    current_user: Principal = Depends(deps.get_current_user),
 ) -> Any:
     """
     Apply for a leave.
     """
-    # Calculate days logic (simplified for now)
-    delta = leave_in.end_date - leave_in.start_date
-    total_days = delta.days + 1
-    
-    if total_days <= 0:
+    if leave_in.end_date < leave_in.start_date:
         raise HTTPException(status_code=400, detail="End date must be after start date")
 
-    return leave_repository.create_leave_request(
-        db, leave_in, user_id=current_user.id, total_days=float(total_days)
+    # Count working days only: weekly offs and public holidays are free
+    calendar = await async_leave_repository.get_working_day_calendar(
+        db, leave_in.start_date, leave_in.end_date
     )
+    total_days = calendar.working_days(leave_in.start_date, leave_in.end_date)
+    if total_days <= 0:
+        raise HTTPException(status_code=400, detail="The selected dates contain no working days")
+
+    if settings.ENFORCE_LEAVE_BALANCE:
+        # A leave crossing a year end draws on each year's balance
+        for year, days in days_by_year(calendar, leave_in.start_date, leave_in.end_date, float(total_days)):
+            available = await async_leave_balance_repository.get_available_days(
+                db, current_user.id, leave_in.leave_type_id, year
+            )
+            if available is not None and days > available:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Insufficient leave balance for {year}: {available:g} day(s) available",
+                )
 
-@router.get("/", response_model=List[LeaveRequest])
-def read_leaves(
-    db: Session = Depends(deps.get_db),
+    try:
+        return await async_leave_repository.create_leave_request(
+            db, leave_in, user_id=current_user.id, total_days=float(total_days)
+        )
+    except LeaveOverlap as e:
+        raise _overlap_conflict(e)
+
+@router.get("/", response_model=Union[List[LeaveRequest], CursorPage[LeaveRequest]])
+async def read_leaves(
+    db: AsyncSession = Depends(deps.get_async_db),
     skip: int = 0,
     limit: int = 100,
-    current_user: User = Depends(deps.get_current_user),
+    cursor: bool = False,
+    after: Optional[str] = None,
+    current_user: Principal = Depends(deps.get_current_user),
 ) -> Any:
     """
     Get leaves. 
     - If Admin: Get ALL leaves.
     - If Manager: Get leaves of subordinates (TODO).
     - If Employee: Get OWN leaves.
+
+    Pass `cursor=true` (or an `after` token) to page by keyset instead of
+    offset; the response is then `{items, next_cursor}`.
+    """
+    # Served from flat rows: no ORM objects and no per-row model validation
+    user_id = None if current_user.role == "ADMIN" else current_user.id
+    if cursor or after:
+        try:
+            rows, next_cursor = await async_leave_repository.get_leave_request_rows_page(
+                db, user_id=user_id, after=after, limit=limit
+            )
+        except InvalidCursor as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return rows_response(rows, next_cursor, paged=True)
+
+    rows = await async_leave_repository.get_leave_request_rows(db, user_id=user_id, skip=skip, limit=limit)
+    return rows_response(rows)
+
+@router.get("/calendar", response_model=List[CalendarLeave])
+async def read_calendar(
+    start: datetime.date,
+    end: datetime.date,
+    depth: Literal["direct", "all"] = "direct",
+    db: AsyncSession = Depends(deps.get_async_db),
+    current_user: Principal = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Approved leaves overlapping [start, end], for calendar views.
+    Admin sees everyone, Manager their team (with `depth=all` indirect
+    reports too) and self, Employee their teammates (same manager) and self.
     """
+    if end < start:
+        raise HTTPException(status_code=400, detail="end must not be before start")
+    if (end - start).days >= 366:
+        raise HTTPException(status_code=400, detail="Calendar range cannot exceed one year")
+
     if current_user.role == "ADMIN":
-        return leave_repository.get_leave_requests(db, skip=skip, limit=limit)
-    else:
-        return leave_repository.get_leave_requests(db, user_id=current_user.id, skip=skip, limit=limit)
+        return await async_leave_repository.get_calendar(db, start, end)
+    if current_user.role == "MANAGER":
+        return await async_leave_repository.get_calendar(
+            db, start, end, team_manager_id=current_user.id, user_id=current_user.id, depth=depth
+        )
+    return await async_leave_repository.get_calendar(
+        db, start, end, team_manager_id=current_user.manager_id, user_id=current_user.id
+    )
+
+@router.get("/export")
+async def export_leaves(
+    format: Literal["csv", "ndjson"] = "csv",
+    start: Optional[datetime.date] = None,
+    end: Optional[datetime.date] = None,
+    status: Optional[LeaveStatus] = None,
+    user_id: Optional[int] = None,
+    depth: Literal["direct", "all"] = "direct",
+    current_user: Principal = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Stream leave requests with user names as CSV or NDJSON, for payroll.
+    Admin exports everyone, Manager their team (with `depth=all` indirect
+    reports too) and self, Employee own.
+    """
+    if start and end and end < start:
+        raise HTTPException(status_code=400, detail="end must not be before start")
+
+    manager_id = None
+    if current_user.role == "MANAGER":
+        manager_id = current_user.id
+    elif current_user.role != "ADMIN":
+        if user_id is not None and user_id != current_user.id:
+            raise HTTPException(status_code=403, detail="Not authorized to export other users' requests")
+        user_id = current_user.id
+
+    stmt = leave_repository.export_statement(
+        start=start, end=end, status=status, user_id=user_id, manager_id=manager_id, depth=depth
+    )
+    return export_response(stmt, format, "leave-export")
 
-@router.get("/approvals", response_model=List[LeaveRequest])
-def read_pending_approvals(
-    db: Session = Depends(deps.get_db),
+@router.get("/approvals", response_model=Union[List[LeaveRequest], CursorPage[LeaveRequest]])
+async def read_pending_approvals(
+    db: AsyncSession = Depends(deps.get_async_db),
     skip: int = 0,
     limit: int = 100,
-    current_user: User = Depends(deps.get_current_active_manager),
+    cursor: bool = False,
+    after: Optional[str] = None,
+    depth: Literal["direct", "all"] = "direct",
+    current_user: Principal = Depends(deps.get_current_active_manager),
 ) -> Any:
     """
     Get pending leave approvals.
     - Admin: All pending.
-    - Manager: Pending for direct reports.
+    - Manager: Pending for direct reports, or all indirect reports too with `depth=all`.
     """
     is_admin = (current_user.role == "ADMIN")
-    return leave_repository.get_pending_approvals(
-        db, manager_id=current_user.id, is_admin=is_admin, skip=skip, limit=limit
+    if cursor or after:
+        try:
+            items, next_cursor = await async_leave_repository.get_pending_approvals_page(
+                db, manager_id=current_user.id, is_admin=is_admin, after=after, limit=limit, depth=depth
+            )
+        except InvalidCursor as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return {"items": items, "next_cursor": next_cursor}
+
+    return await async_leave_repository.get_pending_approvals(
+        db, manager_id=current_user.id, is_admin=is_admin, skip=skip, limit=limit, depth=depth
     )
 
+@router.post("/bulk-status", response_model=BulkStatusResult)
+async def bulk_approve_leaves(
+    *,
+    db: AsyncSession = Depends(deps.get_async_db),
+    bulk_update: LeaveBulkStatusUpdate,
+    current_user: Principal = Depends(deps.get_current_active_manager),
+) -> Any:
+    """
+    Approve/Reject many leaves at once. Managers can action their reports'
+    requests at any depth, Admins any; other ids are reported as skipped.
+    """
+    manager_id = None if current_user.role == "ADMIN" else current_user.id
+    try:
+        updated, skipped = await async_leave_repository.bulk_update_leave_status(
+            db, bulk_update, approver_id=current_user.id, manager_id=manager_id
+        )
+    except LeaveOverlap as e:
+        raise _overlap_conflict(e)
+    return {"updated": updated, "skipped": skipped}
+
 @router.put("/{leave_id}", response_model=LeaveRequest)
-def approve_leave(
+async def approve_leave(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     leave_id: int,
     leave_update: LeaveRequestUpdate,
-    current_user: User = Depends(deps.get_current_active_manager),
+    current_user: Principal = Depends(deps.get_current_active_manager),
 ) -> Any:
     """
     Approve/Reject leave.
     """
-    leave = leave_repository.get_leave_request(db, leave_id)
+    leave = await async_leave_repository.get_leave_request(db, leave_id)
     if not leave:
         raise HTTPException(status_code=404, detail="Leave request not found")
         
     # Permission Check
     is_admin = (current_user.role == "ADMIN")
-    is_manager = (current_user.role == "MANAGER" and leave.user.manager_id == current_user.id)
+    # Same scope as the pending lists with depth=all: anyone below the
+    # manager in the hierarchy, but not their own requests. Direct reports
+    # are checked on manager_id first, which needs no closure table rows.
+    is_manager = (
+        current_user.role == "MANAGER"
+        and leave.user_id != current_user.id
+        and (
+            leave.user.manager_id == current_user.id
+            or await async_hierarchy_repository.is_in_subtree(db, current_user.id, leave.user_id)
+        )
+    )
     
     if not is_admin and not is_manager:
         raise HTTPException(
@@ -159,6 +366,9 @@ def approve_leave(
              # Should be caught by top permission check, but safe fallback
              raise HTTPException(status_code=403, detail="Not authorized")
 
-    return leave_repository.update_leave_status(
-        db, leave, leave_update, approver_id=current_user.id
-    )
+    try:
+        return await async_leave_repository.update_leave_status(
+            db, leave, leave_update, approver_id=current_user.id
+        )
+    except LeaveOverlap as e:
+        raise _overlap_conflict(e)
@@ -1,21 +1,29 @@
-from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from typing import Any, List, Literal, Optional, Union
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, date, time
 
 from app.api import deps
-from app.models.user import User
-from app.schemas.ot import OTRequest, OTRequestCreate, OTRequestUpdate
-from app.repositories.ot import ot_repository
+from app.core.principal import Principal
+from app.schemas.ot import OTRequest, OTRequestCreate, OTRequestUpdate, OTBulkStatusUpdate, OTMonthlyRollup
+from app.schemas.page import CursorPage
+from app.schemas.bulk import BulkStatusResult
+from app.repositories.ot import async_ot_repository, ot_repository
+from app.repositories.hierarchy import async_hierarchy_repository
+from app.repositories.ot_rollup import async_ot_rollup_repository
+from app.core.pagination import InvalidCursor
+from app.core.responses import rows_response
+from app.services.export import export_response
+from app.models.ot import OTStatus
 
 router = APIRouter()
 
 @router.post("/", response_model=OTRequest)
-def create_ot_request(
+async def create_ot_request(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     ot_in: OTRequestCreate,
-    current_user: User = Depends(deps.get_current_user),
+    current_user: Principal = Depends(deps.get_current_user),
 ) -> Any:
     """
     Submit an Overtime Request.
@@ -37,56 +45,165 @@ def create_ot_request(
     if total_hours <= 0:
          raise HTTPException(status_code=400, detail="Invalid time duration")
 
-    return ot_repository.create(db, ot_in, user_id=current_user.id, total_hours=round(total_hours, 2))
+    return await async_ot_repository.create(db, ot_in, user_id=current_user.id, total_hours=round(total_hours, 2))
 
-@router.get("/", response_model=List[OTRequest])
-def read_ot_requests(
-    db: Session = Depends(deps.get_db),
+@router.get("/", response_model=Union[List[OTRequest], CursorPage[OTRequest]])
+async def read_ot_requests(
+    db: AsyncSession = Depends(deps.get_async_db),
     skip: int = 0,
     limit: int = 100,
-    current_user: User = Depends(deps.get_current_user),
+    cursor: bool = False,
+    after: Optional[str] = None,
+    current_user: Principal = Depends(deps.get_current_user),
 ) -> Any:
     """
     Get OT requests. Admin sees all, Employee sees own.
+    Pass `cursor=true` (or an `after` token) for keyset pagination.
     """
-    if current_user.role == "ADMIN":
-        return ot_repository.get_multi(db, skip=skip, limit=limit)
-    else:
-        return ot_repository.get_multi(db, user_id=current_user.id, skip=skip, limit=limit)
-
-@router.get("/approvals", response_model=List[OTRequest])
-def read_pending_approvals(
-    db: Session = Depends(deps.get_db),
+    # Served from flat rows: no ORM objects and no per-row model validation
+    user_id = None if current_user.role == "ADMIN" else current_user.id
+    if cursor or after:
+        try:
+            rows, next_cursor = await async_ot_repository.get_multi_rows_page(db, user_id=user_id, after=after, limit=limit)
+        except InvalidCursor as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return rows_response(rows, next_cursor, paged=True)
+
+    rows = await async_ot_repository.get_multi_rows(db, user_id=user_id, skip=skip, limit=limit)
+    return rows_response(rows)
+
+@router.get("/rollups", response_model=List[OTMonthlyRollup])
+async def read_ot_rollups(
+    year: int = Query(..., ge=1, le=9999),
+    month: Optional[int] = Query(None, ge=1, le=12),
+    user_id: Optional[int] = None,
+    depth: Literal["direct", "all"] = "direct",
+    db: AsyncSession = Depends(deps.get_async_db),
+    current_user: Principal = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Monthly OT totals per employee for a year, or one month of it.
+    Admin sees everyone, Manager their team (with `depth=all` indirect
+    reports too) and self, Employee own.
+    """
+    manager_id = None
+    if current_user.role == "MANAGER":
+        manager_id = current_user.id
+    elif current_user.role != "ADMIN":
+        if user_id is not None and user_id != current_user.id:
+            raise HTTPException(status_code=403, detail="Not authorized to view other users' overtime")
+        user_id = current_user.id
+
+    start_month = date(year, month or 1, 1)
+    end_month = date(year, month or 12, 1)
+    return await async_ot_rollup_repository.get_rollups(
+        db, start_month, end_month, user_id=user_id, manager_id=manager_id, depth=depth
+    )
+
+@router.get("/export")
+async def export_ot_requests(
+    format: Literal["csv", "ndjson"] = "csv",
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    status: Optional[OTStatus] = None,
+    user_id: Optional[int] = None,
+    depth: Literal["direct", "all"] = "direct",
+    current_user: Principal = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Stream OT requests with user names as CSV or NDJSON, for payroll.
+    Admin exports everyone, Manager their team (with `depth=all` indirect
+    reports too) and self, Employee own.
+    """
+    if start and end and end < start:
+        raise HTTPException(status_code=400, detail="end must not be before start")
+
+    manager_id = None
+    if current_user.role == "MANAGER":
+        manager_id = current_user.id
+    elif current_user.role != "ADMIN":
+        if user_id is not None and user_id != current_user.id:
+            raise HTTPException(status_code=403, detail="Not authorized to export other users' requests")
+        user_id = current_user.id
+
+    stmt = ot_repository.export_statement(
+        start=start, end=end, status=status, user_id=user_id, manager_id=manager_id, depth=depth
+    )
+    return export_response(stmt, format, "ot-export")
+
+@router.get("/approvals", response_model=Union[List[OTRequest], CursorPage[OTRequest]])
+async def read_pending_approvals(
+    db: AsyncSession = Depends(deps.get_async_db),
     skip: int = 0,
     limit: int = 100,
-    current_user: User = Depends(deps.get_current_active_manager),
+    cursor: bool = False,
+    after: Optional[str] = None,
+    depth: Literal["direct", "all"] = "direct",
+    current_user: Principal = Depends(deps.get_current_active_manager),
 ) -> Any:
     """
     Get pending OT approvals.
+    Managers see their direct reports', or all indirect reports' too with `depth=all`.
     """
     is_admin = (current_user.role == "ADMIN")
-    return ot_repository.get_pending_approvals(
-        db, manager_id=current_user.id, is_admin=is_admin, skip=skip, limit=limit
+    if cursor or after:
+        try:
+            items, next_cursor = await async_ot_repository.get_pending_approvals_page(
+                db, manager_id=current_user.id, is_admin=is_admin, after=after, limit=limit, depth=depth
+            )
+        except InvalidCursor as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return {"items": items, "next_cursor": next_cursor}
+
+    return await async_ot_repository.get_pending_approvals(
+        db, manager_id=current_user.id, is_admin=is_admin, skip=skip, limit=limit, depth=depth
+    )
+
+@router.post("/bulk-status", response_model=BulkStatusResult)
+async def bulk_approve_ot_requests(
+    *,
+    db: AsyncSession = Depends(deps.get_async_db),
+    bulk_update: OTBulkStatusUpdate,
+    current_user: Principal = Depends(deps.get_current_active_manager),
+) -> Any:
+    """
+    Approve/Reject many OT requests at once. Managers can action their
+    reports' requests at any depth, Admins any; other ids are reported as skipped.
+    """
+    manager_id = None if current_user.role == "ADMIN" else current_user.id
+    updated, skipped = await async_ot_repository.bulk_update_status(
+        db, bulk_update, approver_id=current_user.id, manager_id=manager_id
     )
+    return {"updated": updated, "skipped": skipped}
 
 @router.put("/{ot_id}", response_model=OTRequest)
-def approve_ot_request(
+async def approve_ot_request(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     ot_id: int,
     ot_update: OTRequestUpdate,
-    current_user: User = Depends(deps.get_current_active_manager),
+    current_user: Principal = Depends(deps.get_current_active_manager),
 ) -> Any:
     """
     Approve/Reject OT request. Manager/Admin only.
     """
-    ot = ot_repository.get(db, id=ot_id)
+    ot = await async_ot_repository.get(db, id=ot_id)
     if not ot:
          raise HTTPException(status_code=404, detail="OT request not found")
          
     # Permission Check
     is_admin = (current_user.role == "ADMIN")
-    is_manager = (current_user.role == "MANAGER" and ot.user.manager_id == current_user.id)
+    # Same scope as the pending lists with depth=all: anyone below the
+    # manager in the hierarchy, but not their own requests. Direct reports
+    # are checked on manager_id first, which needs no closure table rows.
+    is_manager = (
+        current_user.role == "MANAGER"
+        and ot.user_id != current_user.id
+        and (
+            ot.user.manager_id == current_user.id
+            or await async_hierarchy_repository.is_in_subtree(db, current_user.id, ot.user_id)
+        )
+    )
     
     if not is_admin and not is_manager:
         raise HTTPException(
@@ -94,4 +211,4 @@ def approve_ot_request(
             detail="You are not authorized to approve this OT request."
         )
 
-    return ot_repository.update_status(db, ot, ot_update, approver_id=current_user.id)
+    return await async_ot_repository.update_status(db, ot, ot_update, approver_id=current_user.id)
@@ -0,0 +1,36 @@
+from typing import Any, Dict
+from fastapi import APIRouter, Depends
+from app.api import deps
+from app.core.principal import Principal
+from app.core.audit import audit_writer
+from app.core.hashing import password_hash_pool
+from app.core.db_metrics import pool_stats
+
+router = APIRouter()
+
+@router.get("/password-hashing", response_model=Dict[str, Any])
+async def read_password_hashing_stats(
+    current_user: Principal = Depends(deps.get_current_active_admin),
+) -> Any:
+    """
+    Password hash pool concurrency and queue depth for this worker.
+    """
+    return password_hash_pool.stats()
+
+@router.get("/db-pool", response_model=Dict[str, Any])
+async def read_db_pool_stats(
+    current_user: Principal = Depends(deps.get_current_active_admin),
+) -> Any:
+    """
+    Connection pool occupancy, checkout waits and timeouts for this worker.
+    """
+    return pool_stats()
+
+@router.get("/audit-writer", response_model=Dict[str, Any])
+async def read_audit_writer_stats(
+    current_user: Principal = Depends(deps.get_current_active_admin),
+) -> Any:
+    """
+    Audit events queued, written, dropped and failed in this worker.
+    """
+    return audit_writer.stats()
@@ -1,46 +1,64 @@
-from typing import Any, List
-from fastapi import APIRouter, Body, Depends, HTTPException, status
+from typing import Any, List, Literal, Optional, Union
+from fastapi import APIRouter, Body, Depends, File, HTTPException, UploadFile, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.encoders import jsonable_encoder
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.api import deps
-from app.models.user import User
-from app.schemas.user import User as UserSchema, UserCreate, UserUpdate
-from app.repositories.user import user_repository
+from app.core.config import settings
+from app.core.principal import Principal
+from app.schemas.user import User as UserSchema, UserCreate, UserUpdate, UserImportResult
+from app.schemas.page import CursorPage
+from app.repositories.user import async_user_repository
+from app.repositories.hierarchy import HierarchyCycle
+from app.core.pagination import InvalidCursor
+from app.services.user_import import parse_user_csv
 
 router = APIRouter()
 
-@router.get("/", response_model=List[UserSchema])
-def read_users(
-    db: Session = Depends(deps.get_db),
+@router.get("/", response_model=Union[List[UserSchema], CursorPage[UserSchema]])
+async def read_users(
+    db: AsyncSession = Depends(deps.get_async_db),
     skip: int = 0,
     limit: int = 100,
-    current_user: User = Depends(deps.get_current_active_manager),
+    cursor: bool = False,
+    after: Optional[str] = None,
+    current_user: Principal = Depends(deps.get_current_active_manager),
 ) -> Any:
     """
     Retrieve users. Only for Managers/Admins.
+    Pass `cursor=true` (or an `after` token) for keyset pagination.
     """
-    users = user_repository.get_multi(db, skip=skip, limit=limit)
+    if cursor or after:
+        try:
+            items, next_cursor = await async_user_repository.get_multi_page(db, after=after, limit=limit)
+        except InvalidCursor as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return {"items": items, "next_cursor": next_cursor}
+
+    users = await async_user_repository.get_multi(db, skip=skip, limit=limit)
     return users
 
 @router.get("/team", response_model=List[UserSchema])
-def read_team_members(
-    db: Session = Depends(deps.get_db),
+async def read_team_members(
+    db: AsyncSession = Depends(deps.get_async_db),
     skip: int = 0,
     limit: int = 100,
-    current_user: User = Depends(deps.get_current_active_manager),
+    depth: Literal["direct", "all"] = "direct",
+    current_user: Principal = Depends(deps.get_current_active_manager),
 ) -> Any:
     """
     Retrieve users managed by the current user.
+    `depth=all` includes indirect reports at every level below.
     """
-    users = user_repository.get_by_manager(db, manager_id=current_user.id, skip=skip, limit=limit)
+    users = await async_user_repository.get_by_manager(db, manager_id=current_user.id, skip=skip, limit=limit, depth=depth)
     return users
 
 @router.post("/", response_model=UserSchema)
-def create_user_by_admin(
+async def create_user_by_admin(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     user_in: UserCreate,
-    current_user: User = Depends(deps.get_current_active_manager),
+    current_user: Principal = Depends(deps.get_current_active_manager),
 ) -> Any:
     """
     Create new user. Only for Managers/Admins.
@@ -51,51 +69,83 @@ def create_user_by_admin(
             detail="Only Admins can create other Admins.",
         )
         
-    user = user_repository.get_by_email(db, email=user_in.email)
+    user = await async_user_repository.get_by_email(db, email=user_in.email)
     if user:
         raise HTTPException(
             status_code=400,
             detail="The user with this email already exists in the system.",
         )
-    user = user_repository.create(db, user_in=user_in)
+    user = await async_user_repository.create(db, user_in=user_in, actor_id=current_user.id)
     return user
 
+@router.post("/import", response_model=UserImportResult)
+async def import_users(
+    *,
+    db: AsyncSession = Depends(deps.get_async_db),
+    file: UploadFile = File(...),
+    current_user: Principal = Depends(deps.get_current_active_admin),
+) -> Any:
+    """
+    Bulk create users from a CSV upload. Only for Admins.
+    Columns: email, full_name, password (required), role, designation, dob,
+    phone_number, join_date, is_active, manager_email. Valid rows are
+    imported; the rest are reported by line number.
+    """
+    try:
+        rows, errors = await run_in_threadpool(parse_user_csv, file.file, settings.USER_IMPORT_MAX_ROWS)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    created, db_errors = await async_user_repository.bulk_create(db, rows, actor_id=current_user.id)
+    errors = sorted(errors + db_errors, key=lambda e: e["row"])
+    return {"created": created, "errors": errors}
+
 @router.put("/{user_id}", response_model=UserSchema)
-def update_user_by_admin(
+async def update_user_by_admin(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     user_id: int,
     user_in: UserUpdate,
-    current_user: User = Depends(deps.get_current_active_manager),
+    current_user: Principal = Depends(deps.get_current_active_manager),
 ) -> Any:
     """
     Update a user. Only for Managers/Admins.
     """
-    user = user_repository.get(db, user_id=user_id)
+    user = await async_user_repository.get(db, user_id=user_id)
     if not user:
         raise HTTPException(
             status_code=404,
             detail="The user with this id does not exist in the system",
         )
-    user = user_repository.update(db, db_obj=user, obj_in=user_in)
+    try:
+        user = await async_user_repository.update(db, db_obj=user, obj_in=user_in, actor_id=current_user.id)
+    except HierarchyCycle:
+        raise HTTPException(
+            status_code=400,
+            detail="A user cannot report to themselves or to one of their reports.",
+        )
     return user
 
 @router.get("/me", response_model=UserSchema)
-def read_user_me(
-    db: Session = Depends(deps.get_db),
-    current_user: User = Depends(deps.get_current_user),
+async def read_user_me(
+    db: AsyncSession = Depends(deps.get_async_db),
+    current_user: Principal = Depends(deps.get_current_user),
 ) -> Any:
     """
     Get current user profile.
     """
-    return current_user
+    # The principal only carries auth fields; the profile needs the full row
+    user = await async_user_repository.get(db, user_id=current_user.id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    return user
 
 @router.delete("/{user_id}", response_model=UserSchema)
-def delete_user(
+async def delete_user(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     user_id: int,
-    current_user: User = Depends(deps.get_current_active_manager),
+    current_user: Principal = Depends(deps.get_current_active_manager),
 ) -> Any:
     """
     Delete a user. Only for Admins.
@@ -106,7 +156,7 @@ def delete_user(
             detail="Only Admins can delete users.",
         )
         
-    user = user_repository.get(db, user_id=user_id)
+    user = await async_user_repository.get(db, user_id=user_id)
     if not user:
         raise HTTPException(
             status_code=404,
@@ -118,5 +168,5 @@ def delete_user(
             detail="You cannot delete yourself.",
         )
         
-    user = user_repository.remove(db, id=user_id)
+    user = await async_user_repository.remove(db, id=user_id, actor_id=current_user.id)
     return user
@@ -0,0 +1,201 @@
+import asyncio
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.database import engine
+from app.models.audit import AuditLog
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+# Tells the writer thread to flush and exit
+_STOP = object()
+# Session.info key of events collected by the repositories until the
+# async layer hands them to the writer
+_PENDING = "audit_events"
+
+class AuditWriter:
+    """
+    Audit events are queued in memory and written to audit_logs by one
+    thread per worker, in multi-row INSERTs of up to `batch_size` rows, at
+    least every `flush_interval` seconds while events are waiting.
+
+    Repositories `collect` events on the session after they commit (no
+    I/O, safe inside run_sync); the async repository then `publish`es
+    them. Requests only pay for queue puts. When the database falls
+    behind and the queue is full, `publish` waits for room off the event
+    loop, so only that request slows down, for at most `enqueue_timeout`
+    in all; events still not queued then are dropped with an error log.
+    Queued events are flushed on shutdown and at interpreter exit; a
+    crash loses at most the queue.
+    """
+
+    def __init__(self, max_queue: int, batch_size: int, flush_interval: float, enqueue_timeout: float):
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+        self._lock = threading.Lock()
+        self._queue: Optional[queue.Queue] = None
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._atexit_registered = False
+        self._written = 0
+        self._dropped = 0
+        self._failed = 0
+        self._batches = 0
+
+    def _get_queue(self) -> queue.Queue:
+        # Started lazily and per process: gunicorn forks workers after import
+        with self._lock:
+            if self._queue is None or self._pid != os.getpid():
+                self._queue = queue.Queue(maxsize=self.max_queue)
+                self._pid = os.getpid()
+                self._thread = threading.Thread(
+                    target=self._run, args=(self._queue,), name="audit-writer", daemon=True
+                )
+                self._thread.start()
+                if not self._atexit_registered:
+                    # shutdown() only acts on the current process's writer
+                    atexit.register(self.shutdown)
+                    self._atexit_registered = True
+            return self._queue
+
+    def collect(self, db: Session, actor_id: Optional[int], action: str, entity: Optional[str], entity_ids: List[Optional[int]]) -> None:
+        """
+        One event per id, all with the same actor, action and time, kept
+        on the session until `publish`. Call after the change is committed.
+        """
+        if not settings.AUDIT_LOG_ENABLED:
+            return
+        now = datetime.now(timezone.utc)
+        db.info.setdefault(_PENDING, []).extend(
+            {"user_id": actor_id, "action": action, "entity": entity, "entity_id": entity_id, "created_at": now}
+            for entity_id in entity_ids
+        )
+
+    async def publish(self, db: AsyncSession) -> None:
+        """
+        Queue the events collected on `db`. Never blocks the event loop.
+        """
+        events = db.info.pop(_PENDING, None)
+        if not events:
+            return
+        events_queue = self._get_queue()
+        for i, event in enumerate(events):
+            try:
+                events_queue.put_nowait(event)
+            except queue.Full:
+                # Backpressure: wait for the writer in a thread, within one
+                # deadline for all the remaining events
+                await asyncio.to_thread(self._put_all, events_queue, events[i:])
+                return
+
+    def _put_all(self, events_queue: queue.Queue, events: List[Dict[str, Any]]) -> None:
+        deadline = time.monotonic() + self.enqueue_timeout
+        for i, event in enumerate(events):
+            try:
+                events_queue.put(event, timeout=max(deadline - time.monotonic(), 0))
+            except queue.Full:
+                dropped = events[i:]
+                with self._lock:
+                    self._dropped += len(dropped)
+                logger.error(
+                    f"Audit queue full, dropped {len(dropped)} events, first {event['action']} "
+                    f"{event['entity']} {event['entity_id']} by {event['user_id']}"
+                )
+                return
+
+    def _run(self, events_queue: queue.Queue) -> None:
+        stopping = False
+        while True:
+            # Collect until the batch is full or its first event waited
+            # flush_interval; once stopping, whatever is left
+            batch: List[Dict[str, Any]] = []
+            deadline = 0.0
+            while len(batch) < self.batch_size:
+                try:
+                    if stopping:
+                        item = events_queue.get_nowait()
+                    elif not batch:
+                        item = events_queue.get()
+                    else:
+                        item = events_queue.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    continue
+                if not batch:
+                    deadline = time.monotonic() + self.flush_interval
+                batch.append(item)
+            if batch:
+                self._write(batch)
+            if stopping and events_queue.empty():
+                return
+
+    def _write(self, batch: List[Dict[str, Any]]) -> None:
+        try:
+            try:
+                with engine.begin() as conn:
+                    conn.execute(insert(AuditLog).values(batch))
+            except IntegrityError:
+                # An actor was deleted after their event was queued; keep the
+                # events without them, as SET NULL would have
+                with engine.begin() as conn:
+                    actors = {e["user_id"] for e in batch if e["user_id"] is not None}
+                    existing = set(conn.scalars(select(User.id).where(User.id.in_(actors))))
+                    batch = [{**e, "user_id": e["user_id"] if e["user_id"] in existing else None} for e in batch]
+                    conn.execute(insert(AuditLog).values(batch))
+        except Exception:
+            with self._lock:
+                self._failed += len(batch)
+            logger.exception(f"Failed to write {len(batch)} audit events")
+            return
+        with self._lock:
+            self._written += len(batch)
+            self._batches += 1
+
+    def shutdown(self, timeout: float = 10.0) -> None:
+        """
+        Write out everything queued and stop the thread (restarted by the
+        next event).
+        """
+        with self._lock:
+            events_queue, thread = self._queue, self._thread
+            if events_queue is None or self._pid != os.getpid():
+                return
+            self._queue = self._thread = None
+        events_queue.put(_STOP)
+        thread.join(timeout)
+        if thread.is_alive():
+            logger.error(f"Audit writer still busy after {timeout}s; {events_queue.qsize()} events may be lost")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "pid": os.getpid(),
+                "queued": self._queue.qsize() if self._queue is not None else 0,
+                "max_queue": self.max_queue,
+                "written": self._written,
+                "batches": self._batches,
+                "dropped": self._dropped,
+                "failed": self._failed,
+            }
+
+audit_writer = AuditWriter(
+    max_queue=settings.AUDIT_QUEUE_MAX_SIZE,
+    batch_size=settings.AUDIT_BATCH_SIZE,
+    flush_interval=settings.AUDIT_FLUSH_INTERVAL_SECONDS,
+    enqueue_timeout=settings.AUDIT_ENQUEUE_TIMEOUT_SECONDS,
+)
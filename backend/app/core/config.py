@@ -11,12 +11,81 @@ class Settings(BaseSettings):
     POSTGRES_PASSWORD: str = "Postgres"
     POSTGRES_DB: str = "dexsini_hub"
     DATABASE_URI: Optional[str] = None
+    ASYNC_DATABASE_URI: Optional[str] = None
+    # Connection pool, per engine and per worker process
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = 1800
     
     # Auth
     SECRET_KEY: str = "CHANGE_THIS_TO_A_SECURE_SECRET_KEY" # TODO: Generate secrets
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     BACKEND_CORS_ORIGINS: list[str] = ["http://localhost:5173", "http://localhost:3000"]
+
+    # Principal cache (per worker). Updates through UserRepository evict
+    # immediately in the worker that made them; other workers within the TTL.
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60
+    PRINCIPAL_CACHE_MAX_SIZE: int = 10000
+
+    # bcrypt process pool (per worker; 0 workers hashes in a thread instead)
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 64
+    PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS: float = 5.0
+
+    # Dashboard counters cache (per worker). Writes invalidate it in the
+    # worker that made them; the TTL bounds staleness everywhere else.
+    DASHBOARD_CACHE_TTL_SECONDS: int = 30
+    DASHBOARD_CACHE_MAX_SIZE: int = 1000
+
+    # Leave duration: working days Mon..Sun (1 = working), numpy busday style
+    WORKING_WEEKMASK: str = "1111100"
+    # Expanded holiday calendar (per worker). New holidays show up at once in
+    # the worker that created them; other workers re-read within the TTL.
+    HOLIDAY_CACHE_TTL_SECONDS: int = 300
+    HOLIDAY_CACHE_MAX_YEARS: int = 50
+    # Serialized leave types / holidays lists (per worker), served with an
+    # ETag. Changes show up at once in the worker that made them; other
+    # workers re-read within the TTL.
+    REFERENCE_CACHE_TTL_SECONDS: int = 60
+    # Reject applications that exceed the available leave balance
+    ENFORCE_LEAVE_BALANCE: bool = False
+
+    # Bulk user import (CSV)
+    USER_IMPORT_MAX_ROWS: int = 20000
+    USER_IMPORT_BATCH_SIZE: int = 1000
+
+    # Rows fetched per round trip by streaming exports
+    EXPORT_BATCH_SIZE: int = 1000
+
+    # SQL per request: database time and statement count in a Server-Timing
+    # header, a warning for slow statements and for statements repeated
+    # within one request (a lazy load per row)
+    SQL_INSTRUMENTATION_ENABLED: bool = True
+    SQL_SERVER_TIMING: bool = True
+    SLOW_QUERY_THRESHOLD_MS: float = 200
+    SQL_REPEATED_STATEMENT_THRESHOLD: int = 10
+
+    # Audit log (per worker): events are queued in memory and written to
+    # audit_logs in multi-row INSERTs of up to AUDIT_BATCH_SIZE, within
+    # AUDIT_FLUSH_INTERVAL_SECONDS. With the queue full, a request's events
+    # wait (off the event loop) up to AUDIT_ENQUEUE_TIMEOUT_SECONDS in total
+    # for room; the rest are dropped.
+    AUDIT_LOG_ENABLED: bool = True
+    AUDIT_QUEUE_MAX_SIZE: int = 10000
+    AUDIT_BATCH_SIZE: int = 500
+    AUDIT_FLUSH_INTERVAL_SECONDS: float = 1.0
+    AUDIT_ENQUEUE_TIMEOUT_SECONDS: float = 2.0
+
+    # "development" relaxes checks that must hold in a deployment
+    ENVIRONMENT: str = "production"
+
+    # Prometheus scrape endpoint (/metrics). Scrapers must send the token as
+    # "Authorization: Bearer <token>"; without one the endpoint is closed,
+    # except in development where it is open.
+    METRICS_ENABLED: bool = True
+    METRICS_BEARER_TOKEN: Optional[str] = None
     
     class Config:
         env_file = ".env"
@@ -35,5 +104,19 @@ class Settings(BaseSettings):
                 self.DATABASE_URI = db_url
             else:
                 self.DATABASE_URI = f"postgresql+psycopg2://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_SERVER}/{self.POSTGRES_DB}"
+        if not self.ASYNC_DATABASE_URI:
+            self.ASYNC_DATABASE_URI = self._async_uri(self.DATABASE_URI)
+
+    @staticmethod
+    def _async_uri(uri: str) -> str:
+        # Same database through an asyncio driver
+        for prefix in ("postgresql+psycopg2://", "postgresql://"):
+            if uri.startswith(prefix):
+                uri = "postgresql+asyncpg://" + uri[len(prefix):]
+                # asyncpg spells libpq's sslmode as ssl
+                return uri.replace("sslmode=", "ssl=")
+        if uri.startswith("sqlite://"):
+            return uri.replace("sqlite://", "sqlite+aiosqlite://", 1)
+        return uri
 
 settings = Settings()
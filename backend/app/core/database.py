@@ -1,15 +1,56 @@
+from typing import AsyncGenerator
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
 from app.core.config import settings
+from app.core.db_metrics import InstrumentedQueuePool, InstrumentedAsyncAdaptedQueuePool
+from app.core.query_stats import instrument_engine
 
-engine = create_engine(settings.DATABASE_URI, pool_pre_ping=True)
+pool_options = dict(
+    pool_pre_ping=True,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+)
+
+# Sync engine: scripts, migrations and anything outside the request path
+engine = create_engine(settings.DATABASE_URI, poolclass=InstrumentedQueuePool, **pool_options)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine: the API. Objects stay loaded after commit so responses can
+# be serialized without touching the database again.
+async_engine = create_async_engine(
+    settings.ASYNC_DATABASE_URI, poolclass=InstrumentedAsyncAdaptedQueuePool, **pool_options
+)
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
+if settings.SQL_INSTRUMENTATION_ENABLED:
+    instrument_engine(engine)
+    instrument_engine(async_engine.sync_engine)
+
 Base = declarative_base()
 
+def upsert_insert(db: Session, model):
+    """
+    INSERT for `model` with on_conflict_do_update/do_nothing, from the
+    dialect the session is bound to (Postgres in production, SQLite in dev).
+    """
+    if db.get_bind().dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        from sqlalchemy.dialects.postgresql import insert
+    return insert(model)
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,88 @@
+import os
+import threading
+import time
+from typing import Any, Dict
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+
+class PoolMetrics:
+    """
+    Checkout counters and wait times for one connection pool, per worker.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record_checkout(self, waited: float) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+
+    def record_timeout(self, waited: float) -> None:
+        with self._lock:
+            self.timeouts += 1
+            self.wait_max = max(self.wait_max, waited)
+
+    def snapshot(self, pool: Pool) -> Dict[str, Any]:
+        with self._lock:
+            checkouts = self.checkouts or 1
+            stats = {
+                "checkouts": self.checkouts,
+                "checkout_timeouts": self.timeouts,
+                "avg_wait_ms": round(self.wait_total / checkouts * 1000, 3),
+                "max_wait_ms": round(self.wait_max * 1000, 3),
+            }
+        if isinstance(pool, QueuePool):
+            stats.update(
+                pool_size=pool.size(),
+                checked_out=pool.checkedout(),
+                idle=pool.checkedin(),
+                # Negative while the pool is still below pool_size
+                overflow=pool.overflow(),
+                timeout_seconds=pool.timeout(),
+            )
+        return stats
+
+class _InstrumentedPoolMixin:
+    metrics: PoolMetrics
+
+    def _do_get(self):
+        # QueuePool blocks in _do_get while the pool is exhausted, so timing
+        # it measures exactly how long a request waited for a connection
+        started = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.record_timeout(time.perf_counter() - started)
+            raise
+        self.metrics.record_checkout(time.perf_counter() - started)
+        return conn
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    metrics = PoolMetrics()
+
+class InstrumentedAsyncAdaptedQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    metrics = PoolMetrics()
+
+def pool_stats() -> Dict[str, Any]:
+    from app.core.config import settings
+    from app.core.database import engine, async_engine
+
+    return {
+        "pid": os.getpid(),
+        # Each worker may open up to pool_size + max_overflow per engine;
+        # size these so that workers x that stays under max_connections
+        "config": {
+            "pool_size": settings.DB_POOL_SIZE,
+            "max_overflow": settings.DB_MAX_OVERFLOW,
+            "pool_timeout": settings.DB_POOL_TIMEOUT,
+            "pool_recycle": settings.DB_POOL_RECYCLE,
+        },
+        "sync": InstrumentedQueuePool.metrics.snapshot(engine.pool),
+        "async": InstrumentedAsyncAdaptedQueuePool.metrics.snapshot(async_engine.pool),
+    }
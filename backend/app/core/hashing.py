@@ -0,0 +1,145 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Callable, Dict, Optional
+from app.core.config import settings
+
+class PasswordHashPoolBusy(Exception):
+    pass
+
+def _timed(fn: Callable, *args: Any) -> tuple:
+    # Runs in the pool process; report when work actually started so the
+    # parent can tell queue wait apart from bcrypt time
+    started_at = time.time()
+    return started_at, fn(*args)
+
+class PasswordHashPool:
+    """
+    Dedicated process pool for bcrypt.
+
+    bcrypt is pure CPU; running it on request threads lets a login spike
+    starve every other endpoint in the worker. Work goes to at most
+    `max_workers` processes, and at most `max_pending` jobs may be queued
+    or running at once; beyond that callers wait up to `queue_timeout`
+    and then get PasswordHashPoolBusy instead of piling up.
+    """
+
+    def __init__(self, max_workers: int, max_pending: int, queue_timeout: float):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.queue_timeout = queue_timeout
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pid: Optional[int] = None
+        self._in_flight = 0
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._queue_wait_total = 0.0
+        self._queue_wait_max = 0.0
+        self._run_total = 0.0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # Created lazily and per process: gunicorn forks workers after import
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+                self._pid = os.getpid()
+            return self._executor
+
+    def submit(self, fn: Callable, *args: Any) -> Future:
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            with self._lock:
+                self._rejected += 1
+            raise PasswordHashPoolBusy("Password hashing is overloaded, try again shortly")
+        return self._dispatch(fn, *args)
+
+    def _dispatch(self, fn: Callable, *args: Any) -> Future:
+        # Caller holds a slot; it is released when the job finishes
+        submitted_at = time.time()
+        with self._lock:
+            self._in_flight += 1
+            self._submitted += 1
+        try:
+            raw = self._get_executor().submit(_timed, fn, *args)
+        except Exception:
+            self._release(failed=True)
+            raise
+
+        result: Future = Future()
+
+        def _done(f: Future) -> None:
+            try:
+                started_at, value = f.result()
+            except BaseException as e:
+                self._release(failed=True)
+                result.set_exception(e)
+                return
+            self._release(queue_wait=started_at - submitted_at, run_time=time.time() - started_at)
+            result.set_result(value)
+
+        raw.add_done_callback(_done)
+        return result
+
+    def _release(self, failed: bool = False, queue_wait: float = 0.0, run_time: float = 0.0) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            if failed:
+                self._failed += 1
+            else:
+                self._completed += 1
+                self._queue_wait_total += max(queue_wait, 0.0)
+                self._queue_wait_max = max(self._queue_wait_max, queue_wait)
+                self._run_total += run_time
+        self._slots.release()
+
+    def run(self, fn: Callable, *args: Any) -> Any:
+        if self.max_workers <= 0:
+            # Pool disabled (scripts, tests): hash inline
+            return fn(*args)
+        return self.submit(fn, *args).result()
+
+    async def run_async(self, fn: Callable, *args: Any) -> Any:
+        if self.max_workers <= 0:
+            # No pool, but still never bcrypt on the event loop
+            return await asyncio.to_thread(fn, *args)
+        if self._slots.acquire(blocking=False):
+            future = self._dispatch(fn, *args)
+        else:
+            # Pool is saturated: wait for a slot off the event loop
+            future = await asyncio.to_thread(self.submit, fn, *args)
+        return await asyncio.wrap_future(future)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            completed = self._completed or 1
+            return {
+                "pid": os.getpid(),
+                "max_workers": self.max_workers,
+                "max_pending": self.max_pending,
+                "in_flight": self._in_flight,
+                "queue_depth": max(self._in_flight - self.max_workers, 0),
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "failed": self._failed,
+                "rejected": self._rejected,
+                "avg_queue_wait_ms": round(self._queue_wait_total / completed * 1000, 2),
+                "max_queue_wait_ms": round(self._queue_wait_max * 1000, 2),
+                "avg_hash_ms": round(self._run_total / completed * 1000, 2),
+            }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None and self._pid == os.getpid():
+                self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+password_hash_pool = PasswordHashPool(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+    queue_timeout=settings.PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS,
+)
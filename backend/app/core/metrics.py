@@ -0,0 +1,153 @@
+"""
+Prometheus metrics for the HTTP API.
+
+With several gunicorn workers every process keeps its own counters. Set
+PROMETHEUS_MULTIPROC_DIR (gunicorn.conf.py does) before the workers
+import prometheus_client and each process writes its samples to mmapped
+files there, which the scrape endpoint sums up. Without it the metrics
+are those of the current process.
+"""
+import os
+import time
+from typing import Dict, Tuple
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest,
+)
+from prometheus_client import multiprocess
+from fastapi.routing import iter_route_contexts
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Requests that matched no route share one label, so scanners probing
+# random paths cannot grow the number of series
+UNMATCHED_ROUTE = "<unmatched>"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Time from receiving the request to sending the last body chunk",
+    ("method", "route"),
+    buckets=LATENCY_BUCKETS,
+)
+RESPONSE_SIZE = Histogram(
+    "http_response_size_bytes",
+    "Response body size",
+    ("method", "route"),
+    buckets=SIZE_BUCKETS,
+)
+REQUESTS = Counter(
+    "http_requests",
+    "Finished requests",
+    ("method", "route", "status"),
+)
+# The route is only known once routing ran, so in-flight requests are
+# counted per method
+IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "Requests being handled",
+    ("method",),
+    multiprocess_mode="livesum",
+)
+
+# id(route) -> full path template; routes of included routers only know
+# the part of the path after their router's prefix
+_templates: Dict[int, str] = {}
+
+def route_template(scope: Scope) -> str:
+    """
+    The path template of the route that handled the request, e.g.
+    /api/v1/leaves/{leave_id}, or UNMATCHED_ROUTE before routing or when
+    nothing matched.
+    """
+    global _templates
+    # The router leaves the matched route in the scope
+    route = scope.get("route")
+    if route is None:
+        return UNMATCHED_ROUTE
+    template = _templates.get(id(route))
+    if template is None:
+        _templates = {
+            id(context.original_route): context.path_format
+            for context in iter_route_contexts(scope["app"].routes)
+            if context.path_format
+        }
+        template = _templates.setdefault(id(route), getattr(route, "path", UNMATCHED_ROUTE))
+    return template
+
+class MetricsMiddleware:
+    """
+    Records latency, response size and status per templated route (e.g.
+    /api/v1/leaves/{leave_id}) and the number of requests in flight.
+
+    A plain ASGI middleware rather than BaseHTTPMiddleware, which would
+    add a task and a body copy to every request. Labelled children are
+    looked up once and kept, so recording is a few dict hits and the
+    sample writes.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self._route_metrics: Dict[Tuple[str, str], Tuple] = {}
+        self._counters: Dict[Tuple[str, str, int], Counter] = {}
+        self._in_progress: Dict[str, Gauge] = {}
+
+    def _children(self, method: str, route: str) -> Tuple:
+        key = (method, route)
+        children = self._route_metrics.get(key)
+        if children is None:
+            children = (REQUEST_DURATION.labels(method, route), RESPONSE_SIZE.labels(method, route))
+            self._route_metrics[key] = children
+        return children
+
+    def _counter(self, method: str, route: str, status: int) -> Counter:
+        key = (method, route, status)
+        counter = self._counters.get(key)
+        if counter is None:
+            counter = self._counters[key] = REQUESTS.labels(method, route, str(status))
+        return counter
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        in_progress = self._in_progress.get(method)
+        if in_progress is None:
+            in_progress = self._in_progress[method] = IN_PROGRESS.labels(method)
+        status = 500
+        size = 0
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        in_progress.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            in_progress.dec()
+            path = route_template(scope)
+            duration, response_size = self._children(method, path)
+            duration.observe(elapsed)
+            response_size.observe(size)
+            self._counter(method, path, status).inc()
+
+def metrics_exposition() -> Tuple[bytes, str]:
+    """
+    The text exposition of every metric, summed over all workers in
+    multiprocess mode, and its content type.
+    """
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
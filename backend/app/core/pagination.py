@@ -0,0 +1,54 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Query
+
+class InvalidCursor(ValueError):
+    pass
+
+def encode_cursor(created_at: datetime, id: int) -> str:
+    """
+    Build the opaque `after` token for a (created_at, id) keyset position.
+    """
+    raw = json.dumps([created_at.isoformat(), id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), int(id)
+    except (ValueError, TypeError, json.JSONDecodeError):
+        raise InvalidCursor("Invalid pagination cursor")
+
+def keyset_paginate(
+    query: Query, model: Any, after: Optional[str], limit: int, descending: bool = True
+) -> Tuple[List[Any], Optional[str]]:
+    """
+    Page `query` on (model.created_at, model.id) instead of OFFSET.
+
+    The position is strictly after the last row the client saw, so rows
+    inserted while paging neither shift pages nor get returned twice, and
+    every page is a single index range scan regardless of depth.
+    """
+    key = tuple_(model.created_at, model.id)
+    if after:
+        created_at, id = decode_cursor(after)
+        position = tuple_(created_at, id)
+        query = query.filter(key < position if descending else key > position)
+
+    if descending:
+        query = query.order_by(model.created_at.desc(), model.id.desc())
+    else:
+        query = query.order_by(model.created_at.asc(), model.id.asc())
+
+    # Fetch one extra row to know whether another page exists
+    rows = query.limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(last.created_at, last.id)
+    return rows, next_cursor
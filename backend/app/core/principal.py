@@ -0,0 +1,77 @@
+import hashlib
+import threading
+from dataclasses import dataclass
+from typing import Dict, Optional
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models.user import UserRole
+
+@dataclass(frozen=True)
+class Principal:
+    """
+    The authenticated caller, as far as authorization needs to know.
+    Endpoints that need the full profile load it explicitly.
+    """
+    id: int
+    role: UserRole
+    manager_id: Optional[int]
+    is_active: bool
+
+class PrincipalCache:
+    """
+    Verified principals keyed by a digest of the bearer token.
+
+    Each entry remembers the user's generation when it was cached;
+    `invalidate_user` bumps the generation, which retires every token of
+    that user at once without having to track the tokens themselves. A
+    principal is only cached with the generation read before it was
+    loaded, so a load racing an invalidation is not kept.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._generations: Dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def token_key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[Principal]:
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        generation, principal = entry
+        if generation != self._generations.get(principal.id, 0):
+            self._cache.pop(key)
+            return None
+        return principal
+
+    def generation(self, user_id: int) -> int:
+        """
+        Read before loading the user, and pass to `set`.
+        """
+        return self._generations.get(user_id, 0)
+
+    def set(self, key: str, principal: Principal, generation: int, ttl: Optional[float] = None) -> None:
+        """
+        Cache `principal`, loaded when the user was at `generation`. If the
+        user was invalidated since, the load may predate the change and is
+        not cached.
+        """
+        with self._lock:
+            if generation != self._generations.get(principal.id, 0):
+                return
+            self._cache.set(key, (generation, principal), ttl=ttl)
+
+    def invalidate_user(self, user_id: int) -> None:
+        with self._lock:
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+principal_cache = PrincipalCache(
+    maxsize=settings.PRINCIPAL_CACHE_MAX_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+)
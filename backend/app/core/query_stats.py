@@ -0,0 +1,112 @@
+"""
+Per-request SQL statistics from engine events.
+
+The middleware opens a QueryStats for each request in a ContextVar; the
+cursor hooks on both engines add every statement's count and time to
+it. Run_sync greenlets and threadpool endpoints inherit the context, so
+statements from any of them land in the right request.
+"""
+import logging
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.config import settings
+from app.core.metrics import route_template
+
+logger = logging.getLogger(__name__)
+
+# Statements are logged up to this many characters
+LOGGED_STATEMENT_LENGTH = 500
+
+@dataclass
+class QueryStats:
+    scope: Scope
+    count: int = 0
+    seconds: float = 0.0
+    # Statement text -> executions; the same text with different parameters
+    # over and over is what a lazy load per row looks like
+    statements: Dict[str, int] = field(default_factory=dict)
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.count += 1
+        self.seconds += seconds
+        self.statements[statement] = self.statements.get(statement, 0) + 1
+
+    def server_timing(self, total_seconds: float) -> str:
+        return f'db;dur={self.seconds * 1000:.1f};desc="{self.count} queries", total;dur={total_seconds * 1000:.1f}'
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+def _shorten(statement: str) -> str:
+    statement = " ".join(statement.split())
+    if len(statement) > LOGGED_STATEMENT_LENGTH:
+        return statement[:LOGGED_STATEMENT_LENGTH] + "..."
+    return statement
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._query_started = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._query_started
+    stats = _current.get()
+    if stats is not None:
+        stats.record(statement, elapsed)
+    if elapsed * 1000 >= settings.SLOW_QUERY_THRESHOLD_MS:
+        route = route_template(stats.scope) if stats is not None else "-"
+        logger.warning(f"Slow query ({elapsed * 1000:.1f} ms) on {route}: {_shorten(statement)}")
+
+def instrument_engine(engine: Engine) -> None:
+    """
+    Time every statement on `engine` (the sync_engine of an async one).
+    """
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+class QueryStatsMiddleware:
+    """
+    Collects the statements of each request. Adds a Server-Timing header
+    with the database time and statement count (up to the moment the
+    response starts, so a streamed body's queries are not in it) and
+    logs statements that ran SQL_REPEATED_STATEMENT_THRESHOLD or more
+    times in one request.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats(scope)
+        started = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start" and settings.SQL_SERVER_TIMING:
+                value = stats.server_timing(time.perf_counter() - started)
+                message["headers"] = [*message.get("headers", ()), (b"server-timing", value.encode())]
+            await send(message)
+
+        token = _current.set(stats)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            self._report_repeats(stats)
+
+    def _report_repeats(self, stats: QueryStats) -> None:
+        threshold = settings.SQL_REPEATED_STATEMENT_THRESHOLD
+        repeated = [(n, s) for s, n in stats.statements.items() if n >= threshold]
+        if not repeated:
+            return
+        route = route_template(stats.scope)
+        for times, statement in sorted(repeated, reverse=True):
+            logger.warning(
+                f"Statement ran {times} times in one request to {stats.scope['method']} {route} "
+                f"(N+1?): {_shorten(statement)}"
+            )
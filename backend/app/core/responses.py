@@ -0,0 +1,58 @@
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import orjson
+from fastapi.responses import JSONResponse
+from sqlalchemy.engine import Row
+
+# Nested objects in flat rows: column "user__email" becomes {"user": {"email": ...}}
+NESTED_SEPARATOR = "__"
+
+class ORJSONResponse(JSONResponse):
+    """
+    JSON rendered by orjson, which handles dates, datetimes, times and
+    enums natively. UTC datetimes end in "Z", as Pydantic writes them.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_UTC_Z)
+
+def _plan(fields: Sequence[str]) -> List[Tuple[str, Optional[str]]]:
+    plan = []
+    for name in fields:
+        parent, _, child = name.partition(NESTED_SEPARATOR)
+        plan.append((parent, child or None))
+    return plan
+
+def rows_to_dicts(rows: Sequence[Row]) -> List[Dict[str, Any]]:
+    """
+    Plain dicts from flat result rows, in column order, without building
+    ORM objects or validating models. Columns labelled "<name>__<field>"
+    are grouped into a nested `name` object; it is None when all its
+    columns are (an outer join that found nothing).
+    """
+    if not rows:
+        return []
+    plan = _plan(rows[0]._fields)
+    nested = {parent for parent, child in plan if child is not None}
+    out = []
+    for row in rows:
+        item: Dict[str, Any] = {}
+        for (parent, child), value in zip(plan, row):
+            if child is None:
+                item[parent] = value
+            else:
+                item.setdefault(parent, {})[child] = value
+        for parent in nested:
+            if all(v is None for v in item[parent].values()):
+                item[parent] = None
+        out.append(item)
+    return out
+
+def rows_response(rows: Sequence[Row], next_cursor: Optional[str] = None, paged: bool = False) -> ORJSONResponse:
+    """
+    A list response (or a `{items, next_cursor}` page) straight from rows
+    whose columns already follow the response schema.
+    """
+    items = rows_to_dicts(rows)
+    if paged:
+        return ORJSONResponse({"items": items, "next_cursor": next_cursor})
+    return ORJSONResponse(items)
@@ -1,8 +1,10 @@
 from datetime import datetime, timedelta, timezone
-from typing import Any, Union
+import asyncio
+from typing import Any, List, Union
 from jose import jwt
 from passlib.context import CryptContext
 from app.core.config import settings
+from app.core.hashing import password_hash_pool
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -16,8 +18,40 @@ def create_access_token(subject: Union[str, Any], expires_delta: timedelta = Non
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
+# bcrypt itself; these run inside the password hash pool processes
+def _verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
-def get_password_hash(password: str) -> str:
+def _hash_password(password: str) -> str:
     return pwd_context.hash(password)
+
+def _hash_passwords(passwords: List[str]) -> List[str]:
+    return [pwd_context.hash(p) for p in passwords]
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return password_hash_pool.run(_verify_password, plain_password, hashed_password)
+
+def get_password_hash(password: str) -> str:
+    return password_hash_pool.run(_hash_password, password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await password_hash_pool.run_async(_verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    return await password_hash_pool.run_async(_hash_password, password)
+
+async def get_password_hashes_async(passwords: List[str]) -> List[str]:
+    """
+    Hash many passwords (bulk import) as a few chunked pool jobs, so every
+    pool process works on its own share without taking a pending slot per
+    password.
+    """
+    if not passwords:
+        return []
+    chunks = max(password_hash_pool.max_workers, 1) * 4
+    size = -(-len(passwords) // chunks)
+    results = await asyncio.gather(*(
+        password_hash_pool.run_async(_hash_passwords, passwords[i:i + size])
+        for i in range(0, len(passwords), size)
+    ))
+    return [h for chunk in results for h in chunk]
@@ -1,6 +1,13 @@
-from fastapi import FastAPI
+import secrets
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from app.core.config import settings
+from app.core.audit import audit_writer
+from app.core.hashing import PasswordHashPoolBusy, password_hash_pool
+from app.core.database import async_engine
+from app.core.metrics import MetricsMiddleware, metrics_exposition
+from app.core.query_stats import QueryStatsMiddleware
 from app.api.v1.api import api_router
 
 app = FastAPI(
@@ -20,8 +27,40 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if settings.SQL_INSTRUMENTATION_ENABLED:
+    app.add_middleware(QueryStatsMiddleware)
+
+# Outermost, so the timing covers the other middleware too
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
+@app.exception_handler(PasswordHashPoolBusy)
+def password_hash_pool_busy_handler(request: Request, exc: PasswordHashPoolBusy):
+    return JSONResponse(
+        status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"}
+    )
+
+@app.on_event("shutdown")
+async def shutdown():
+    password_hash_pool.shutdown()
+    audit_writer.shutdown()
+    await async_engine.dispose()
+
 @app.get("/")
 def root():
     return {"message": "Welcome to Dexsini Hub API"}
+
+if settings.METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    def metrics(request: Request):
+        if settings.METRICS_BEARER_TOKEN:
+            expected = f"Bearer {settings.METRICS_BEARER_TOKEN}"
+            if not secrets.compare_digest(request.headers.get("authorization", ""), expected):
+                return Response(status_code=401, headers={"WWW-Authenticate": "Bearer"})
+        elif settings.ENVIRONMENT != "development":
+            # No token configured: fail closed rather than publish metrics
+            return Response(status_code=403)
+        body, content_type = metrics_exposition()
+        return Response(content=body, media_type=content_type)
@@ -1,3 +1,4 @@
 from .user import User, UserRole
-from .leave import LeaveRequest, LeaveType, Holiday, LeaveStatus, HolidayType
-from .ot import OTRequest, OTStatus
+from .leave import LeaveRequest, LeaveType, Holiday, LeaveStatus, HolidayType, LeaveBalance
+from .ot import OTRequest, OTStatus, OTMonthlyRollup
+from .audit import AuditLog, AuditAction, AuditEntity
@@ -0,0 +1,54 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from app.core.database import Base
+from app.models.leave import LeaveStatus
+from app.models.ot import OTStatus
+import enum
+
+class AuditAction(str, enum.Enum):
+    USER_CREATED = "USER_CREATED"
+    USER_UPDATED = "USER_UPDATED"
+    USER_DELETED = "USER_DELETED"
+    # Status changes, by new status (LEAVE_STATUS_ACTIONS, OT_STATUS_ACTIONS)
+    LEAVE_PENDING = "LEAVE_PENDING"
+    LEAVE_PENDING_ADMIN = "LEAVE_PENDING_ADMIN"
+    LEAVE_APPROVED = "LEAVE_APPROVED"
+    LEAVE_REJECTED = "LEAVE_REJECTED"
+    LEAVE_CANCELLED = "LEAVE_CANCELLED"
+    OT_PENDING = "OT_PENDING"
+    OT_APPROVED = "OT_APPROVED"
+    OT_REJECTED = "OT_REJECTED"
+
+LEAVE_STATUS_ACTIONS = {
+    LeaveStatus.PENDING: AuditAction.LEAVE_PENDING,
+    LeaveStatus.PENDING_ADMIN: AuditAction.LEAVE_PENDING_ADMIN,
+    LeaveStatus.APPROVED: AuditAction.LEAVE_APPROVED,
+    LeaveStatus.REJECTED: AuditAction.LEAVE_REJECTED,
+    LeaveStatus.CANCELLED: AuditAction.LEAVE_CANCELLED,
+}
+OT_STATUS_ACTIONS = {
+    OTStatus.PENDING: AuditAction.OT_PENDING,
+    OTStatus.APPROVED: AuditAction.OT_APPROVED,
+    OTStatus.REJECTED: AuditAction.OT_REJECTED,
+}
+
+class AuditEntity(str, enum.Enum):
+    USER = "user"
+    LEAVE_REQUEST = "leave_request"
+    OT_REQUEST = "ot_request"
+
+class AuditLog(Base):
+    """
+    Who did what to which row. Written in batches by app.core.audit, so
+    created_at is when the change happened, not when the row went in.
+    """
+    __tablename__ = "audit_logs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    # The actor; kept (as NULL) when that user is deleted
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"))
+    # AuditAction / AuditEntity values; plain strings so new ones need no migration
+    action = Column(String(100), nullable=False)
+    entity = Column(String(50))
+    entity_id = Column(Integer)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -1,6 +1,7 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Enum, Date, Float, Text
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Enum, Date, Float, Text, Index, UniqueConstraint
+from sqlalchemy.dialects.postgresql import ExcludeConstraint
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, literal_column
 from app.core.database import Base
 import enum
 
@@ -11,6 +12,9 @@ class LeaveStatus(str, enum.Enum):
     REJECTED = "REJECTED"
     CANCELLED = "CANCELLED"
 
+# Statuses that hold the dates; a user's leaves in these may not overlap
+ACTIVE_LEAVE_STATUSES = (LeaveStatus.PENDING, LeaveStatus.PENDING_ADMIN, LeaveStatus.APPROVED)
+
 class HolidayType(str, enum.Enum):
     PUBLIC = "PUBLIC"
     OPTIONAL = "OPTIONAL"
@@ -24,6 +28,15 @@ class LeaveType(Base):
     carry_forward = Column(Boolean, default=False)
     color_hex = Column(String, nullable=False)
 
+def leave_daterange(start, end):
+    # Inclusive daterange; queries must build it the same way as the GiST
+    # index below for Postgres to use it
+    return func.daterange(start, end, literal_column("'[]'"))
+
+def leave_user_range(user_id):
+    # One-point int4range, so user_id can share a plain GiST index with dates
+    return func.int4range(user_id, user_id, literal_column("'[]'"))
+
 class LeaveRequest(Base):
     __tablename__ = "leave_requests"
     
@@ -44,6 +57,33 @@ class LeaveRequest(Base):
     leave_type = relationship("LeaveType")
     approver = relationship("User", foreign_keys=[approver_id])
 
+    __table_args__ = (
+        # Keyset pagination on (created_at, id), globally, per user and per status
+        Index("idx_leave_created_id", "created_at", "id"),
+        Index("idx_leave_user_created_id", "user_id", "created_at", "id"),
+        Index("idx_leave_status_created_id", "status", "created_at", "id"),
+        # Dashboard counters: team joins by user, "on leave today" by dates
+        Index("idx_leave_user_status", "user_id", "status"),
+        Index("idx_leave_status_dates", "status", "start_date", "end_date"),
+        # Calendar: approved leaves overlapping a date range
+        Index(
+            "idx_leave_approved_range",
+            leave_daterange(start_date, end_date),
+            postgresql_using="gist",
+            postgresql_where=(status == LeaveStatus.APPROVED),
+        ),
+        # No overlapping active leaves per user. user_id goes in as a
+        # one-point int4range so plain GiST can index it (no btree_gist);
+        # the constraint's index also answers conflict lookups.
+        ExcludeConstraint(
+            (leave_user_range(user_id), "&&"),
+            (leave_daterange(start_date, end_date), "&&"),
+            name="excl_leave_user_active_range",
+            using="gist",
+            where=status.in_(ACTIVE_LEAVE_STATUSES),
+        ),
+    )
+
 class Holiday(Base):
     __tablename__ = "holidays"
     
@@ -52,3 +92,30 @@ class Holiday(Base):
     name = Column(String, nullable=False)
     type = Column(Enum(HolidayType), default=HolidayType.PUBLIC)
     is_recurring = Column(Boolean, default=True)
+
+class LeaveBalance(Base):
+    """
+    Per (user, leave type, year) ledger, kept current by the leave
+    repository in the same transaction as each request status change.
+    """
+    __tablename__ = "leave_balances"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    leave_type_id = Column(Integer, ForeignKey("leave_types.id", ondelete="CASCADE"), nullable=False)
+    year = Column(Integer, nullable=False)
+    allotted_days = Column(Float, nullable=False)
+    carried_forward_days = Column(Float, nullable=False, default=0)
+    used_days = Column(Float, nullable=False, default=0)
+    pending_days = Column(Float, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    leave_type = relationship("LeaveType")
+
+    __table_args__ = (
+        UniqueConstraint("user_id", "leave_type_id", "year", name="uq_leave_balance_user_type_year"),
+    )
+
+    @property
+    def available_days(self) -> float:
+        return self.allotted_days + self.carried_forward_days - self.used_days - self.pending_days
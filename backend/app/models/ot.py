@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Enum, Date, Time, Float, Text
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Enum, Date, Time, Float, Text, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -26,3 +26,37 @@ class OTRequest(Base):
     
     user = relationship("User", foreign_keys=[user_id], back_populates="ot_requests")
     approver = relationship("User", foreign_keys=[approver_id])
+
+    __table_args__ = (
+        # Keyset pagination on (created_at, id), globally, per user and per status
+        Index("idx_ot_created_id", "created_at", "id"),
+        Index("idx_ot_user_created_id", "user_id", "created_at", "id"),
+        Index("idx_ot_status_created_id", "status", "created_at", "id"),
+        # Dashboard counters for a manager's team
+        Index("idx_ot_user_status", "user_id", "status"),
+    )
+
+class OTMonthlyRollup(Base):
+    """
+    Per (user, month) OT totals, kept current by the OT repository in the
+    same transaction as each request status change. `month` is the first
+    day of the month.
+    """
+    __tablename__ = "ot_monthly_rollups"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    month = Column(Date, nullable=False)
+    approved_hours = Column(Float, nullable=False, default=0)
+    pending_hours = Column(Float, nullable=False, default=0)
+    approved_count = Column(Integer, nullable=False, default=0)
+    pending_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    user = relationship("User")
+
+    __table_args__ = (
+        UniqueConstraint("user_id", "month", name="uq_ot_rollup_user_month"),
+        # Payroll: every employee for a month range
+        Index("idx_ot_rollup_month_user", "month", "user_id"),
+    )
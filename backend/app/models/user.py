@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Enum, Date
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Enum, Date, Index, PrimaryKeyConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -29,3 +29,28 @@ class User(Base):
     manager = relationship("User", remote_side=[id], backref="subordinates")
     leave_requests = relationship("LeaveRequest", back_populates="user", cascade="all, delete-orphan", foreign_keys="LeaveRequest.user_id")
     ot_requests = relationship("OTRequest", back_populates="user", cascade="all, delete-orphan", foreign_keys="OTRequest.user_id")
+
+    __table_args__ = (
+        Index("idx_users_created_id", "created_at", "id"),
+        # Team scoping (dashboard, approvals, /users/team)
+        Index("idx_users_manager_id", "manager_id"),
+    )
+
+class UserHierarchy(Base):
+    """
+    Closure table of the reporting tree: one row per (ancestor, descendant)
+    pair, `depth` levels apart, including each user with itself at depth 0.
+    Kept in step with users.manager_id by the user repository.
+    """
+    __tablename__ = "user_hierarchy"
+
+    ancestor_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    descendant_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    depth = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        # Subtree of a manager: one range scan on the primary key
+        PrimaryKeyConstraint("ancestor_id", "descendant_id"),
+        # Ancestors of a user (moves, removals)
+        Index("idx_user_hierarchy_descendant", "descendant_id", "ancestor_id"),
+    )
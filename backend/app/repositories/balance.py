@@ -0,0 +1,202 @@
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import select, update, and_, case, func, tuple_
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import upsert_insert
+from app.models.leave import LeaveBalance, LeaveType, LeaveStatus
+
+PENDING_STATUSES = (LeaveStatus.PENDING, LeaveStatus.PENDING_ADMIN)
+
+@dataclass(frozen=True)
+class LeaveTransition:
+    """
+    A leave request moving from `old_status` to `new_status`.
+    `old_status` is None for a new request.
+    """
+    user_id: int
+    leave_type_id: int
+    year: int
+    days: float
+    old_status: Optional[LeaveStatus]
+    new_status: Optional[LeaveStatus]
+
+def _contribution(status: Optional[LeaveStatus], days: float) -> Tuple[float, float]:
+    # (used, pending) a request in `status` adds to its balance row
+    if status == LeaveStatus.APPROVED:
+        return days, 0.0
+    if status in PENDING_STATUSES:
+        return 0.0, days
+    return 0.0, 0.0
+
+def carried_forward(user_id, leave_type_id, year):
+    """
+    Days carried into `year`: what was left of the (user, type) row of the
+    year before, if positive and the type carries forward, else 0. Pending
+    days count as spent until they are decided. Pass columns to correlate
+    it with an outer query. Used for new rows, for reading balances of years
+    without a row, and to refresh later rows, so all three agree.
+    """
+    prev = aliased(LeaveBalance)
+    prev_type = aliased(LeaveType)
+    remaining = prev.allotted_days + prev.carried_forward_days - prev.used_days - prev.pending_days
+    return func.coalesce(
+        select(case((remaining > 0, remaining), else_=0.0))
+        .join(prev_type, prev_type.id == prev.leave_type_id)
+        .where(
+            prev.user_id == user_id,
+            prev.leave_type_id == leave_type_id,
+            prev.year == year - 1,
+            prev_type.carry_forward.is_(True),
+        )
+        .scalar_subquery(),
+        0.0,
+    )
+
+class LeaveBalanceRepository:
+    def get_balance(self, db: Session, user_id: int, leave_type_id: int, year: int) -> Optional[LeaveBalance]:
+        return db.query(LeaveBalance).filter(
+            LeaveBalance.user_id == user_id,
+            LeaveBalance.leave_type_id == leave_type_id,
+            LeaveBalance.year == year,
+        ).first()
+
+    def get_available_days(self, db: Session, user_id: int, leave_type_id: int, year: int) -> Optional[float]:
+        """
+        Days still available, from the ledger row or, if there is none yet,
+        the type's default allotment plus what carries over from last
+        year. None for an unknown leave type.
+        """
+        row = db.query(
+            LeaveType.default_days_per_year, LeaveBalance, carried_forward(user_id, LeaveType.id, year)
+        ).outerjoin(
+            LeaveBalance,
+            and_(
+                LeaveBalance.leave_type_id == LeaveType.id,
+                LeaveBalance.user_id == user_id,
+                LeaveBalance.year == year,
+            ),
+        ).filter(LeaveType.id == leave_type_id).first()
+        if row is None:
+            return None
+        default_days, balance, carried = row
+        return balance.available_days if balance is not None else float(default_days) + carried
+
+    def get_balances(self, db: Session, user_id: int, year: int) -> List[LeaveBalance]:
+        """
+        One row per leave type. Types without a ledger row yet (nothing
+        applied this year) come back as transient rows at the default
+        allotment and last year's carry-over, as the first request of the
+        year will store them, from the same query.
+        """
+        rows = db.query(LeaveType, LeaveBalance, carried_forward(user_id, LeaveType.id, year)).outerjoin(
+            LeaveBalance,
+            and_(
+                LeaveBalance.leave_type_id == LeaveType.id,
+                LeaveBalance.user_id == user_id,
+                LeaveBalance.year == year,
+            ),
+        ).order_by(LeaveType.id).all()
+
+        balances = []
+        for leave_type, balance, carried in rows:
+            if balance is None:
+                balance = LeaveBalance(
+                    user_id=user_id, leave_type_id=leave_type.id, year=year,
+                    allotted_days=float(leave_type.default_days_per_year),
+                    carried_forward_days=carried, used_days=0.0, pending_days=0.0,
+                )
+            balances.append(balance)
+        return balances
+
+    def apply_transitions(self, db: Session, transitions: Iterable[LeaveTransition]) -> None:
+        """
+        Fold status transitions into the ledger with one multi-row upsert.
+        Does not commit: callers run it in the transaction that changes the
+        requests. A missing row starts at the type's default allotment plus
+        what carried over from last year's row; existing rows of later years
+        have their carry-over refreshed.
+        """
+        deltas: Dict[Tuple[int, int, int], List[float]] = defaultdict(lambda: [0.0, 0.0])
+        for t in transitions:
+            old_used, old_pending = _contribution(t.old_status, t.days)
+            new_used, new_pending = _contribution(t.new_status, t.days)
+            delta = deltas[(t.user_id, t.leave_type_id, t.year)]
+            delta[0] += new_used - old_used
+            delta[1] += new_pending - old_pending
+        deltas = {k: v for k, v in deltas.items() if v != [0.0, 0.0]}
+        if not deltas:
+            return
+
+        values = []
+        for (user_id, leave_type_id, year), (used, pending) in deltas.items():
+            values.append({
+                "user_id": user_id,
+                "leave_type_id": leave_type_id,
+                "year": year,
+                "allotted_days": select(LeaveType.default_days_per_year).where(
+                    LeaveType.id == leave_type_id
+                ).scalar_subquery(),
+                "carried_forward_days": carried_forward(user_id, leave_type_id, year),
+                "used_days": used,
+                "pending_days": pending,
+            })
+
+        stmt = upsert_insert(db, LeaveBalance).values(values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["user_id", "leave_type_id", "year"],
+            set_={
+                "used_days": LeaveBalance.used_days + stmt.excluded.used_days,
+                "pending_days": LeaveBalance.pending_days + stmt.excluded.pending_days,
+                "updated_at": func.now(),
+            },
+        )
+        db.execute(stmt)
+        self._refresh_carry_forward(db, deltas)
+
+    def _refresh_carry_forward(self, db: Session, keys: Iterable[Tuple[int, int, int]]) -> None:
+        """
+        Recompute carried_forward_days of the rows after the changed years,
+        oldest first so each one sees the year before it already updated.
+        """
+        first_year: Dict[Tuple[int, int], int] = {}
+        for user_id, leave_type_id, year in keys:
+            key = (user_id, leave_type_id)
+            first_year[key] = min(year, first_year.get(key, year))
+        later = db.execute(
+            select(LeaveBalance.user_id, LeaveBalance.leave_type_id, LeaveBalance.year)
+            .join(LeaveType, LeaveType.id == LeaveBalance.leave_type_id)
+            .where(
+                tuple_(LeaveBalance.user_id, LeaveBalance.leave_type_id).in_(list(first_year)),
+                LeaveBalance.year > min(first_year.values()),
+                LeaveType.carry_forward.is_(True),
+            )
+            .order_by(LeaveBalance.year)
+        ).all()
+        for user_id, leave_type_id, year in later:
+            if year <= first_year[(user_id, leave_type_id)]:
+                continue
+            db.execute(
+                update(LeaveBalance)
+                .where(
+                    LeaveBalance.user_id == user_id,
+                    LeaveBalance.leave_type_id == leave_type_id,
+                    LeaveBalance.year == year,
+                )
+                .values(carried_forward_days=carried_forward(user_id, leave_type_id, year))
+            )
+
+leave_balance_repository = LeaveBalanceRepository()
+
+class AsyncLeaveBalanceRepository:
+    async def get_balance(self, db: AsyncSession, user_id: int, leave_type_id: int, year: int) -> Optional[LeaveBalance]:
+        return await db.run_sync(leave_balance_repository.get_balance, user_id, leave_type_id, year)
+
+    async def get_available_days(self, db: AsyncSession, user_id: int, leave_type_id: int, year: int) -> Optional[float]:
+        return await db.run_sync(leave_balance_repository.get_available_days, user_id, leave_type_id, year)
+
+    async def get_balances(self, db: AsyncSession, user_id: int, year: int) -> List[LeaveBalance]:
+        return await db.run_sync(leave_balance_repository.get_balances, user_id, year)
+
+async_leave_balance_repository = AsyncLeaveBalanceRepository()
@@ -0,0 +1,77 @@
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from sqlalchemy import or_, select, true, update
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
+from app.models.user import User
+from app.repositories.hierarchy import subtree_ids
+
+def bulk_update_status(
+    db: Session,
+    model: Any,
+    ids: Sequence[int],
+    values: Dict[str, Any],
+    manager_id: Optional[int] = None,
+    returning: Sequence[Any] = (),
+) -> Tuple[List[Row], List[Dict]]:
+    """
+    Set `values` (which must include `status`) on every request in `ids`
+    that the caller may action, in a single UPDATE ... FROM ... RETURNING.
+
+    `manager_id` restricts the update to that manager's reports at any
+    depth: direct reports by manager_id, the rest through the
+    user_hierarchy subtree (as listed with depth=all); None means admin
+    scope. Rows already in the target status are left
+    alone. Returned rows carry `id`, `user_id`, `old_status` (read from a
+    locking CTE in the same statement), `manager_id` and any `returning`
+    columns. Does not commit. Skipped ids are explained with one extra
+    SELECT, only when there are any.
+    """
+    ids = list(dict.fromkeys(ids))
+    table = model.__table__
+    new_status = values["status"]
+
+    old = (
+        select(table.c.id, table.c.status)
+        .where(table.c.id.in_(ids))
+        .with_for_update()
+        .cte("old")
+    )
+    stmt = (
+        update(table)
+        .where(table.c.id == old.c.id, User.id == table.c.user_id, table.c.status != new_status)
+        .values(**values)
+        .returning(
+            table.c.id, table.c.user_id, old.c.status.label("old_status"), User.manager_id, *returning
+        )
+    )
+    if manager_id is not None:
+        stmt = stmt.where(or_(User.manager_id == manager_id, table.c.user_id.in_(subtree_ids(manager_id))))
+    # RETURNING order follows the plan; report in the order asked for
+    position = {i: n for n, i in enumerate(ids)}
+    rows = sorted(db.execute(stmt).all(), key=lambda r: position[r.id])
+
+    updated = {r.id for r in rows}
+    missing = [i for i in ids if i not in updated]
+    skipped = []
+    if missing:
+        in_scope = true()
+        if manager_id is not None:
+            in_scope = or_(User.manager_id == manager_id, table.c.user_id.in_(subtree_ids(manager_id)))
+        found = {
+            r.id: r
+            for r in db.execute(
+                select(table.c.id, table.c.status, in_scope.label("in_scope"))
+                .join(User, User.id == table.c.user_id)
+                .where(table.c.id.in_(missing))
+            )
+        }
+        for i in missing:
+            r = found.get(i)
+            if r is None:
+                detail = "Request not found"
+            elif not r.in_scope:
+                detail = "Not authorized to action this request."
+            else:
+                detail = f"Already {r.status.value}"
+            skipped.append({"id": i, "detail": detail})
+    return rows, skipped
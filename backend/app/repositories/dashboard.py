@@ -0,0 +1,104 @@
+from datetime import date
+from typing import Dict, Optional
+from sqlalchemy import select, func, and_, true
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.repositories.hierarchy import reports_filter
+from app.models.user import User, UserHierarchy
+from app.models.leave import LeaveRequest, LeaveStatus
+from app.models.ot import OTRequest, OTStatus
+
+ADMIN_SCOPE = "ADMIN"
+
+class DashboardRepository:
+    def __init__(self):
+        self._cache = TTLCache(
+            maxsize=settings.DASHBOARD_CACHE_MAX_SIZE, ttl=settings.DASHBOARD_CACHE_TTL_SECONDS
+        )
+
+    def get_stats_cached(self, db: Session, manager_id: Optional[int] = None, depth: str = "direct") -> Dict[str, int]:
+        """
+        `get_stats` served from memory per scope (global, or one manager at
+        one depth).
+
+        The date is part of the key because `on_leave_today` changes at
+        midnight without any write.
+        """
+        today = date.today()
+        key = (ADMIN_SCOPE, today) if manager_id is None else (manager_id, depth, today)
+        stats = self._cache.get(key)
+        if stats is None:
+            stats = self.get_stats(db, manager_id=manager_id, today=today, depth=depth)
+            self._cache.set(key, stats)
+        return dict(stats)
+
+    def invalidate(self, db: Session, *manager_ids: Optional[int]) -> None:
+        """
+        Drop the global scope, the given managers' scopes and the depth="all"
+        scopes of every manager above them. Call after a commit that changes
+        requests or users under those managers.
+        """
+        today = date.today()
+        self._cache.pop((ADMIN_SCOPE, today))
+        manager_ids = {manager_id for manager_id in manager_ids if manager_id is not None}
+        if not manager_ids or not len(self._cache):
+            return
+        ancestor_ids = set(db.scalars(
+            select(UserHierarchy.ancestor_id).where(UserHierarchy.descendant_id.in_(list(manager_ids)))
+        ))
+        for manager_id in manager_ids:
+            self._cache.pop((manager_id, "direct", today))
+        for manager_id in manager_ids | ancestor_ids:
+            self._cache.pop((manager_id, "all", today))
+
+    def get_stats(self, db: Session, manager_id: Optional[int] = None, today: Optional[date] = None, depth: str = "direct") -> Dict[str, int]:
+        """
+        All dashboard counters in one round trip.
+
+        Global when `manager_id` is None, otherwise scoped to that manager's
+        direct reports, or with depth="all" their whole subtree. Each table is scanned once, with COUNT(*) FILTER
+        splitting the rows into counters, and the three single-row results
+        are cross joined into one row.
+        """
+        today = today or date.today()
+        is_pending_leave = LeaveRequest.status == LeaveStatus.PENDING
+        is_on_leave_today = and_(
+            LeaveRequest.status == LeaveStatus.APPROVED,
+            LeaveRequest.start_date <= today,
+            LeaveRequest.end_date >= today,
+        )
+
+        users_q = select(func.count().label("total_employees")).select_from(User)
+        leaves_q = select(
+            func.count().filter(is_pending_leave).label("pending_leaves"),
+            func.count().filter(is_on_leave_today).label("on_leave_today"),
+        ).select_from(LeaveRequest).where(
+            LeaveRequest.status.in_([LeaveStatus.PENDING, LeaveStatus.APPROVED])
+        )
+        ot_q = select(
+            func.count().filter(OTRequest.status == OTStatus.PENDING).label("pending_ot"),
+        ).select_from(OTRequest).where(OTRequest.status == OTStatus.PENDING)
+
+        if manager_id is not None:
+            users_q = users_q.where(reports_filter(User.id, manager_id, depth))
+            leaves_q = leaves_q.join(LeaveRequest.user).where(reports_filter(User.id, manager_id, depth))
+            ot_q = ot_q.join(OTRequest.user).where(reports_filter(User.id, manager_id, depth))
+
+        u = users_q.subquery("u")
+        l = leaves_q.subquery("l")
+        o = ot_q.subquery("o")
+        stmt = select(
+            u.c.total_employees, l.c.pending_leaves, o.c.pending_ot, l.c.on_leave_today
+        ).select_from(u.join(l, true()).join(o, true()))
+
+        return dict(db.execute(stmt).one()._mapping)
+
+dashboard_repository = DashboardRepository()
+
+class AsyncDashboardRepository:
+    async def get_stats_cached(self, db: AsyncSession, manager_id: Optional[int] = None, depth: str = "direct") -> Dict[str, int]:
+        return await db.run_sync(dashboard_repository.get_stats_cached, manager_id=manager_id, depth=depth)
+
+async_dashboard_repository = AsyncDashboardRepository()
@@ -0,0 +1,134 @@
+from typing import Iterable, Optional
+from sqlalchemy import select, insert, delete, exists, func, literal, true
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, aliased
+from app.models.user import User, UserHierarchy
+
+# Guards the walk up users.manager_id against a cycle left in old data
+MAX_DEPTH = 64
+
+# Transaction-level advisory lock taken by every hierarchy write
+HIERARCHY_LOCK_KEY = 0x68696572
+
+class HierarchyCycle(Exception):
+    """
+    The new manager is the user or one of their (indirect) reports.
+    """
+
+def subtree_ids(manager_id: int):
+    """
+    Ids of everyone below `manager_id`, at any depth; a range scan on the
+    user_hierarchy primary key.
+    """
+    return select(UserHierarchy.descendant_id).where(
+        UserHierarchy.ancestor_id == manager_id,
+        UserHierarchy.depth > 0,
+    )
+
+def reports_filter(user_id_column, manager_id: int, depth: str = "direct"):
+    """
+    Filter on `user_id_column` for a manager's team: direct reports (the
+    query must join User) or, with depth="all", the whole subtree.
+    """
+    if depth == "all":
+        return user_id_column.in_(subtree_ids(manager_id))
+    return User.manager_id == manager_id
+
+class HierarchyRepository:
+    """
+    Maintains the user_hierarchy closure table. Methods only add statements
+    to the caller's transaction; committing is up to the caller.
+    """
+
+    def lock(self, db: Session) -> None:
+        """
+        Serialize hierarchy writes until the caller's transaction ends. Take
+        it before the cycle check or the walk up users.manager_id, so a
+        concurrent move can't invalidate what they read. SQLite already
+        serializes writers.
+        """
+        if db.get_bind().dialect.name != "sqlite":
+            db.execute(select(func.pg_advisory_xact_lock(HIERARCHY_LOCK_KEY)))
+
+    def link_users(self, db: Session, user_ids: Iterable[int]) -> None:
+        """
+        Add the paths for users that have none yet (new users), walking up
+        users.manager_id, so their manager_id must already be set.
+        """
+        user_ids = list(user_ids)
+        if not user_ids:
+            return
+        up = select(
+            User.id.label("descendant_id"), User.id.label("ancestor_id"), literal(0).label("depth")
+        ).where(User.id.in_(user_ids)).cte("up", recursive=True)
+        up = up.union_all(
+            select(up.c.descendant_id, User.manager_id, up.c.depth + 1)
+            .join(User, User.id == up.c.ancestor_id)
+            .where(User.manager_id.is_not(None), up.c.depth < MAX_DEPTH)
+        )
+        db.execute(insert(UserHierarchy).from_select(
+            ["ancestor_id", "descendant_id", "depth"],
+            select(up.c.ancestor_id, up.c.descendant_id, func.min(up.c.depth))
+            .group_by(up.c.ancestor_id, up.c.descendant_id),
+        ))
+
+    def is_in_subtree(self, db: Session, root_id: int, user_id: int) -> bool:
+        """
+        Whether `user_id` is `root_id` or below it.
+        """
+        return db.scalar(select(exists().where(
+            UserHierarchy.ancestor_id == root_id,
+            UserHierarchy.descendant_id == user_id,
+        )))
+
+    def _unlink_from_above(self, db: Session, user_id: int, include_self: bool) -> None:
+        # Every path from above the user (or from the user itself) into
+        # their subtree
+        subtree = select(UserHierarchy.descendant_id).where(UserHierarchy.ancestor_id == user_id)
+        above = select(UserHierarchy.ancestor_id).where(UserHierarchy.descendant_id == user_id)
+        if not include_self:
+            above = above.where(UserHierarchy.ancestor_id != user_id)
+        db.execute(
+            delete(UserHierarchy).where(
+                UserHierarchy.descendant_id.in_(subtree),
+                UserHierarchy.ancestor_id.in_(above),
+            ),
+            execution_options={"synchronize_session": False},
+        )
+
+    def move(self, db: Session, user_id: int, manager_id: Optional[int]) -> None:
+        """
+        Re-parent a user and their whole subtree under `manager_id` (None
+        makes them a root). Call `is_in_subtree` first to rule out cycles.
+        """
+        self._unlink_from_above(db, user_id, include_self=False)
+        if manager_id is None:
+            return
+        above = aliased(UserHierarchy)
+        below = aliased(UserHierarchy)
+        db.execute(insert(UserHierarchy).from_select(
+            ["ancestor_id", "descendant_id", "depth"],
+            # Every ancestor of the new manager times every user in the subtree
+            select(above.ancestor_id, below.descendant_id, above.depth + below.depth + 1)
+            .select_from(above)
+            .join(below, true())
+            .where(
+                above.descendant_id == manager_id,
+                below.ancestor_id == user_id,
+            ),
+        ))
+
+    def detach(self, db: Session, user_id: int) -> None:
+        """
+        Before deleting a user: their reports become roots (manager_id is
+        SET NULL) and keep only the paths within their own subtrees.
+        """
+        self._unlink_from_above(db, user_id, include_self=True)
+
+hierarchy_repository = HierarchyRepository()
+
+class AsyncHierarchyRepository:
+    async def is_in_subtree(self, db: AsyncSession, root_id: int, user_id: int) -> bool:
+        return await db.run_sync(hierarchy_repository.is_in_subtree, root_id, user_id)
+
+async_hierarchy_repository = AsyncHierarchyRepository()
@@ -1,19 +1,92 @@
-from typing import List, Optional
-from sqlalchemy.orm import Session
-from app.models.leave import LeaveRequest, LeaveType, Holiday, LeaveStatus
-from app.schemas.leave import LeaveRequestCreate, LeaveTypeCreate, HolidayCreate, LeaveRequestUpdate
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import Row, Select, select, and_, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, Query, aliased, joinedload, contains_eager
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.audit import audit_writer
+from app.core.pagination import keyset_paginate
+from app.repositories.dashboard import dashboard_repository
+from app.repositories.balance import LeaveTransition, leave_balance_repository
+from app.repositories.bulk import bulk_update_status
+from app.repositories.hierarchy import reports_filter
+from app.services.holiday_calendar import HolidayOccurrence, holiday_calendar
+from app.services.reference_data import HOLIDAYS, LEAVE_TYPES, reference_data
+from app.services.working_days import WorkingDayCalendar, days_by_year, working_day_calendars
+from app.models.leave import (
+    LeaveRequest, LeaveType, Holiday, LeaveStatus, ACTIVE_LEAVE_STATUSES, leave_daterange, leave_user_range
+)
+from app.models.audit import LEAVE_STATUS_ACTIONS, AuditEntity
+from app.models.user import User
+from app.schemas.leave import LeaveRequestCreate, LeaveTypeCreate, HolidayCreate, LeaveRequestUpdate, LeaveBulkStatusUpdate
 from datetime import date
 
+# Loader strategies per use case. Every LeaveRequest response embeds `user`,
+# and approvals read `leave.user.manager_id`, so load it in the same query.
+LIST_OPTIONS = (joinedload(LeaveRequest.user),)
+DETAIL_OPTIONS = (joinedload(LeaveRequest.user),)
+
+# Flat columns of schemas.LeaveRequest, in its field order, for list
+# responses served from rows instead of ORM objects
+ROW_COLUMNS = (
+    LeaveRequest.leave_type_id,
+    LeaveRequest.start_date,
+    LeaveRequest.end_date,
+    LeaveRequest.reason,
+    LeaveRequest.id,
+    LeaveRequest.user_id,
+    LeaveRequest.total_days,
+    LeaveRequest.status,
+    LeaveRequest.manager_comment,
+    LeaveRequest.created_at,
+    LeaveRequest.updated_at,
+    User.id.label("user__id"),
+    User.full_name.label("user__full_name"),
+    User.email.label("user__email"),
+)
+
+EXCLUSION_VIOLATION = "23P01"
+OVERLAP_CONSTRAINT = "excl_leave_user_active_range"
+
+class LeaveOverlap(Exception):
+    """
+    The leave would overlap pending or approved leaves of the same user.
+    """
+
+    def __init__(self, conflicting_ids: List[int]):
+        super().__init__("The selected dates overlap another pending or approved leave")
+        self.conflicting_ids = conflicting_ids
+
+class DuplicateHoliday(Exception):
+    """
+    A holiday is already stored on that date. Recurring holidays falling
+    on it in other years don't count; a one-off takes precedence there.
+    """
+
+    def __init__(self, day: date):
+        super().__init__(f"{day} is already a holiday")
+
+def _is_overlap(e: IntegrityError) -> bool:
+    return getattr(e.orig, "pgcode", None) == EXCLUSION_VIOLATION and OVERLAP_CONSTRAINT in str(e.orig)
+
+def _overlaps(model, user_id, start, end):
+    # Same expressions as excl_leave_user_active_range, so lookups probe its index
+    return and_(
+        model.status.in_(ACTIVE_LEAVE_STATUSES),
+        leave_user_range(model.user_id).op("&&")(leave_user_range(user_id)),
+        leave_daterange(model.start_date, model.end_date).op("&&")(leave_daterange(start, end)),
+    )
+
 class LeaveRepository:
     # --- LEAVE TYPES ---
     def get_leave_types(self, db: Session) -> List[LeaveType]:
-        return db.query(LeaveType).all()
+        return db.query(LeaveType).order_by(LeaveType.id).all()
 
     def create_leave_type(self, db: Session, obj_in: LeaveTypeCreate) -> LeaveType:
         db_obj = LeaveType(**obj_in.dict())
         db.add(db_obj)
         db.commit()
         db.refresh(db_obj)
+        reference_data.invalidate(LEAVE_TYPES)
         return db_obj
 
     # --- LEAVE REQUESTS ---
@@ -24,57 +97,349 @@ class LeaveRepository:
             total_days=total_days
         )
         db.add(db_obj)
+        try:
+            db.flush()
+        except IntegrityError as e:
+            db.rollback()
+            if not _is_overlap(e):
+                raise
+            raise LeaveOverlap(self.get_overlapping_ids(db, user_id, obj_in.start_date, obj_in.end_date))
+        leave_balance_repository.apply_transitions(
+            db, self._transitions(db, [(db_obj, None)], db_obj.status or LeaveStatus.PENDING)
+        )
         db.commit()
-        db.refresh(db_obj)
+        # Reload with the detail options so the response doesn't lazy-load `user`
+        db_obj = self.get_leave_request(db, db_obj.id)
+        dashboard_repository.invalidate(db, db_obj.user.manager_id)
         return db_obj
 
+    def _leave_requests_query(self, db: Session, user_id: Optional[int] = None) -> Query:
+        query = db.query(LeaveRequest).options(*LIST_OPTIONS)
+        if user_id:
+            query = query.filter(LeaveRequest.user_id == user_id)
+        return query
+
     def get_leave_requests(self, db: Session, user_id: Optional[int] = None, skip: int = 0, limit: int = 100) -> List[LeaveRequest]:
-        query = db.query(LeaveRequest)
+        query = self._leave_requests_query(db, user_id=user_id)
+        return query.order_by(LeaveRequest.created_at.desc()).offset(skip).limit(limit).all()
+
+    def get_leave_requests_page(self, db: Session, user_id: Optional[int] = None, after: Optional[str] = None, limit: int = 100) -> Tuple[List[LeaveRequest], Optional[str]]:
+        query = self._leave_requests_query(db, user_id=user_id)
+        return keyset_paginate(query, LeaveRequest, after, limit, descending=True)
+
+    def _leave_request_rows_query(self, db: Session, user_id: Optional[int] = None) -> Query:
+        query = db.query(*ROW_COLUMNS).join(User, User.id == LeaveRequest.user_id)
         if user_id:
             query = query.filter(LeaveRequest.user_id == user_id)
+        return query
+
+    def get_leave_request_rows(self, db: Session, user_id: Optional[int] = None, skip: int = 0, limit: int = 100) -> List[Row]:
+        """
+        `get_leave_requests` as flat ROW_COLUMNS rows, for `rows_response`.
+        """
+        query = self._leave_request_rows_query(db, user_id=user_id)
         return query.order_by(LeaveRequest.created_at.desc()).offset(skip).limit(limit).all()
 
+    def get_leave_request_rows_page(self, db: Session, user_id: Optional[int] = None, after: Optional[str] = None, limit: int = 100) -> Tuple[List[Row], Optional[str]]:
+        query = self._leave_request_rows_query(db, user_id=user_id)
+        return keyset_paginate(query, LeaveRequest, after, limit, descending=True)
+
     def get_leave_request(self, db: Session, id: int) -> Optional[LeaveRequest]:
-        return db.query(LeaveRequest).filter(LeaveRequest.id == id).first()
+        return db.query(LeaveRequest).options(*DETAIL_OPTIONS).filter(LeaveRequest.id == id).first()
 
-    def get_pending_approvals(self, db: Session, manager_id: int, is_admin: bool = False, skip: int = 0, limit: int = 100) -> List[LeaveRequest]:
+    def _pending_approvals_query(self, db: Session, manager_id: int, is_admin: bool = False, depth: str = "direct") -> Query:
         from app.models.user import User
         from sqlalchemy import or_, and_
 
         if is_admin:
             # Admin can now see ALL pending requests (since they can approve any)
             # We keep PENDING_ADMIN check just in case legacy rows exist with that status
-            return db.query(LeaveRequest).filter(
+            return db.query(LeaveRequest).options(*LIST_OPTIONS).filter(
                 or_(
                     LeaveRequest.status == LeaveStatus.PENDING,
                     LeaveRequest.status == LeaveStatus.PENDING_ADMIN
                 )
-            ).order_by(LeaveRequest.created_at.asc()).offset(skip).limit(limit).all()
+            )
         else:
-            # Manager sees only their direct reports' pending requests (PENDING)
-            return db.query(LeaveRequest).join(LeaveRequest.user).filter(
+            # Manager sees their direct reports' pending requests (PENDING),
+            # or their whole subtree's with depth="all"
+            # The join already brings in the user row, so populate `user` from it
+            return db.query(LeaveRequest).join(LeaveRequest.user).options(
+                contains_eager(LeaveRequest.user)
+            ).filter(
                 LeaveRequest.status == LeaveStatus.PENDING,
-                User.manager_id == manager_id
-            ).order_by(LeaveRequest.created_at.asc()).offset(skip).limit(limit).all()
+                reports_filter(User.id, manager_id, depth)
+            )
+
+    def get_pending_approvals(self, db: Session, manager_id: int, is_admin: bool = False, skip: int = 0, limit: int = 100, depth: str = "direct") -> List[LeaveRequest]:
+        query = self._pending_approvals_query(db, manager_id=manager_id, is_admin=is_admin, depth=depth)
+        return query.order_by(LeaveRequest.created_at.asc()).offset(skip).limit(limit).all()
+
+    def get_pending_approvals_page(self, db: Session, manager_id: int, is_admin: bool = False, after: Optional[str] = None, limit: int = 100, depth: str = "direct") -> Tuple[List[LeaveRequest], Optional[str]]:
+        query = self._pending_approvals_query(db, manager_id=manager_id, is_admin=is_admin, depth=depth)
+        return keyset_paginate(query, LeaveRequest, after, limit, descending=False)
 
     def update_leave_status(self, db: Session, db_obj: LeaveRequest, obj_in: LeaveRequestUpdate, approver_id: int) -> LeaveRequest:
+        # The ledger transition is computed from the status as locked here,
+        # not as loaded; a concurrent approval waits and then sees ours
+        old_status = db.scalar(
+            select(LeaveRequest.status).where(LeaveRequest.id == db_obj.id).with_for_update()
+        )
+        leave_id, user_id, start, end = db_obj.id, db_obj.user_id, db_obj.start_date, db_obj.end_date
         db_obj.status = obj_in.status
         db_obj.manager_comment = obj_in.manager_comment
         db_obj.approver_id = approver_id
         db.add(db_obj)
+        try:
+            # Re-activating a rejected or cancelled leave can overlap newer ones
+            db.flush()
+        except IntegrityError as e:
+            db.rollback()
+            if not _is_overlap(e):
+                raise
+            conflicting = [i for i in self.get_overlapping_ids(db, user_id, start, end) if i != leave_id]
+            raise LeaveOverlap(conflicting)
+        # Same transaction as the status change, so the ledger can't drift
+        leave_balance_repository.apply_transitions(db, self._transitions(db, [(db_obj, old_status)], db_obj.status))
         db.commit()
-        db.refresh(db_obj)
+        audit_writer.collect(db, approver_id, LEAVE_STATUS_ACTIONS[obj_in.status], AuditEntity.LEAVE_REQUEST, [leave_id])
+        db_obj = self.get_leave_request(db, db_obj.id)
+        dashboard_repository.invalidate(db, db_obj.user.manager_id)
         return db_obj
 
+    def get_overlapping_ids(self, db: Session, user_id: int, start: date, end: date) -> List[int]:
+        """
+        Active leaves of `user_id` overlapping [start, end]; one probe of
+        the exclusion constraint's index.
+        """
+        return list(db.scalars(
+            select(LeaveRequest.id).where(_overlaps(LeaveRequest, user_id, start, end)).order_by(LeaveRequest.id)
+        ))
+
+    def get_overlapping_ids_for(self, db: Session, ids: List[int]) -> List[int]:
+        """
+        Active leaves, outside `ids`, overlapping any of the leaves in `ids`.
+        """
+        other = aliased(LeaveRequest)
+        return list(db.scalars(
+            select(other.id).distinct().join(
+                LeaveRequest, _overlaps(other, LeaveRequest.user_id, LeaveRequest.start_date, LeaveRequest.end_date)
+            ).where(LeaveRequest.id.in_(ids), other.id.notin_(ids)).order_by(other.id)
+        ))
+
+    def bulk_update_leave_status(self, db: Session, obj_in: LeaveBulkStatusUpdate, approver_id: int, manager_id: Optional[int] = None) -> Tuple[List[int], List[Dict]]:
+        """
+        Action many requests in one statement; `manager_id` limits it to
+        that manager's reports at any depth (None for admins).
+        """
+        table = LeaveRequest.__table__
+        try:
+            rows, skipped = bulk_update_status(
+                db, LeaveRequest, obj_in.ids,
+                {"status": obj_in.status, "manager_comment": obj_in.manager_comment, "approver_id": approver_id},
+                manager_id=manager_id,
+                returning=(table.c.leave_type_id, table.c.start_date, table.c.end_date, table.c.total_days),
+            )
+        except IntegrityError as e:
+            db.rollback()
+            if not _is_overlap(e):
+                raise
+            raise LeaveOverlap(self.get_overlapping_ids_for(db, obj_in.ids))
+        leave_balance_repository.apply_transitions(
+            db, self._transitions(db, [(r, r.old_status) for r in rows], obj_in.status)
+        )
+        db.commit()
+        audit_writer.collect(db, approver_id, LEAVE_STATUS_ACTIONS[obj_in.status], AuditEntity.LEAVE_REQUEST, [r.id for r in rows])
+        dashboard_repository.invalidate(db, *{r.manager_id for r in rows})
+        return [r.id for r in rows], skipped
+
+    def get_calendar(
+        self,
+        db: Session,
+        start: date,
+        end: date,
+        team_manager_id: Optional[int] = None,
+        user_id: Optional[int] = None,
+        depth: str = "direct",
+    ) -> List[LeaveRequest]:
+        """
+        Approved leaves overlapping [start, end], with user and type loaded.
+        The overlap test matches idx_leave_approved_range (GiST, partial on
+        APPROVED). Given `team_manager_id` and/or `user_id`, only leaves of
+        that manager's reports (direct, or with depth="all" at any depth)
+        or of that user are returned.
+        """
+        query = db.query(LeaveRequest).join(LeaveRequest.user).join(LeaveRequest.leave_type).options(
+            contains_eager(LeaveRequest.user), contains_eager(LeaveRequest.leave_type)
+        ).filter(
+            LeaveRequest.status == LeaveStatus.APPROVED,
+            leave_daterange(LeaveRequest.start_date, LeaveRequest.end_date).op("&&")(leave_daterange(start, end)),
+        )
+        scope = []
+        if team_manager_id is not None:
+            scope.append(reports_filter(User.id, team_manager_id, depth))
+        if user_id is not None:
+            scope.append(User.id == user_id)
+        if scope:
+            query = query.filter(or_(*scope))
+        return query.order_by(LeaveRequest.start_date, LeaveRequest.id).all()
+
+    def export_statement(
+        self,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        status: Optional[LeaveStatus] = None,
+        user_id: Optional[int] = None,
+        manager_id: Optional[int] = None,
+        depth: str = "direct",
+    ) -> Select:
+        """
+        Flat leave rows with user and type names, for streaming exports.
+        `start`/`end` keep leaves overlapping that range; `manager_id`
+        limits to that manager and their reports (direct, or with
+        depth="all" at any depth). Ordered by id so rows stream off the
+        primary key without a sort.
+        """
+        stmt = select(
+            LeaveRequest.id,
+            LeaveRequest.user_id,
+            User.email,
+            User.full_name,
+            LeaveType.name.label("leave_type"),
+            LeaveRequest.start_date,
+            LeaveRequest.end_date,
+            LeaveRequest.total_days,
+            LeaveRequest.status,
+            LeaveRequest.reason,
+            LeaveRequest.manager_comment,
+            LeaveRequest.approver_id,
+            LeaveRequest.created_at,
+        ).join(User, User.id == LeaveRequest.user_id).join(
+            LeaveType, LeaveType.id == LeaveRequest.leave_type_id
+        ).order_by(LeaveRequest.id)
+
+        if start is not None:
+            stmt = stmt.where(LeaveRequest.end_date >= start)
+        if end is not None:
+            stmt = stmt.where(LeaveRequest.start_date <= end)
+        if status is not None:
+            stmt = stmt.where(LeaveRequest.status == status)
+        if user_id is not None:
+            stmt = stmt.where(LeaveRequest.user_id == user_id)
+        if manager_id is not None:
+            stmt = stmt.where(or_(reports_filter(User.id, manager_id, depth), User.id == manager_id))
+        return stmt
+
+    def _transitions(
+        self, db: Session, leaves: List[Tuple[Any, Optional[LeaveStatus]]], new_status: LeaveStatus
+    ) -> List[LeaveTransition]:
+        """
+        Ledger transitions of `leaves`, (request or returned row, old status)
+        pairs, to `new_status`. A leave crossing a year end counts against
+        each year by its working days there.
+        """
+        crossing = [leave for leave, _ in leaves if leave.start_date.year != leave.end_date.year]
+        calendar = None
+        if crossing:
+            calendar = self.get_working_day_calendar(
+                db, min(leave.start_date for leave in crossing), max(leave.end_date for leave in crossing)
+            )
+        return [
+            LeaveTransition(
+                user_id=leave.user_id, leave_type_id=leave.leave_type_id, year=year,
+                days=days, old_status=old_status, new_status=new_status,
+            )
+            for leave, old_status in leaves
+            for year, days in days_by_year(calendar, leave.start_date, leave.end_date, leave.total_days)
+        ]
+
     # --- HOLIDAYS ---
     def get_holidays(self, db: Session) -> List[Holiday]:
-        return db.query(Holiday).order_by(Holiday.date).all()
+        return db.query(Holiday).order_by(Holiday.date, Holiday.id).all()
 
     def create_holiday(self, db: Session, obj_in: HolidayCreate) -> Holiday:
+        if db.scalar(select(Holiday.id).where(Holiday.date == obj_in.date)) is not None:
+            raise DuplicateHoliday(obj_in.date)
         db_obj = Holiday(**obj_in.dict())
         db.add(db_obj)
-        db.commit()
+        try:
+            db.commit()
+        except IntegrityError:
+            # holidays.date is unique; stored concurrently since the check
+            db.rollback()
+            raise DuplicateHoliday(obj_in.date)
         db.refresh(db_obj)
+        holiday_calendar.add(db_obj)
+        reference_data.invalidate(HOLIDAYS)
         return db_obj
 
+    def get_holiday_occurrences(self, db: Session, start_year: int, end_year: int) -> List[HolidayOccurrence]:
+        return holiday_calendar.occurrences(start_year, end_year, lambda: self.get_holidays(db))
+
+    def get_working_day_calendar(self, db: Session, start: date, end: date) -> WorkingDayCalendar:
+        return working_day_calendars.get(start, end, lambda: self.get_holidays(db))
+
 leave_repository = LeaveRepository()
+
+class AsyncLeaveRepository:
+    """
+    LeaveRepository on an AsyncSession. The sync methods run through
+    `run_sync`, so their I/O goes through the async driver without a thread.
+    """
+
+    async def get_leave_types(self, db: AsyncSession) -> List[LeaveType]:
+        return await db.run_sync(leave_repository.get_leave_types)
+
+    async def create_leave_type(self, db: AsyncSession, obj_in: LeaveTypeCreate) -> LeaveType:
+        return await db.run_sync(leave_repository.create_leave_type, obj_in)
+
+    async def create_leave_request(self, db: AsyncSession, obj_in: LeaveRequestCreate, user_id: int, total_days: float) -> LeaveRequest:
+        return await db.run_sync(leave_repository.create_leave_request, obj_in, user_id=user_id, total_days=total_days)
+
+    async def get_leave_requests(self, db: AsyncSession, user_id: Optional[int] = None, skip: int = 0, limit: int = 100) -> List[LeaveRequest]:
+        return await db.run_sync(leave_repository.get_leave_requests, user_id=user_id, skip=skip, limit=limit)
+
+    async def get_leave_requests_page(self, db: AsyncSession, user_id: Optional[int] = None, after: Optional[str] = None, limit: int = 100) -> Tuple[List[LeaveRequest], Optional[str]]:
+        return await db.run_sync(leave_repository.get_leave_requests_page, user_id=user_id, after=after, limit=limit)
+
+    async def get_leave_request_rows(self, db: AsyncSession, user_id: Optional[int] = None, skip: int = 0, limit: int = 100) -> List[Row]:
+        return await db.run_sync(leave_repository.get_leave_request_rows, user_id=user_id, skip=skip, limit=limit)
+
+    async def get_leave_request_rows_page(self, db: AsyncSession, user_id: Optional[int] = None, after: Optional[str] = None, limit: int = 100) -> Tuple[List[Row], Optional[str]]:
+        return await db.run_sync(leave_repository.get_leave_request_rows_page, user_id=user_id, after=after, limit=limit)
+
+    async def get_leave_request(self, db: AsyncSession, id: int) -> Optional[LeaveRequest]:
+        return await db.run_sync(leave_repository.get_leave_request, id)
+
+    async def get_pending_approvals(self, db: AsyncSession, manager_id: int, is_admin: bool = False, skip: int = 0, limit: int = 100, depth: str = "direct") -> List[LeaveRequest]:
+        return await db.run_sync(leave_repository.get_pending_approvals, manager_id=manager_id, is_admin=is_admin, skip=skip, limit=limit, depth=depth)
+
+    async def get_pending_approvals_page(self, db: AsyncSession, manager_id: int, is_admin: bool = False, after: Optional[str] = None, limit: int = 100, depth: str = "direct") -> Tuple[List[LeaveRequest], Optional[str]]:
+        return await db.run_sync(leave_repository.get_pending_approvals_page, manager_id=manager_id, is_admin=is_admin, after=after, limit=limit, depth=depth)
+
+    async def update_leave_status(self, db: AsyncSession, db_obj: LeaveRequest, obj_in: LeaveRequestUpdate, approver_id: int) -> LeaveRequest:
+        leave = await db.run_sync(leave_repository.update_leave_status, db_obj, obj_in, approver_id=approver_id)
+        await audit_writer.publish(db)
+        return leave
+
+    async def get_calendar(self, db: AsyncSession, start: date, end: date, team_manager_id: Optional[int] = None, user_id: Optional[int] = None, depth: str = "direct") -> List[LeaveRequest]:
+        return await db.run_sync(leave_repository.get_calendar, start, end, team_manager_id=team_manager_id, user_id=user_id, depth=depth)
+
+    async def bulk_update_leave_status(self, db: AsyncSession, obj_in: LeaveBulkStatusUpdate, approver_id: int, manager_id: Optional[int] = None) -> Tuple[List[int], List[Dict]]:
+        result = await db.run_sync(leave_repository.bulk_update_leave_status, obj_in, approver_id=approver_id, manager_id=manager_id)
+        await audit_writer.publish(db)
+        return result
+
+    async def get_holidays(self, db: AsyncSession) -> List[Holiday]:
+        return await db.run_sync(leave_repository.get_holidays)
+
+    async def create_holiday(self, db: AsyncSession, obj_in: HolidayCreate) -> Holiday:
+        return await db.run_sync(leave_repository.create_holiday, obj_in)
+
+    async def get_holiday_occurrences(self, db: AsyncSession, start_year: int, end_year: int) -> List[HolidayOccurrence]:
+        return await db.run_sync(leave_repository.get_holiday_occurrences, start_year, end_year)
+
+    async def get_working_day_calendar(self, db: AsyncSession, start: date, end: date) -> WorkingDayCalendar:
+        return await db.run_sync(leave_repository.get_working_day_calendar, start, end)
+
+async_leave_repository = AsyncLeaveRepository()
@@ -1,7 +1,41 @@
-from typing import List, Optional
-from sqlalchemy.orm import Session
-from app.models.ot import OTRequest
-from app.schemas.ot import OTRequestCreate, OTRequestUpdate
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import Row, Select, select, or_
+from sqlalchemy.orm import Session, Query, joinedload, contains_eager
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.audit import audit_writer
+from app.core.pagination import keyset_paginate
+from app.repositories.dashboard import dashboard_repository
+from app.repositories.bulk import bulk_update_status
+from app.repositories.hierarchy import reports_filter
+from app.repositories.ot_rollup import OTTransition, ot_rollup_repository
+from app.models.ot import OTRequest, OTStatus
+from app.models.audit import OT_STATUS_ACTIONS, AuditEntity
+from app.models.user import User
+from app.schemas.ot import OTRequestCreate, OTRequestUpdate, OTBulkStatusUpdate
+
+# Loader strategies per use case. Every OTRequest response embeds `user`,
+# and approvals read `ot.user.manager_id`, so load it in the same query.
+LIST_OPTIONS = (joinedload(OTRequest.user),)
+DETAIL_OPTIONS = (joinedload(OTRequest.user),)
+
+# Flat columns of schemas.OTRequest, in its field order, for list
+# responses served from rows instead of ORM objects
+ROW_COLUMNS = (
+    OTRequest.ot_date,
+    OTRequest.start_time,
+    OTRequest.end_time,
+    OTRequest.reason,
+    OTRequest.id,
+    OTRequest.user_id,
+    OTRequest.total_hours,
+    OTRequest.status,
+    OTRequest.manager_comment,
+    OTRequest.created_at,
+    User.id.label("user__id"),
+    User.full_name.label("user__full_name"),
+    User.email.label("user__email"),
+)
 
 class OTRepository:
     def create(self, db: Session, obj_in: OTRequestCreate, user_id: int, total_hours: float) -> OTRequest:
@@ -11,40 +45,206 @@ class OTRepository:
             total_hours=total_hours
         )
         db.add(db_obj)
+        ot_rollup_repository.apply_transitions(db, [self._transition(db_obj, None)])
         db.commit()
-        db.refresh(db_obj)
+        # Reload with the detail options so the response doesn't lazy-load `user`
+        db_obj = self.get(db, db_obj.id)
+        dashboard_repository.invalidate(db, db_obj.user.manager_id)
         return db_obj
 
+    def _multi_query(self, db: Session, user_id: Optional[int] = None) -> Query:
+        query = db.query(OTRequest).options(*LIST_OPTIONS)
+        if user_id:
+            query = query.filter(OTRequest.user_id == user_id)
+        return query
+
     def get_multi(self, db: Session, user_id: Optional[int] = None, skip: int = 0, limit: int = 100) -> List[OTRequest]:
-        query = db.query(OTRequest)
+        query = self._multi_query(db, user_id=user_id)
+        return query.order_by(OTRequest.created_at.desc()).offset(skip).limit(limit).all()
+
+    def get_multi_page(self, db: Session, user_id: Optional[int] = None, after: Optional[str] = None, limit: int = 100) -> Tuple[List[OTRequest], Optional[str]]:
+        query = self._multi_query(db, user_id=user_id)
+        return keyset_paginate(query, OTRequest, after, limit, descending=True)
+
+    def _multi_rows_query(self, db: Session, user_id: Optional[int] = None) -> Query:
+        query = db.query(*ROW_COLUMNS).join(User, User.id == OTRequest.user_id)
         if user_id:
             query = query.filter(OTRequest.user_id == user_id)
+        return query
+
+    def get_multi_rows(self, db: Session, user_id: Optional[int] = None, skip: int = 0, limit: int = 100) -> List[Row]:
+        """
+        `get_multi` as flat ROW_COLUMNS rows, for `rows_response`.
+        """
+        query = self._multi_rows_query(db, user_id=user_id)
         return query.order_by(OTRequest.created_at.desc()).offset(skip).limit(limit).all()
 
+    def get_multi_rows_page(self, db: Session, user_id: Optional[int] = None, after: Optional[str] = None, limit: int = 100) -> Tuple[List[Row], Optional[str]]:
+        query = self._multi_rows_query(db, user_id=user_id)
+        return keyset_paginate(query, OTRequest, after, limit, descending=True)
+
     def get(self, db: Session, id: int) -> Optional[OTRequest]:
-        return db.query(OTRequest).filter(OTRequest.id == id).first()
+        return db.query(OTRequest).options(*DETAIL_OPTIONS).filter(OTRequest.id == id).first()
 
-    def get_pending_approvals(self, db: Session, manager_id: int, is_admin: bool = False, skip: int = 0, limit: int = 100) -> List[OTRequest]:
+    def _pending_approvals_query(self, db: Session, manager_id: int, is_admin: bool = False, depth: str = "direct") -> Query:
         from app.models.ot import OTStatus
         if is_admin:
-            return db.query(OTRequest).filter(
+            return db.query(OTRequest).options(*LIST_OPTIONS).filter(
                 OTRequest.status == OTStatus.PENDING
-            ).order_by(OTRequest.created_at.asc()).offset(skip).limit(limit).all()
+            )
         else:
             from app.models.user import User
             # Explicit join on OTRequest.user based on our previous fix
-            return db.query(OTRequest).join(OTRequest.user).filter(
+            return db.query(OTRequest).join(OTRequest.user).options(
+                contains_eager(OTRequest.user)
+            ).filter(
                 OTRequest.status == OTStatus.PENDING,
-                User.manager_id == manager_id
-            ).order_by(OTRequest.created_at.asc()).offset(skip).limit(limit).all()
+                reports_filter(User.id, manager_id, depth)
+            )
+
+    def get_pending_approvals(self, db: Session, manager_id: int, is_admin: bool = False, skip: int = 0, limit: int = 100, depth: str = "direct") -> List[OTRequest]:
+        query = self._pending_approvals_query(db, manager_id=manager_id, is_admin=is_admin, depth=depth)
+        return query.order_by(OTRequest.created_at.asc()).offset(skip).limit(limit).all()
+
+    def get_pending_approvals_page(self, db: Session, manager_id: int, is_admin: bool = False, after: Optional[str] = None, limit: int = 100, depth: str = "direct") -> Tuple[List[OTRequest], Optional[str]]:
+        query = self._pending_approvals_query(db, manager_id=manager_id, is_admin=is_admin, depth=depth)
+        return keyset_paginate(query, OTRequest, after, limit, descending=False)
 
     def update_status(self, db: Session, db_obj: OTRequest, obj_in: OTRequestUpdate, approver_id: int) -> OTRequest:
+        # The rollup transition is computed from the status as locked here,
+        # not as loaded; a concurrent approval waits and then sees ours
+        old_status = db.scalar(
+            select(OTRequest.status).where(OTRequest.id == db_obj.id).with_for_update()
+        )
         db_obj.status = obj_in.status
         db_obj.manager_comment = obj_in.manager_comment
         db_obj.approver_id = approver_id
         db.add(db_obj)
+        # Same transaction as the status change, so the rollup can't drift
+        ot_rollup_repository.apply_transitions(db, [self._transition(db_obj, old_status)])
         db.commit()
-        db.refresh(db_obj)
+        audit_writer.collect(db, approver_id, OT_STATUS_ACTIONS[obj_in.status], AuditEntity.OT_REQUEST, [db_obj.id])
+        db_obj = self.get(db, db_obj.id)
+        dashboard_repository.invalidate(db, db_obj.user.manager_id)
         return db_obj
 
+    def bulk_update_status(self, db: Session, obj_in: OTBulkStatusUpdate, approver_id: int, manager_id: Optional[int] = None) -> Tuple[List[int], List[Dict]]:
+        """
+        Action many requests in one statement; `manager_id` limits it to
+        that manager's reports at any depth (None for admins).
+        """
+        table = OTRequest.__table__
+        rows, skipped = bulk_update_status(
+            db, OTRequest, obj_in.ids,
+            {"status": obj_in.status, "manager_comment": obj_in.manager_comment, "approver_id": approver_id},
+            manager_id=manager_id,
+            returning=(table.c.ot_date, table.c.total_hours),
+        )
+        ot_rollup_repository.apply_transitions(db, [
+            OTTransition(
+                user_id=r.user_id, ot_date=r.ot_date, hours=r.total_hours,
+                old_status=r.old_status, new_status=obj_in.status,
+            )
+            for r in rows
+        ])
+        db.commit()
+        audit_writer.collect(db, approver_id, OT_STATUS_ACTIONS[obj_in.status], AuditEntity.OT_REQUEST, [r.id for r in rows])
+        dashboard_repository.invalidate(db, *{r.manager_id for r in rows})
+        return [r.id for r in rows], skipped
+
+    @staticmethod
+    def _transition(db_obj: OTRequest, old_status: Optional[OTStatus]) -> OTTransition:
+        return OTTransition(
+            user_id=db_obj.user_id,
+            ot_date=db_obj.ot_date,
+            hours=db_obj.total_hours,
+            old_status=old_status,
+            new_status=db_obj.status or OTStatus.PENDING,
+        )
+
+    def export_statement(
+        self,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        status: Optional[OTStatus] = None,
+        user_id: Optional[int] = None,
+        manager_id: Optional[int] = None,
+        depth: str = "direct",
+    ) -> Select:
+        """
+        Flat OT rows with user names, for streaming exports. `manager_id`
+        limits to that manager and their reports (direct, or with
+        depth="all" at any depth). Ordered by id so rows stream off the
+        primary key without a sort.
+        """
+        stmt = select(
+            OTRequest.id,
+            OTRequest.user_id,
+            User.email,
+            User.full_name,
+            OTRequest.ot_date,
+            OTRequest.start_time,
+            OTRequest.end_time,
+            OTRequest.total_hours,
+            OTRequest.status,
+            OTRequest.reason,
+            OTRequest.manager_comment,
+            OTRequest.approver_id,
+            OTRequest.created_at,
+        ).join(User, User.id == OTRequest.user_id).order_by(OTRequest.id)
+
+        if start is not None:
+            stmt = stmt.where(OTRequest.ot_date >= start)
+        if end is not None:
+            stmt = stmt.where(OTRequest.ot_date <= end)
+        if status is not None:
+            stmt = stmt.where(OTRequest.status == status)
+        if user_id is not None:
+            stmt = stmt.where(OTRequest.user_id == user_id)
+        if manager_id is not None:
+            stmt = stmt.where(or_(reports_filter(User.id, manager_id, depth), User.id == manager_id))
+        return stmt
+
 ot_repository = OTRepository()
+
+class AsyncOTRepository:
+    """
+    OTRepository on an AsyncSession. The sync methods run through
+    `run_sync`, so their I/O goes through the async driver without a thread.
+    """
+
+    async def create(self, db: AsyncSession, obj_in: OTRequestCreate, user_id: int, total_hours: float) -> OTRequest:
+        return await db.run_sync(ot_repository.create, obj_in, user_id=user_id, total_hours=total_hours)
+
+    async def get_multi(self, db: AsyncSession, user_id: Optional[int] = None, skip: int = 0, limit: int = 100) -> List[OTRequest]:
+        return await db.run_sync(ot_repository.get_multi, user_id=user_id, skip=skip, limit=limit)
+
+    async def get_multi_page(self, db: AsyncSession, user_id: Optional[int] = None, after: Optional[str] = None, limit: int = 100) -> Tuple[List[OTRequest], Optional[str]]:
+        return await db.run_sync(ot_repository.get_multi_page, user_id=user_id, after=after, limit=limit)
+
+    async def get_multi_rows(self, db: AsyncSession, user_id: Optional[int] = None, skip: int = 0, limit: int = 100) -> List[Row]:
+        return await db.run_sync(ot_repository.get_multi_rows, user_id=user_id, skip=skip, limit=limit)
+
+    async def get_multi_rows_page(self, db: AsyncSession, user_id: Optional[int] = None, after: Optional[str] = None, limit: int = 100) -> Tuple[List[Row], Optional[str]]:
+        return await db.run_sync(ot_repository.get_multi_rows_page, user_id=user_id, after=after, limit=limit)
+
+    async def get(self, db: AsyncSession, id: int) -> Optional[OTRequest]:
+        return await db.run_sync(ot_repository.get, id)
+
+    async def get_pending_approvals(self, db: AsyncSession, manager_id: int, is_admin: bool = False, skip: int = 0, limit: int = 100, depth: str = "direct") -> List[OTRequest]:
+        return await db.run_sync(ot_repository.get_pending_approvals, manager_id=manager_id, is_admin=is_admin, skip=skip, limit=limit, depth=depth)
+
+    async def get_pending_approvals_page(self, db: AsyncSession, manager_id: int, is_admin: bool = False, after: Optional[str] = None, limit: int = 100, depth: str = "direct") -> Tuple[List[OTRequest], Optional[str]]:
+        return await db.run_sync(ot_repository.get_pending_approvals_page, manager_id=manager_id, is_admin=is_admin, after=after, limit=limit, depth=depth)
+
+    async def update_status(self, db: AsyncSession, db_obj: OTRequest, obj_in: OTRequestUpdate, approver_id: int) -> OTRequest:
+        ot = await db.run_sync(ot_repository.update_status, db_obj, obj_in, approver_id=approver_id)
+        await audit_writer.publish(db)
+        return ot
+
+    async def bulk_update_status(self, db: AsyncSession, obj_in: OTBulkStatusUpdate, approver_id: int, manager_id: Optional[int] = None) -> Tuple[List[int], List[Dict]]:
+        result = await db.run_sync(ot_repository.bulk_update_status, obj_in, approver_id=approver_id, manager_id=manager_id)
+        await audit_writer.publish(db)
+        return result
+
+async_ot_repository = AsyncOTRepository()
@@ -0,0 +1,110 @@
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session, contains_eager
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import upsert_insert
+from app.models.ot import OTMonthlyRollup, OTStatus
+from app.models.user import User
+from app.repositories.hierarchy import reports_filter
+
+@dataclass(frozen=True)
+class OTTransition:
+    """
+    An OT request moving from `old_status` to `new_status`.
+    `old_status` is None for a new request.
+    """
+    user_id: int
+    ot_date: date
+    hours: float
+    old_status: Optional[OTStatus]
+    new_status: Optional[OTStatus]
+
+def month_of(day: date) -> date:
+    return day.replace(day=1)
+
+def _contribution(status: Optional[OTStatus], hours: float) -> Tuple[float, float, int, int]:
+    # (approved_hours, pending_hours, approved_count, pending_count)
+    if status == OTStatus.APPROVED:
+        return hours, 0.0, 1, 0
+    if status == OTStatus.PENDING:
+        return 0.0, hours, 0, 1
+    return 0.0, 0.0, 0, 0
+
+class OTRollupRepository:
+    def get_rollups(
+        self,
+        db: Session,
+        start_month: date,
+        end_month: date,
+        user_id: Optional[int] = None,
+        manager_id: Optional[int] = None,
+        depth: str = "direct",
+    ) -> List[OTMonthlyRollup]:
+        """
+        Rollup rows for months in [start_month, end_month], with the user
+        loaded. `manager_id` limits to that manager and their reports
+        (direct, or with depth="all" at any depth). A range scan of
+        idx_ot_rollup_month_user.
+        """
+        query = db.query(OTMonthlyRollup).join(OTMonthlyRollup.user).options(
+            contains_eager(OTMonthlyRollup.user)
+        ).filter(
+            OTMonthlyRollup.month >= month_of(start_month),
+            OTMonthlyRollup.month <= month_of(end_month),
+        )
+        if user_id is not None:
+            query = query.filter(OTMonthlyRollup.user_id == user_id)
+        if manager_id is not None:
+            query = query.filter(or_(reports_filter(User.id, manager_id, depth), User.id == manager_id))
+        return query.order_by(OTMonthlyRollup.month, OTMonthlyRollup.user_id).all()
+
+    def apply_transitions(self, db: Session, transitions: Iterable[OTTransition]) -> None:
+        """
+        Fold status transitions into the rollup with one multi-row upsert.
+        Does not commit: callers run it in the transaction that changes the
+        requests.
+        """
+        deltas: Dict[Tuple[int, date], List[float]] = defaultdict(lambda: [0.0, 0.0, 0, 0])
+        for t in transitions:
+            old = _contribution(t.old_status, t.hours)
+            new = _contribution(t.new_status, t.hours)
+            delta = deltas[(t.user_id, month_of(t.ot_date))]
+            for i in range(4):
+                delta[i] += new[i] - old[i]
+        deltas = {k: v for k, v in deltas.items() if any(v)}
+        if not deltas:
+            return
+
+        stmt = upsert_insert(db, OTMonthlyRollup).values([
+            {
+                "user_id": user_id,
+                "month": month,
+                "approved_hours": approved_hours,
+                "pending_hours": pending_hours,
+                "approved_count": approved_count,
+                "pending_count": pending_count,
+            }
+            for (user_id, month), (approved_hours, pending_hours, approved_count, pending_count) in deltas.items()
+        ])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["user_id", "month"],
+            set_={
+                "approved_hours": OTMonthlyRollup.approved_hours + stmt.excluded.approved_hours,
+                "pending_hours": OTMonthlyRollup.pending_hours + stmt.excluded.pending_hours,
+                "approved_count": OTMonthlyRollup.approved_count + stmt.excluded.approved_count,
+                "pending_count": OTMonthlyRollup.pending_count + stmt.excluded.pending_count,
+                "updated_at": func.now(),
+            },
+        )
+        db.execute(stmt)
+
+ot_rollup_repository = OTRollupRepository()
+
+class AsyncOTRollupRepository:
+    async def get_rollups(self, db: AsyncSession, start_month: date, end_month: date, user_id: Optional[int] = None, manager_id: Optional[int] = None, depth: str = "direct") -> List[OTMonthlyRollup]:
+        return await db.run_sync(ot_rollup_repository.get_rollups, start_month, end_month, user_id=user_id, manager_id=manager_id, depth=depth)
+
+async_ot_rollup_repository = AsyncOTRollupRepository()
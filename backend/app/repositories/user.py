@@ -1,8 +1,25 @@
-from typing import Optional, List
+from typing import Dict, Optional, List, Tuple
+from sqlalchemy import select, update, bindparam
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.pagination import keyset_paginate
+from app.models.audit import AuditAction, AuditEntity
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate
-from app.core.security import get_password_hash
+from app.core.audit import audit_writer
+from app.core.config import settings
+from app.core.database import upsert_insert
+from app.core.security import get_password_hash, get_password_hash_async, get_password_hashes_async
+from app.core.principal import principal_cache
+from app.repositories.dashboard import dashboard_repository
+from app.repositories.hierarchy import HierarchyCycle, hierarchy_repository, reports_filter
+from app.services.user_import import ImportRow, import_error
+
+DUPLICATE_EMAIL = "The user with this email already exists in the system."
+
+def _chunks(items: List) -> List[List]:
+    batch_size = settings.USER_IMPORT_BATCH_SIZE
+    return [items[i:i + batch_size] for i in range(0, len(items), batch_size)]
 
 class UserRepository:
     def get_by_email(self, db: Session, email: str) -> Optional[User]:
@@ -14,13 +31,23 @@ class UserRepository:
     def get_multi(self, db: Session, skip: int = 0, limit: int = 100) -> List[User]:
         return db.query(User).offset(skip).limit(limit).all()
 
-    def get_by_manager(self, db: Session, manager_id: int, skip: int = 0, limit: int = 100) -> List[User]:
-        return db.query(User).filter(User.manager_id == manager_id).offset(skip).limit(limit).all()
+    def get_multi_page(self, db: Session, after: Optional[str] = None, limit: int = 100) -> Tuple[List[User], Optional[str]]:
+        return keyset_paginate(db.query(User), User, after, limit, descending=False)
+
+    def get_by_manager(self, db: Session, manager_id: int, skip: int = 0, limit: int = 100, depth: str = "direct") -> List[User]:
+        return (
+            db.query(User)
+            .filter(reports_filter(User.id, manager_id, depth))
+            .order_by(User.id)
+            .offset(skip)
+            .limit(limit)
+            .all()
+        )
 
-    def create(self, db: Session, user_in: UserCreate) -> User:
+    def create(self, db: Session, user_in: UserCreate, password_hash: Optional[str] = None, actor_id: Optional[int] = None) -> User:
         db_obj = User(
             email=user_in.email,
-            password_hash=get_password_hash(user_in.password),
+            password_hash=password_hash or get_password_hash(user_in.password),
             full_name=user_in.full_name,
             role=user_in.role,
             designation=user_in.designation,
@@ -31,29 +58,244 @@ class UserRepository:
             is_active=user_in.is_active
         )
         db.add(db_obj)
+        db.flush()
+        hierarchy_repository.lock(db)
+        hierarchy_repository.link_users(db, [db_obj.id])
         db.commit()
+        audit_writer.collect(db, actor_id, AuditAction.USER_CREATED, AuditEntity.USER, [db_obj.id])
         db.refresh(db_obj)
+        dashboard_repository.invalidate(db, db_obj.manager_id)
         return db_obj
     
-    def update(self, db: Session, *, db_obj: User, obj_in: UserUpdate) -> User:
+    def update(self, db: Session, *, db_obj: User, obj_in: UserUpdate, password_hash: Optional[str] = None, actor_id: Optional[int] = None) -> User:
         update_data = obj_in.dict(exclude_unset=True)
         if "password" in update_data:
-            hashed_password = get_password_hash(update_data["password"])
+            hashed_password = password_hash or get_password_hash(update_data["password"])
             del update_data["password"]
             update_data["password_hash"] = hashed_password
         
+        previous_manager_id = db_obj.manager_id
+        manager_changed = "manager_id" in update_data and update_data["manager_id"] != previous_manager_id
+        if manager_changed:
+            hierarchy_repository.lock(db)
+        if manager_changed and update_data["manager_id"] is not None:
+            if hierarchy_repository.is_in_subtree(db, db_obj.id, update_data["manager_id"]):
+                db.rollback()
+                raise HierarchyCycle()
+
         for field, value in update_data.items():
             setattr(db_obj, field, value)
             
         db.add(db_obj)
+        if manager_changed:
+            hierarchy_repository.move(db, db_obj.id, db_obj.manager_id)
         db.commit()
+        audit_writer.collect(db, actor_id, AuditAction.USER_UPDATED, AuditEntity.USER, [db_obj.id])
+        # Role, manager or active flag may have changed; drop cached tokens
+        principal_cache.invalidate_user(db_obj.id)
         db.refresh(db_obj)
+        dashboard_repository.invalidate(db, previous_manager_id, db_obj.manager_id, db_obj.id)
         return db_obj
         
-    def remove(self, db: Session, *, id: int) -> User:
+    def remove(self, db: Session, *, id: int, actor_id: Optional[int] = None) -> User:
         obj = db.query(User).get(id)
+        manager_id = obj.manager_id
+        hierarchy_repository.lock(db)
+        report_ids = list(db.scalars(select(User.id).where(User.manager_id == id)))
+        hierarchy_repository.detach(db, id)
         db.delete(obj)
         db.commit()
+        audit_writer.collect(db, actor_id, AuditAction.USER_DELETED, AuditEntity.USER, [id])
+        # Their reports' manager_id is now NULL
+        for user_id in [id, *report_ids]:
+            principal_cache.invalidate_user(user_id)
+        # Their requests and, via SET NULL, their reports left these scopes
+        dashboard_repository.invalidate(db, manager_id, id)
         return obj
 
+    def plan_import(self, db: Session, rows: List[ImportRow]) -> Tuple[List[ImportRow], Dict[str, int], List[Dict]]:
+        """
+        Check validated import rows against the database, without writing.
+
+        Rows whose email already exists, whose manager cannot be found
+        (neither an existing user nor another imported row) or whose
+        in-file manager chain is circular are reported. Returns the rows
+        to insert, the ids of their managers that already exist by email,
+        and the errors.
+        """
+        errors: List[Dict] = []
+
+        existing = set()
+        for chunk in _chunks([r.user_in.email for r in rows]):
+            existing.update(db.scalars(select(User.email).where(User.email.in_(chunk))))
+
+        pending = []
+        for r in rows:
+            if r.user_in.email in existing:
+                errors.append(import_error(r.row, r.user_in.email, DUPLICATE_EMAIL))
+            else:
+                pending.append(r)
+
+        external_emails = {r.manager_email for r in pending if r.manager_email} - {r.user_in.email for r in pending}
+        manager_ids: Dict[str, int] = {}
+        for chunk in _chunks(list(external_emails)):
+            manager_ids.update(db.execute(select(User.email, User.id).where(User.email.in_(chunk))).all())
+
+        # Rows whose in-file manager chain loops back on itself
+        in_file = {r.user_in.email: r.manager_email for r in pending if r.manager_email}
+        circular, done = set(), set()
+        for email in in_file:
+            path, on_path = [], set()
+            current = email
+            while current in in_file and current not in done and current not in on_path:
+                path.append(current)
+                on_path.add(current)
+                current = in_file[current]
+            if current in on_path:
+                circular.update(path[path.index(current):])
+            done.update(path)
+        if circular:
+            kept = []
+            for r in pending:
+                if r.user_in.email in circular:
+                    errors.append(import_error(r.row, r.user_in.email, f"Circular manager reference: {r.manager_email}"))
+                else:
+                    kept.append(r)
+            pending = kept
+
+        # Dropping a row can orphan rows that named it as manager; repeat
+        # until every remaining reference resolves
+        while True:
+            importing = {r.user_in.email for r in pending}
+            kept = []
+            for r in pending:
+                if r.manager_email and r.manager_email not in importing and r.manager_email not in manager_ids:
+                    errors.append(import_error(r.row, r.user_in.email, f"Unknown manager email: {r.manager_email}"))
+                else:
+                    kept.append(r)
+            if len(kept) == len(pending):
+                break
+            pending = kept
+
+        return pending, manager_ids, errors
+
+    def bulk_create(self, db: Session, rows: List[ImportRow], password_hashes: List[str], manager_ids: Dict[str, int], actor_id: Optional[int] = None) -> Tuple[int, List[Dict]]:
+        """
+        Insert rows checked by `plan_import` in one transaction.
+
+        Users go in with batched multi-row INSERT ... ON CONFLICT (email)
+        DO NOTHING RETURNING, so an email taken since the check is reported
+        as a duplicate instead of failing the import; managers that are
+        themselves in the import are filled in afterwards with one
+        executemany UPDATE.
+        """
+        if not rows:
+            return 0, []
+        errors: List[Dict] = []
+        created: Dict[str, int] = {}
+        stmt = upsert_insert(db, User).on_conflict_do_nothing(index_elements=["email"]).returning(User.id, User.email)
+        for chunk in _chunks(list(zip(rows, password_hashes))):
+            params = [
+                {
+                    "email": r.user_in.email,
+                    "password_hash": password_hash,
+                    "full_name": r.user_in.full_name,
+                    "role": r.user_in.role,
+                    "designation": r.user_in.designation,
+                    "dob": r.user_in.dob,
+                    "phone_number": r.user_in.phone_number,
+                    "join_date": r.user_in.join_date,
+                    "manager_id": manager_ids.get(r.manager_email),
+                    "is_active": r.user_in.is_active,
+                }
+                for r, password_hash in chunk
+            ]
+            for user_id, email in db.execute(stmt, params):
+                created[email] = user_id
+
+        # Created concurrently by someone else; rows naming one of them as
+        # manager get that user, like any existing manager
+        taken = [r for r in rows if r.user_in.email not in created]
+        for r in taken:
+            errors.append(import_error(r.row, r.user_in.email, DUPLICATE_EMAIL))
+        in_file_managers = dict(created)
+        for chunk in _chunks([r.user_in.email for r in taken]):
+            in_file_managers.update(db.execute(select(User.email, User.id).where(User.email.in_(chunk))).all())
+
+        internal = [
+            {"row_id": created[r.user_in.email], "new_manager": in_file_managers[r.manager_email]}
+            for r in rows
+            if r.user_in.email in created and r.manager_email in in_file_managers
+        ]
+        if internal:
+            db.execute(
+                update(User.__table__)
+                .where(User.__table__.c.id == bindparam("row_id"))
+                .values(manager_id=bindparam("new_manager")),
+                internal,
+            )
+        # Walks up manager_id, so only after in-file managers are set
+        hierarchy_repository.lock(db)
+        for chunk in _chunks(list(created.values())):
+            hierarchy_repository.link_users(db, chunk)
+        db.commit()
+        audit_writer.collect(db, actor_id, AuditAction.USER_CREATED, AuditEntity.USER, list(created.values()))
+        dashboard_repository.invalidate(db, *set(manager_ids.values()) | {p["new_manager"] for p in internal})
+        return len(created), errors
+
 user_repository = UserRepository()
+
+class AsyncUserRepository:
+    """
+    UserRepository on an AsyncSession. The sync methods run through
+    `run_sync`, so their I/O goes through the async driver without a thread.
+    Passwords are hashed here first so bcrypt never runs on the event loop.
+    """
+
+    async def get_by_email(self, db: AsyncSession, email: str) -> Optional[User]:
+        return await db.run_sync(user_repository.get_by_email, email)
+
+    async def get(self, db: AsyncSession, user_id: int) -> Optional[User]:
+        return await db.run_sync(user_repository.get, user_id)
+
+    async def get_multi(self, db: AsyncSession, skip: int = 0, limit: int = 100) -> List[User]:
+        return await db.run_sync(user_repository.get_multi, skip=skip, limit=limit)
+
+    async def get_multi_page(self, db: AsyncSession, after: Optional[str] = None, limit: int = 100) -> Tuple[List[User], Optional[str]]:
+        return await db.run_sync(user_repository.get_multi_page, after=after, limit=limit)
+
+    async def get_by_manager(self, db: AsyncSession, manager_id: int, skip: int = 0, limit: int = 100, depth: str = "direct") -> List[User]:
+        return await db.run_sync(user_repository.get_by_manager, manager_id, skip=skip, limit=limit, depth=depth)
+
+    async def create(self, db: AsyncSession, user_in: UserCreate, actor_id: Optional[int] = None) -> User:
+        password_hash = await get_password_hash_async(user_in.password)
+        user = await db.run_sync(user_repository.create, user_in, password_hash=password_hash, actor_id=actor_id)
+        await audit_writer.publish(db)
+        return user
+
+    async def update(self, db: AsyncSession, *, db_obj: User, obj_in: UserUpdate, actor_id: Optional[int] = None) -> User:
+        password_hash = None
+        if obj_in.password is not None:
+            password_hash = await get_password_hash_async(obj_in.password)
+        user = await db.run_sync(
+            user_repository.update, db_obj=db_obj, obj_in=obj_in, password_hash=password_hash, actor_id=actor_id
+        )
+        await audit_writer.publish(db)
+        return user
+
+    async def bulk_create(self, db: AsyncSession, rows: List[ImportRow], actor_id: Optional[int] = None) -> Tuple[int, List[Dict]]:
+        pending, manager_ids, errors = await db.run_sync(user_repository.plan_import, rows)
+        # Only rows that will be inserted are worth a bcrypt round
+        password_hashes = await get_password_hashes_async([r.user_in.password for r in pending])
+        created, insert_errors = await db.run_sync(
+            user_repository.bulk_create, pending, password_hashes, manager_ids, actor_id=actor_id
+        )
+        await audit_writer.publish(db)
+        return created, errors + insert_errors
+
+    async def remove(self, db: AsyncSession, *, id: int, actor_id: Optional[int] = None) -> User:
+        user = await db.run_sync(user_repository.remove, id=id, actor_id=actor_id)
+        await audit_writer.publish(db)
+        return user
+
+async_user_repository = AsyncUserRepository()
@@ -0,0 +1,14 @@
+from typing import List
+from pydantic import BaseModel
+
+# Upper bound on ids per bulk status change
+MAX_BULK_IDS = 500
+
+class BulkStatusSkipped(BaseModel):
+    id: int
+    detail: str
+
+# Response shape for bulk approve/reject
+class BulkStatusResult(BaseModel):
+    updated: List[int]
+    skipped: List[BulkStatusSkipped]
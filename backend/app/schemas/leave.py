@@ -1,7 +1,11 @@
 from typing import Optional, List
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, model_validator
 from datetime import date, datetime
 from app.models.leave import LeaveStatus, HolidayType
+from app.schemas.bulk import MAX_BULK_IDS
+
+# Longest leave one request may cover; longer absences are split per year
+MAX_LEAVE_SPAN_DAYS = 366
 
 # --- LEAVE TYPES ---
 class LeaveTypeBase(BaseModel):
@@ -30,12 +34,21 @@ class LeaveRequestBase(BaseModel):
     reason: Optional[str] = None
 
 class LeaveRequestCreate(LeaveRequestBase):
-    pass
+    @model_validator(mode="after")
+    def check_span(self) -> "LeaveRequestCreate":
+        if (self.end_date - self.start_date).days >= MAX_LEAVE_SPAN_DAYS:
+            raise ValueError(
+                f"A leave request cannot span more than {MAX_LEAVE_SPAN_DAYS} days; apply for each year separately"
+            )
+        return self
 
 class LeaveRequestUpdate(BaseModel):
     status: LeaveStatus
     manager_comment: Optional[str] = None
 
+class LeaveBulkStatusUpdate(LeaveRequestUpdate):
+    ids: List[int] = Field(..., min_length=1, max_length=MAX_BULK_IDS)
+
 # Minimal user info for leave display
 class UserMini(BaseModel):
     id: int
@@ -59,6 +72,43 @@ class LeaveRequest(LeaveRequestBase):
     class Config:
         from_attributes = True
 
+# --- CALENDAR ---
+class LeaveTypeMini(BaseModel):
+    id: int
+    name: str
+    color_hex: str
+
+    class Config:
+        from_attributes = True
+
+class CalendarLeave(BaseModel):
+    id: int
+    user_id: int
+    leave_type_id: int
+    start_date: date
+    end_date: date
+    total_days: float
+    status: LeaveStatus
+
+    user: UserMini
+    leave_type: LeaveTypeMini
+
+    class Config:
+        from_attributes = True
+
+# --- BALANCES ---
+class LeaveBalance(BaseModel):
+    leave_type_id: int
+    year: int
+    allotted_days: float
+    carried_forward_days: float
+    used_days: float
+    pending_days: float
+    available_days: float
+
+    class Config:
+        from_attributes = True
+
 # --- HOLIDAYS ---
 class HolidayBase(BaseModel):
     date: date
@@ -74,3 +124,14 @@ class Holiday(HolidayBase):
 
     class Config:
         from_attributes = True
+
+# A holiday on a concrete date, recurring ones expanded per year
+class HolidayOccurrence(BaseModel):
+    date: date
+    holiday_id: int
+    name: str
+    type: HolidayType
+    is_recurring: bool
+
+    class Config:
+        from_attributes = True
@@ -1,8 +1,9 @@
-from typing import Optional
-from pydantic import BaseModel
+from typing import List, Optional
+from pydantic import BaseModel, Field
 from datetime import date, time, datetime
 from app.models.ot import OTStatus
 from app.schemas.user import User as UserSchema
+from app.schemas.bulk import MAX_BULK_IDS
 
 # Minimal user info for display
 class UserMini(BaseModel):
@@ -26,6 +27,9 @@ class OTRequestUpdate(BaseModel):
     status: OTStatus
     manager_comment: Optional[str] = None
 
+class OTBulkStatusUpdate(OTRequestUpdate):
+    ids: List[int] = Field(..., min_length=1, max_length=MAX_BULK_IDS)
+
 class OTRequest(OTRequestBase):
     id: int
     user_id: int
@@ -38,3 +42,17 @@ class OTRequest(OTRequestBase):
 
     class Config:
         from_attributes = True
+
+# Monthly totals per employee; `month` is the first day of the month
+class OTMonthlyRollup(BaseModel):
+    user_id: int
+    month: date
+    approved_hours: float
+    pending_hours: float
+    approved_count: int
+    pending_count: int
+
+    user: UserMini
+
+    class Config:
+        from_attributes = True
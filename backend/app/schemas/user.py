@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel, EmailStr
 from app.models.user import UserRole
 from datetime import datetime, date
@@ -48,3 +48,13 @@ class User(UserInDBBase):
 # Additional properties stored in DB
 class UserInDB(UserInDBBase):
     password_hash: str
+
+# Bulk import (CSV) report; `row` is the line number in the uploaded file
+class UserImportError(BaseModel):
+    row: int
+    email: Optional[str] = None
+    detail: str
+
+class UserImportResult(BaseModel):
+    created: int
+    errors: List[UserImportError]
@@ -0,0 +1,59 @@
+import csv
+import enum
+import io
+import json
+from datetime import date, datetime, time
+from typing import Any, AsyncIterator
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+
+MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (date, datetime, time)):
+        return value.isoformat()
+    return value
+
+async def _stream_rows(stmt: Select, fmt: str) -> AsyncIterator[str]:
+    # The request's session is closed by the time the body is sent, so the
+    # export holds its own connection for as long as it streams
+    async with AsyncSessionLocal() as session:
+        result = await session.stream(stmt.execution_options(yield_per=settings.EXPORT_BATCH_SIZE))
+        columns = list(result.keys())
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if fmt == "csv":
+            writer.writerow(columns)
+
+        # Server-side cursor: one batch in memory at a time, flushed as soon
+        # as it is formatted
+        async for partition in result.partitions():
+            for row in partition:
+                values = [_plain(v) for v in row]
+                if fmt == "csv":
+                    writer.writerow(values)
+                else:
+                    buffer.write(json.dumps(dict(zip(columns, values))))
+                    buffer.write("\n")
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue()
+
+def export_response(stmt: Select, fmt: str, filename: str) -> StreamingResponse:
+    """
+    Stream the rows of `stmt` as CSV (with a header row) or NDJSON.
+    """
+    return StreamingResponse(
+        _stream_rows(stmt, fmt),
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{fmt}"'},
+    )
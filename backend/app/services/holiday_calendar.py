@@ -0,0 +1,148 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from datetime import date
+from typing import Callable, Iterable, List, Optional, Tuple
+from app.core.config import settings
+from app.models.leave import Holiday, HolidayType
+
+@dataclass(frozen=True)
+class HolidayOccurrence:
+    """
+    A holiday on a concrete date. Also used as the cached snapshot of a
+    holiday row, where `date` is the stored date.
+    """
+    date: date
+    holiday_id: int
+    name: str
+    type: HolidayType
+    is_recurring: bool
+
+def _snapshot(h: Holiday) -> HolidayOccurrence:
+    return HolidayOccurrence(h.date, h.id, h.name, h.type or HolidayType.PUBLIC, bool(h.is_recurring))
+
+def occurrences_in_year(holidays: Iterable[HolidayOccurrence], year: int) -> List[HolidayOccurrence]:
+    """
+    Concrete holidays in `year` from holiday row snapshots, by date.
+    Recurring holidays repeat on the same month/day every year from the
+    year of their stored date on (29 Feb only in leap years); a one-off
+    holiday wins over a recurring one on the same day.
+    """
+    by_day = {}
+    for h in holidays:
+        if h.is_recurring:
+            if year < h.date.year:
+                # Adding a holiday must not change days already past
+                continue
+            try:
+                day = h.date.replace(year=year)
+            except ValueError:
+                continue
+        elif h.date.year == year:
+            day = h.date
+        else:
+            continue
+        current = by_day.get(day)
+        if current is None or (current.is_recurring and not h.is_recurring):
+            by_day[day] = replace(h, date=day)
+    return [by_day[day] for day in sorted(by_day)]
+
+def expand_holidays(holidays: Iterable[Holiday], start_year: int, end_year: int) -> List[date]:
+    """
+    Days off in [start_year, end_year]. Optional holidays are not days off.
+    """
+    holidays = [_snapshot(h) for h in holidays]
+    return [
+        o.date
+        for year in range(start_year, end_year + 1)
+        for o in occurrences_in_year(holidays, year)
+        if o.type != HolidayType.OPTIONAL
+    ]
+
+class HolidayCalendar:
+    """
+    Expanded holidays per year, cached per worker.
+
+    The holiday rows are loaded once and re-read after
+    HOLIDAY_CACHE_TTL_SECONDS, which is how other workers pick up new
+    holidays; `add` updates this worker at once and re-expands only the
+    cached years the new holiday falls in. `version` changes whenever the
+    expanded sets may have, so derived caches know to rebuild.
+    """
+
+    def __init__(self, ttl: float, max_years: int):
+        self.ttl = ttl
+        self.max_years = max_years
+        self.version = 0
+        self._rows: Optional[Tuple[HolidayOccurrence, ...]] = None
+        self._loaded_at = 0.0
+        self._years: "OrderedDict[int, Tuple[HolidayOccurrence, ...]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def is_stale(self) -> bool:
+        return self._rows is None or time.monotonic() - self._loaded_at >= self.ttl
+
+    def _source(self, load_holidays: Callable[[], Iterable[Holiday]]) -> Tuple[HolidayOccurrence, ...]:
+        if not self.is_stale():
+            return self._rows
+        version = self.version
+        # Load outside the lock: this may run on the event loop via run_sync
+        rows = tuple(sorted((_snapshot(h) for h in load_holidays()), key=lambda r: r.holiday_id))
+        with self._lock:
+            if version != self.version:
+                # `add` ran meanwhile; what we loaded may predate it
+                return self._rows if self._rows is not None else rows
+            if rows != self._rows:
+                self._rows = rows
+                self._years.clear()
+                self.version += 1
+            self._loaded_at = time.monotonic()
+            return rows
+
+    def year(self, year: int, load_holidays: Callable[[], Iterable[Holiday]]) -> Tuple[HolidayOccurrence, ...]:
+        rows = self._source(load_holidays)
+        with self._lock:
+            cached = self._years.get(year)
+            if cached is not None:
+                self._years.move_to_end(year)
+                return cached
+        expanded = tuple(occurrences_in_year(rows, year))
+        with self._lock:
+            if rows is self._rows:
+                self._years[year] = expanded
+                while len(self._years) > self.max_years:
+                    self._years.popitem(last=False)
+        return expanded
+
+    def occurrences(self, start_year: int, end_year: int, load_holidays: Callable[[], Iterable[Holiday]]) -> List[HolidayOccurrence]:
+        return [o for year in range(start_year, end_year + 1) for o in self.year(year, load_holidays)]
+
+    def days_off(self, start_year: int, end_year: int, load_holidays: Callable[[], Iterable[Holiday]]) -> List[date]:
+        return [
+            o.date
+            for o in self.occurrences(start_year, end_year, load_holidays)
+            if o.type != HolidayType.OPTIONAL
+        ]
+
+    def add(self, holiday: Holiday) -> None:
+        """
+        Call after a holiday is committed.
+        """
+        row = _snapshot(holiday)
+        with self._lock:
+            self.version += 1
+            if self._rows is None:
+                return
+            self._rows = self._rows + (row,)
+            if row.is_recurring:
+                affected = [year for year in self._years if year >= row.date.year]
+            else:
+                affected = [row.date.year]
+            for year in affected:
+                if year in self._years:
+                    self._years[year] = tuple(occurrences_in_year(self._rows, year))
+
+holiday_calendar = HolidayCalendar(
+    ttl=settings.HOLIDAY_CACHE_TTL_SECONDS, max_years=settings.HOLIDAY_CACHE_MAX_YEARS
+)
@@ -0,0 +1,81 @@
+import hashlib
+import threading
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Optional
+from fastapi import Request, Response
+from app.core.cache import TTLCache
+from app.core.config import settings
+
+LEAVE_TYPES = "leave_types"
+HOLIDAYS = "holidays"
+
+# Clients must revalidate every time, which costs a 304 when nothing changed
+CACHE_CONTROL = "private, no-cache"
+
+@dataclass(frozen=True)
+class CachedBody:
+    body: bytes
+    etag: str
+
+def _etag(body: bytes) -> str:
+    # From the content rather than the per-worker version, so every worker
+    # hands out the same tag for the same data
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+def _matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison: W/"x" matches "x"
+    tags = (t.strip() for t in if_none_match.split(","))
+    return etag in (t[2:] if t.startswith("W/") else t for t in tags)
+
+class ReferenceDataCache:
+    """
+    Serialized JSON bodies of rarely changing lists, cached per worker with
+    their ETag.
+
+    `invalidate` bumps the list's version and drops it in the worker that
+    made the change; other workers re-read after REFERENCE_CACHE_TTL_SECONDS.
+    A body loaded while a change was committed (the version moved) is
+    served but not cached.
+    """
+
+    def __init__(self, ttl: float):
+        self._cache = TTLCache(maxsize=16, ttl=ttl)
+        self._versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def version(self, name: str) -> int:
+        return self._versions.get(name, 0)
+
+    def invalidate(self, name: str) -> None:
+        with self._lock:
+            self._versions[name] = self.version(name) + 1
+            self._cache.pop(name)
+
+    async def get(self, name: str, load: Callable[[], Awaitable[bytes]]) -> CachedBody:
+        cached = self._cache.get(name)
+        if cached is not None:
+            return cached
+        version = self.version(name)
+        body = await load()
+        cached = CachedBody(body, _etag(body))
+        with self._lock:
+            if self.version(name) == version:
+                self._cache.set(name, cached)
+        return cached
+
+    async def response(self, request: Request, name: str, load: Callable[[], Awaitable[bytes]]) -> Response:
+        """
+        The cached body, or a 304 without one when the client's
+        If-None-Match already has it. `load` only runs on a cache miss.
+        """
+        cached = await self.get(name, load)
+        headers = {"ETag": cached.etag, "Cache-Control": CACHE_CONTROL}
+        if _matches(request.headers.get("if-none-match"), cached.etag):
+            return Response(status_code=304, headers=headers)
+        return Response(content=cached.body, media_type="application/json", headers=headers)
+
+reference_data = ReferenceDataCache(ttl=settings.REFERENCE_CACHE_TTL_SECONDS)
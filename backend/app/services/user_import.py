@@ -0,0 +1,83 @@
+import csv
+import io
+from dataclasses import dataclass
+from typing import BinaryIO, Dict, List, Optional, Tuple
+from pydantic import EmailStr, TypeAdapter, ValidationError
+from app.schemas.user import UserCreate
+
+REQUIRED_COLUMNS = ("email", "full_name", "password")
+OPTIONAL_COLUMNS = ("role", "designation", "dob", "phone_number", "join_date", "is_active", "manager_email")
+
+# Normalizes manager_email like UserCreate does email, so the two compare
+_email = TypeAdapter(EmailStr)
+
+@dataclass
+class ImportRow:
+    row: int
+    user_in: UserCreate
+    manager_email: Optional[str]
+
+def import_error(row: int, email: Optional[str], detail: str) -> Dict:
+    return {"row": row, "email": email, "detail": detail}
+
+def _format_validation_error(e: ValidationError, *loc: str) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in (*loc, *err['loc']))}: {err['msg']}" for err in e.errors()
+    )
+
+def parse_user_csv(stream: BinaryIO, max_rows: int) -> Tuple[List[ImportRow], List[Dict]]:
+    """
+    Read an uploaded CSV line by line and validate each row with UserCreate.
+
+    Managers are given by `manager_email` and resolved later, against the
+    file itself and existing users. Returns the valid rows and a per-row
+    error list; raises ValueError if the file as a whole is unusable.
+    """
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    try:
+        reader = csv.DictReader(text)
+        header = [c.strip() for c in reader.fieldnames or []]
+        missing = [c for c in REQUIRED_COLUMNS if c not in header]
+        if missing:
+            raise ValueError(f"Missing required column(s): {', '.join(missing)}")
+        unknown = set(header) - set(REQUIRED_COLUMNS) - set(OPTIONAL_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown column(s): {', '.join(sorted(unknown))}")
+        reader.fieldnames = header
+
+        rows: List[ImportRow] = []
+        errors: List[Dict] = []
+        seen: Dict[str, int] = {}
+        for count, record in enumerate(reader, start=1):
+            if count > max_rows:
+                raise ValueError(f"Too many rows: at most {max_rows} users per import")
+            line = reader.line_num
+            # Blank cells mean "not given", so schema defaults apply
+            fields = {k: v.strip() for k, v in record.items() if k and v and v.strip()}
+            manager_email = fields.pop("manager_email", None)
+            email = fields.get("email")
+            problems = []
+            try:
+                user_in = UserCreate(**fields)
+                email = user_in.email
+            except ValidationError as e:
+                problems.append(_format_validation_error(e))
+            if manager_email is not None:
+                try:
+                    manager_email = _email.validate_python(manager_email)
+                except ValidationError as e:
+                    problems.append(_format_validation_error(e, "manager_email"))
+            if problems:
+                errors.append(import_error(line, email, "; ".join(problems)))
+                continue
+            if user_in.email in seen:
+                errors.append(import_error(line, user_in.email, f"Duplicate email, first seen on row {seen[user_in.email]}"))
+                continue
+            seen[user_in.email] = line
+            rows.append(ImportRow(line, user_in, manager_email))
+        return rows, errors
+    except UnicodeDecodeError:
+        raise ValueError("The file is not valid UTF-8 CSV")
+    finally:
+        # Leave the upload's own file open; FastAPI closes it
+        text.detach()
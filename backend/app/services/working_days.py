@@ -0,0 +1,128 @@
+import threading
+from array import array
+from datetime import date, timedelta
+from typing import Callable, Iterable, List, Optional, Tuple
+from app.core.config import settings
+from app.models.leave import Holiday
+from app.services.holiday_calendar import expand_holidays, holiday_calendar
+
+# A cached calendar grows to cover requested years up to this span;
+# anything wider is answered by a one-off calendar instead
+MAX_CACHED_YEARS = 20
+
+def parse_weekmask(weekmask: str) -> Tuple[bool, ...]:
+    """
+    "1111100" (Mon..Sun, 1 = working day), as in numpy.busday_count.
+    """
+    if len(weekmask) != 7 or set(weekmask) - {"0", "1"}:
+        raise ValueError(f"Invalid weekmask: {weekmask!r}")
+    return tuple(c == "1" for c in weekmask)
+
+class WorkingDayCalendar:
+    """
+    Working days between `start` and `end` as a prefix-sum array.
+
+    `_prefix[i]` is the number of working days in [start, start + i), so any
+    range count is two array lookups regardless of its length.
+    """
+
+    def __init__(self, start: date, end: date, weekmask: Tuple[bool, ...], holidays: Iterable[date]):
+        self.start = start
+        self.end = end
+        off = set(holidays)
+        n = (end - start).days + 1
+        prefix = array("l", bytes(8 * (n + 1)))
+        count = 0
+        day = start
+        weekday = start.weekday()
+        for i in range(n):
+            if weekmask[weekday] and day not in off:
+                count += 1
+            prefix[i + 1] = count
+            day += timedelta(days=1)
+            weekday = (weekday + 1) % 7
+        self._prefix = prefix
+
+    def covers(self, start: date, end: date) -> bool:
+        return self.start <= start and end <= self.end
+
+    def working_days(self, start: date, end: date) -> int:
+        """
+        Working days in [start, end], both inclusive; 0 if end < start.
+        """
+        if end < start:
+            return 0
+        i = (start - self.start).days
+        j = (end - self.start).days
+        return self._prefix[j + 1] - self._prefix[i]
+
+    def working_days_many(self, ranges: Iterable[Tuple[date, date]]) -> List[int]:
+        return [self.working_days(start, end) for start, end in ranges]
+
+    def is_working_day(self, day: date) -> bool:
+        return self.working_days(day, day) == 1
+
+def days_by_year(calendar: Optional[WorkingDayCalendar], start: date, end: date, days: float) -> List[Tuple[int, float]]:
+    """
+    `days` of a leave over [start, end] as (year, days) per calendar year,
+    by the working days of each year; the last year takes the remainder so
+    the parts add up to `days`. `calendar` may be None if the leave does
+    not cross a year end.
+    """
+    if start.year == end.year:
+        return [(start.year, days)]
+    parts = []
+    remaining = days
+    for year in range(start.year, end.year):
+        part = min(float(calendar.working_days(max(start, date(year, 1, 1)), date(year, 12, 31))), remaining)
+        parts.append((year, part))
+        remaining -= part
+    parts.append((end.year, remaining))
+    return parts
+
+def build_calendar(holidays: Iterable[Holiday], start_year: int, end_year: int, weekmask: Optional[str] = None) -> WorkingDayCalendar:
+    return WorkingDayCalendar(
+        date(start_year, 1, 1),
+        date(end_year, 12, 31),
+        parse_weekmask(weekmask or settings.WORKING_WEEKMASK),
+        expand_holidays(holidays, start_year, end_year),
+    )
+
+class WorkingDayCalendarCache:
+    """
+    Keeps one calendar per worker, built over whole years around today and
+    widened on demand. Days off come from the holiday calendar, and the
+    calendar is rebuilt whenever that changes.
+    """
+
+    def __init__(self):
+        self._calendar: Optional[WorkingDayCalendar] = None
+        self._holiday_version = -1
+        self._lock = threading.Lock()
+
+    def get(self, start: date, end: date, load_holidays: Callable[[], Iterable[Holiday]]) -> WorkingDayCalendar:
+        calendar = self._calendar
+        fresh = self._holiday_version == holiday_calendar.version and not holiday_calendar.is_stale()
+        if calendar is not None and fresh and calendar.covers(start, end):
+            return calendar
+
+        this_year = date.today().year
+        lo, hi = min(start.year, this_year - 1), max(end.year, this_year + 1)
+        if calendar is not None and fresh:
+            lo, hi = min(lo, calendar.start.year), max(hi, calendar.end.year)
+        weekmask = parse_weekmask(settings.WORKING_WEEKMASK)
+        if hi - lo + 1 > MAX_CACHED_YEARS:
+            days_off = holiday_calendar.days_off(start.year, end.year, load_holidays)
+            return WorkingDayCalendar(date(start.year, 1, 1), date(end.year, 12, 31), weekmask, days_off)
+
+        # Read before days_off: if holidays change (or reload) meanwhile,
+        # this calendar is stored as outdated and the next call rebuilds
+        version = holiday_calendar.version
+        days_off = holiday_calendar.days_off(lo, hi, load_holidays)
+        calendar = WorkingDayCalendar(date(lo, 1, 1), date(hi, 12, 31), weekmask, days_off)
+        with self._lock:
+            self._calendar = calendar
+            self._holiday_version = version
+        return calendar
+
+working_day_calendars = WorkingDayCalendarCache()
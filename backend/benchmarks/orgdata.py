@@ -0,0 +1,257 @@
+"""
+Deterministic synthetic organisation for benchmarks and staging data.
+
+Users form a complete `fanout`-ary reporting tree under one admin (user
+1), so the tree is about log_fanout(users) levels deep and every inner
+node is a manager. Each user gets `leaves_per_year` non-overlapping
+leaves and `ot_per_year` overtime requests in each of `years` years
+ending with `end_year`. Requests before `as_of` (1 July of `end_year`)
+are decided and later ones are mostly pending.
+
+Rows are plain tuples in the `*_COLUMNS` order, handed out in batches,
+with explicit ids; loaders must move the id sequences past them. The
+same (spec) always yields the same rows, except for the one bcrypt
+password hash, which every user shares.
+"""
+import random
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Iterator, List, Optional, Tuple
+from app.models.leave import Holiday, HolidayType, LeaveStatus
+from app.models.ot import OTStatus
+from app.models.user import UserRole
+from app.services.working_days import build_calendar
+
+PASSWORD = "benchmark"
+ADMIN_EMAIL = "admin@bench.example.com"
+
+USER_COLUMNS = (
+    "id", "email", "password_hash", "full_name", "role", "designation",
+    "join_date", "manager_id", "is_active", "created_at",
+)
+LEAVE_TYPE_COLUMNS = ("id", "name", "default_days_per_year", "carry_forward", "color_hex")
+HOLIDAY_COLUMNS = ("id", "date", "name", "type", "is_recurring")
+LEAVE_COLUMNS = (
+    "id", "user_id", "leave_type_id", "start_date", "end_date", "total_days", "status",
+    "reason", "manager_comment", "approver_id", "created_at", "updated_at",
+)
+OT_COLUMNS = (
+    "id", "user_id", "ot_date", "start_time", "end_time", "total_hours", "reason", "status",
+    "manager_comment", "approver_id", "created_at",
+)
+
+LEAVE_TYPES = (
+    (1, "Annual", 20, True, "#4CAF50"),
+    (2, "Sick", 10, False, "#F44336"),
+    (3, "Casual", 8, False, "#2196F3"),
+    (4, "Unpaid", 0, False, "#9E9E9E"),
+)
+LEAVE_TYPE_WEIGHTS = (6, 2, 3, 1)
+# (month, day, name); stored once as recurring holidays
+RECURRING_HOLIDAYS = (
+    (1, 1, "New Year's Day"),
+    (5, 1, "Labour Day"),
+    (8, 15, "Independence Day"),
+    (10, 2, "Gandhi Jayanti"),
+    (12, 25, "Christmas"),
+)
+ONE_OFF_HOLIDAYS_PER_YEAR = 4
+REASONS = ("Family event", "Personal work", "Travel", "Medical appointment", None)
+OT_REASONS = ("Release", "Month-end close", "Customer escalation", "Migration")
+# Leaves span up to 5 days, one per slot of the year; a slot must hold one
+MAX_LEAVE_SPAN = 5
+MAX_LEAVES_PER_YEAR = 365 // MAX_LEAVE_SPAN
+
+@dataclass(frozen=True)
+class OrgSpec:
+    users: int = 1000
+    fanout: int = 8
+    years: int = 3
+    leaves_per_year: int = 6
+    ot_per_year: int = 12
+    seed: int = 42
+    end_year: int = field(default_factory=lambda: date.today().year)
+
+    @property
+    def start_year(self) -> int:
+        return self.end_year - self.years + 1
+
+    @property
+    def as_of(self) -> date:
+        return date(self.end_year, 7, 1)
+
+def manager_of(user_id: int, fanout: int) -> Optional[int]:
+    return None if user_id == 1 else (user_id - 2) // fanout + 1
+
+def first_report_of(user_id: int, fanout: int) -> int:
+    return (user_id - 1) * fanout + 2
+
+def _utc(day: date, hour: int = 9) -> datetime:
+    return datetime.combine(day, time(hour), tzinfo=timezone.utc)
+
+class SyntheticOrg:
+    def __init__(self, spec: OrgSpec, password_hash: str):
+        self.spec = spec
+        self.password_hash = password_hash
+        self._holiday_rows = self._make_holidays()
+        # Leave lengths in working days, as the app counts them
+        self.calendar = build_calendar(
+            [Holiday(**dict(zip(HOLIDAY_COLUMNS, row))) for row in self._holiday_rows],
+            spec.start_year,
+            spec.end_year + 1,
+        )
+
+    def _rng(self, name: str) -> random.Random:
+        # One stream per table, so each table is stable on its own
+        return random.Random(f"{self.spec.seed}:{name}")
+
+    # --- people ---
+
+    def role_of(self, user_id: int) -> UserRole:
+        if user_id == 1:
+            return UserRole.ADMIN
+        if first_report_of(user_id, self.spec.fanout) <= self.spec.users:
+            return UserRole.MANAGER
+        return UserRole.EMPLOYEE
+
+    def email_of(self, user_id: int) -> str:
+        return ADMIN_EMAIL if user_id == 1 else f"user{user_id}@bench.example.com"
+
+    def managers(self) -> List[int]:
+        return [i for i in range(2, self.spec.users + 1) if self.role_of(i) == UserRole.MANAGER]
+
+    def employees(self) -> List[int]:
+        return [i for i in range(2, self.spec.users + 1) if self.role_of(i) == UserRole.EMPLOYEE]
+
+    def users(self, batch_size: int) -> Iterator[List[Tuple]]:
+        rng = self._rng("users")
+        batch = []
+        for user_id in range(1, self.spec.users + 1):
+            role = self.role_of(user_id)
+            joined = date(self.spec.start_year - rng.randint(0, 8), rng.randint(1, 12), rng.randint(1, 28))
+            batch.append((
+                user_id,
+                self.email_of(user_id),
+                self.password_hash,
+                f"Bench User {user_id}",
+                role,
+                "Manager" if role == UserRole.MANAGER else rng.choice(("Engineer", "Analyst", "Designer", "Associate")),
+                joined,
+                manager_of(user_id, self.spec.fanout),
+                True,
+                _utc(joined),
+            ))
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    # --- reference data ---
+
+    def leave_types(self) -> List[Tuple]:
+        return list(LEAVE_TYPES)
+
+    def _make_holidays(self) -> List[Tuple]:
+        rng = self._rng("holidays")
+        rows = [
+            (i + 1, date(self.spec.start_year, month, day), name, HolidayType.PUBLIC, True)
+            for i, (month, day, name) in enumerate(RECURRING_HOLIDAYS)
+        ]
+        taken = {(month, day) for month, day, _ in RECURRING_HOLIDAYS}
+        for year in range(self.spec.start_year, self.spec.end_year + 2):
+            added = 0
+            while added < ONE_OFF_HOLIDAYS_PER_YEAR:
+                day = date(year, 1, 1) + timedelta(days=rng.randrange(365))
+                if (day.month, day.day) in taken:
+                    continue
+                taken.add((day.month, day.day))
+                kind = HolidayType.OPTIONAL if added % 2 else HolidayType.PUBLIC
+                rows.append((len(rows) + 1, day, f"Festival {year}-{added + 1}", kind, False))
+                added += 1
+        return rows
+
+    def holidays(self) -> List[Tuple]:
+        return list(self._holiday_rows)
+
+    # --- history ---
+
+    def _decided(self, rng: random.Random, day: date, statuses, weights):
+        if day >= self.spec.as_of and rng.random() < 0.7:
+            return statuses[0]
+        return rng.choices(statuses[1:], weights)[0]
+
+    def leave_requests(self, batch_size: int) -> Iterator[List[Tuple]]:
+        spec = self.spec
+        rng = self._rng("leaves")
+        statuses = (LeaveStatus.PENDING, LeaveStatus.APPROVED, LeaveStatus.REJECTED, LeaveStatus.CANCELLED)
+        slot = 365 // max(spec.leaves_per_year, 1)
+        batch, next_id = [], 1
+        for user_id in range(2, spec.users + 1):
+            manager_id = manager_of(user_id, spec.fanout)
+            for year in range(spec.start_year, spec.end_year + 1):
+                for k in range(spec.leaves_per_year):
+                    # One leave per slot of the year, so they never overlap
+                    start = date(year, 1, 1) + timedelta(days=k * slot + rng.randrange(max(slot - MAX_LEAVE_SPAN, 1)))
+                    end = start + timedelta(days=rng.choice((0, 0, 1, 1, 2, 4)))
+                    total = self.calendar.working_days(start, end)
+                    if total == 0:
+                        continue
+                    status = self._decided(rng, start, statuses, (80, 12, 8))
+                    decided = status != LeaveStatus.PENDING
+                    created = _utc(start - timedelta(days=rng.randint(3, 40)), rng.randint(8, 18))
+                    batch.append((
+                        next_id,
+                        user_id,
+                        rng.choices(LEAVE_TYPES, LEAVE_TYPE_WEIGHTS)[0][0],
+                        start,
+                        end,
+                        float(total),
+                        status,
+                        rng.choice(REASONS),
+                        "Not this week" if status == LeaveStatus.REJECTED else None,
+                        manager_id if decided else None,
+                        created,
+                        created + timedelta(days=rng.randint(0, 2)) if decided else created,
+                    ))
+                    next_id += 1
+                    if len(batch) == batch_size:
+                        yield batch
+                        batch = []
+        if batch:
+            yield batch
+
+    def ot_requests(self, batch_size: int) -> Iterator[List[Tuple]]:
+        spec = self.spec
+        rng = self._rng("ot")
+        statuses = (OTStatus.PENDING, OTStatus.APPROVED, OTStatus.REJECTED)
+        batch, next_id = [], 1
+        for user_id in range(2, spec.users + 1):
+            manager_id = manager_of(user_id, spec.fanout)
+            for year in range(spec.start_year, spec.end_year + 1):
+                for _ in range(spec.ot_per_year):
+                    day = date(year, 1, 1) + timedelta(days=rng.randrange(365))
+                    start_hour = rng.choice((17, 18, 19))
+                    hours = rng.choice((1, 2, 2, 3, 4))
+                    status = self._decided(rng, day, statuses, (85, 15))
+                    decided = status != OTStatus.PENDING
+                    created = _utc(day, 20 + rng.randint(0, 3))
+                    batch.append((
+                        next_id,
+                        user_id,
+                        day,
+                        time(start_hour),
+                        time(start_hour + hours),
+                        float(hours),
+                        rng.choice(OT_REASONS),
+                        status,
+                        None,
+                        manager_id if decided else None,
+                        created,
+                    ))
+                    next_id += 1
+                    if len(batch) == batch_size:
+                        yield batch
+                        batch = []
+        if batch:
+            yield batch
@@ -0,0 +1,328 @@
+"""
+Latency / throughput benchmark of the API against a synthetic org.
+
+    python benchmarks/run.py --reseed --drop-existing --users 2000 --requests 300 --concurrency 8 --save baseline.json
+    python benchmarks/run.py --users 2000 --compare baseline.json
+
+The app runs in this process (httpx over ASGI, no network), against the
+database in DATABASE_URI, so SQL statements can be counted per request.
+`--reseed` first loads the org (DESTRUCTIVE, see seed.py, so it needs
+`--drop-existing` too); without it the org options must match the data
+already loaded.
+
+Per scenario it reports p50/p95/p99 latency, requests per second and SQL
+statements per request. `--save` writes the results as JSON; `--compare`
+diffs a run against such a file and exits with 1 if a metric regressed
+by more than `--threshold` percent.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from sqlalchemy import event
+from app.core.database import async_engine
+from app.core.hashing import password_hash_pool
+from app.core.security import create_access_token
+from app.main import app
+from benchmarks.orgdata import PASSWORD, SyntheticOrg, manager_of
+from benchmarks.seed import add_spec_arguments, load_org, spec_from_args
+
+API = "/api/v1"
+
+# Statements run on behalf of the request being measured
+_statements: ContextVar[Optional[List[int]]] = ContextVar("benchmark_statements", default=None)
+
+@event.listens_for(async_engine.sync_engine, "before_cursor_execute")
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    counter = _statements.get()
+    if counter is not None:
+        counter[0] += 1
+
+Request = Tuple[str, str, Dict[str, Any]]
+
+@dataclass
+class Scenario:
+    name: str
+    actor: str
+    # Request number -> (method, url, httpx keyword arguments)
+    build: Callable[[int], Request]
+    on_response: Optional[Callable[[httpx.Response], None]] = None
+
+@dataclass
+class Result:
+    latencies: List[float] = field(default_factory=list)
+    statements: List[int] = field(default_factory=list)
+    statuses: Counter = field(default_factory=Counter)
+    elapsed: float = 0.0
+
+    def summary(self) -> Dict[str, Any]:
+        ms = [t * 1000 for t in self.latencies]
+        cuts = statistics.quantiles(ms, n=100, method="inclusive") if len(ms) > 1 else ms * 99
+        return {
+            "requests": len(ms),
+            "errors": sum(n for code, n in self.statuses.items() if code >= 400),
+            "status_codes": {str(code): n for code, n in sorted(self.statuses.items())},
+            "p50_ms": round(cuts[49], 2),
+            "p95_ms": round(cuts[94], 2),
+            "p99_ms": round(cuts[98], 2),
+            "mean_ms": round(statistics.fmean(ms), 2),
+            "rps": round(len(ms) / self.elapsed, 1) if self.elapsed else 0.0,
+            "queries_per_request": round(statistics.fmean(self.statements), 2),
+            "max_queries": max(self.statements),
+        }
+
+class Bench:
+    """
+    Who plays which role in the synthetic org, and the scenarios.
+    """
+
+    def __init__(self, org: SyntheticOrg):
+        spec = org.spec
+        self.org = org
+        self.employees = org.employees()
+        self.users = {
+            "admin": 1,
+            # First-level manager: every manager below reports to them
+            "director": 2,
+            # Manages the last employees directly
+            "manager": manager_of(spec.users, spec.fanout),
+            "employee": self.employees[-1],
+        }
+        self._headers: Dict[int, Dict[str, str]] = {}
+        self.created_leave_ids: List[int] = []
+        # New leaves go after the generated history, one week per round
+        # over all employees so they never overlap
+        first = date(spec.end_year + 1, 1, 1)
+        self.apply_from = first + timedelta(days=(1 - first.weekday()) % 7)
+
+    def scenarios(self) -> List[Scenario]:
+        month = self.org.spec.as_of
+        month_end = (month.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+        return [
+            Scenario("login", "none", self._login),
+            Scenario("dashboard_admin", "admin", lambda i: ("GET", f"{API}/dashboard/stats", {})),
+            Scenario("dashboard_manager", "manager", lambda i: ("GET", f"{API}/dashboard/stats", {})),
+            Scenario("leaves_list_admin", "admin", lambda i: ("GET", f"{API}/leaves/?limit=100", {})),
+            Scenario("leaves_cursor_admin", "admin", lambda i: ("GET", f"{API}/leaves/?cursor=true&limit=100", {})),
+            Scenario("leaves_list_employee", "employee", lambda i: ("GET", f"{API}/leaves/?limit=100", {})),
+            Scenario("ot_list_admin", "admin", lambda i: ("GET", f"{API}/ot/?limit=100", {})),
+            Scenario("leave_approvals_manager", "manager", lambda i: ("GET", f"{API}/leaves/approvals?limit=100", {})),
+            Scenario("leave_approvals_director", "director", lambda i: ("GET", f"{API}/leaves/approvals?depth=all&limit=100", {})),
+            Scenario("ot_approvals_manager", "manager", lambda i: ("GET", f"{API}/ot/approvals?limit=100", {})),
+            Scenario("team_director", "director", lambda i: ("GET", f"{API}/users/team?depth=all&limit=500", {})),
+            Scenario("calendar_month", "admin", lambda i: ("GET", f"{API}/leaves/calendar?start={month}&end={month_end}", {})),
+            Scenario("leave_types", "employee", lambda i: ("GET", f"{API}/leaves/types", {})),
+            Scenario("balances", "employee", lambda i: ("GET", f"{API}/leaves/balances?year={month.year}", {})),
+            Scenario("apply_leave", "employees", self._apply, self._remember_leave),
+        ]
+
+    def headers(self, user_id: int) -> Dict[str, str]:
+        # Tokens are minted here rather than through the login endpoint, so
+        # setting up hundreds of actors costs no bcrypt
+        if user_id not in self._headers:
+            self._headers[user_id] = {"Authorization": f"Bearer {create_access_token(user_id)}"}
+        return self._headers[user_id]
+
+    def _login(self, i: int) -> Request:
+        email = self.org.email_of(self.employees[i % len(self.employees)])
+        return "POST", f"{API}/login/access-token", {"data": {"username": email, "password": PASSWORD}}
+
+    def _apply(self, i: int) -> Request:
+        start = self.apply_from + timedelta(weeks=i // len(self.employees))
+        body = {
+            "leave_type_id": 1,
+            "start_date": start.isoformat(),
+            "end_date": (start + timedelta(days=1)).isoformat(),
+            "reason": "benchmark",
+        }
+        return "POST", f"{API}/leaves/", {"json": body, "actor": self.employees[i % len(self.employees)]}
+
+    def _remember_leave(self, response: httpx.Response) -> None:
+        if response.status_code == 200:
+            self.created_leave_ids.append(response.json()["id"])
+
+async def run_scenario(
+    client: httpx.AsyncClient, bench: Bench, scenario: Scenario,
+    requests: int, concurrency: int, warmup: int,
+) -> Result:
+    result = Result()
+    numbers = iter(range(warmup + requests))
+
+    async def send(i: int, record: bool) -> None:
+        method, url, kwargs = scenario.build(i)
+        # "employees" scenarios name their actor per request
+        actor = kwargs.pop("actor", bench.users.get(scenario.actor))
+        headers = bench.headers(actor) if actor is not None else {}
+        counter = [0]
+        reset = _statements.set(counter)
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, headers=headers, **kwargs)
+        finally:
+            _statements.reset(reset)
+        elapsed = time.perf_counter() - started
+        if scenario.on_response:
+            scenario.on_response(response)
+        if record:
+            result.latencies.append(elapsed)
+            result.statements.append(counter[0])
+            result.statuses[response.status_code] += 1
+
+    for _ in range(warmup):
+        await send(next(numbers), record=False)
+
+    async def worker() -> None:
+        for i in numbers:
+            await send(i, record=True)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    result.elapsed = time.perf_counter() - started
+    return result
+
+async def _cleanup(client: httpx.AsyncClient, bench: Bench) -> None:
+    # Reject the benchmark's own leaves so the next run can apply again
+    headers = bench.headers(bench.users["admin"])
+    ids = bench.created_leave_ids
+    for i in range(0, len(ids), 500):
+        await client.post(
+            f"{API}/leaves/bulk-status", headers=headers,
+            json={"ids": ids[i:i + 500], "status": "REJECTED", "manager_comment": "benchmark cleanup"},
+        )
+
+async def run(bench: Bench, names: List[str], requests: int, concurrency: int, warmup: int) -> Dict[str, Dict]:
+    transport = httpx.ASGITransport(app=app)
+    results = {}
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=60) as client:
+        try:
+            for scenario in bench.scenarios():
+                if scenario.name not in names:
+                    continue
+                result = await run_scenario(client, bench, scenario, requests, concurrency, warmup)
+                results[scenario.name] = result.summary()
+                print(_row(scenario.name, results[scenario.name]), flush=True)
+        finally:
+            await _cleanup(client, bench)
+            await async_engine.dispose()
+    return results
+
+COLUMNS = ("requests", "errors", "p50_ms", "p95_ms", "p99_ms", "rps", "queries_per_request")
+# Metric -> True when higher is better
+COMPARED = {"p50_ms": False, "p95_ms": False, "p99_ms": False, "rps": True, "queries_per_request": False}
+
+def _header() -> str:
+    return f"{'scenario':<26}" + "".join(f"{c:>20}" for c in COLUMNS)
+
+def _row(name: str, summary: Dict[str, Any]) -> str:
+    return f"{name:<26}" + "".join(f"{summary[c]:>20}" for c in COLUMNS)
+
+def compare(baseline: Dict, current: Dict, threshold: float) -> List[str]:
+    """
+    Print old -> new per metric and return the regressions beyond
+    `threshold` percent.
+    """
+    regressions = []
+    print(f"\n{'scenario':<26}{'metric':<22}{'baseline':>12}{'current':>12}{'change':>10}")
+    for name, now in current["scenarios"].items():
+        before = baseline["scenarios"].get(name)
+        if before is None:
+            print(f"{name:<26}(not in baseline)")
+            continue
+        for metric, higher_is_better in COMPARED.items():
+            old, new = before[metric], now[metric]
+            change = (new - old) / old * 100 if old else 0.0
+            worse = -change if higher_is_better else change
+            flag = ""
+            if worse > threshold:
+                flag = "  REGRESSION"
+                regressions.append(f"{name} {metric}")
+            print(f"{name:<26}{metric:<22}{old:>12}{new:>12}{change:>+9.1f}%{flag}")
+    return regressions
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_spec_arguments(parser)
+    parser.add_argument("--reseed", action="store_true", help="load the org first (drops all tables)")
+    parser.add_argument("--drop-existing", action="store_true", help="confirm that --reseed may drop all tables")
+    parser.add_argument("--requests", type=int, default=200, help="measured requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--scenarios", help="comma separated names (default: all)")
+    parser.add_argument("--save", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="diff against a JSON file written by --save")
+    parser.add_argument("--threshold", type=float, default=10.0, help="regression threshold in percent")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    spec = spec_from_args(parser, args)
+    if args.reseed and not args.drop_existing:
+        parser.error("--reseed drops every table in DATABASE_URI; pass --drop-existing to confirm")
+    if args.reseed:
+        print(f"Loading {spec} ...", flush=True)
+        started = time.perf_counter()
+        counts = load_org(spec, drop_existing=True)
+        print(f"Loaded {counts} in {time.perf_counter() - started:.1f}s", flush=True)
+
+    bench = Bench(SyntheticOrg(spec, password_hash=""))
+    available = [s.name for s in bench.scenarios()]
+    names = args.scenarios.split(",") if args.scenarios else available
+    unknown = set(names) - set(available)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}; choose from {', '.join(available)}")
+
+    print(_header(), flush=True)
+    try:
+        results = asyncio.run(run(bench, names, args.requests, args.concurrency, args.warmup))
+    finally:
+        password_hash_pool.shutdown()
+
+    report = {
+        "meta": {
+            "spec": asdict(spec),
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "warmup": args.warmup,
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        },
+        "scenarios": results,
+    }
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nSaved {args.save}")
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, report, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.threshold:g}%: {', '.join(regressions)}")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""
+Load a synthetic organisation (see orgdata.py) into DATABASE_URI, for
+benchmarks or a staging dataset.
+
+    python benchmarks/seed.py --drop-existing --users 50000 --years 5 --leaves-per-year 20 --seed 42
+
+Rows go in with COPY FROM STDIN in batches, with the secondary indexes,
+unique/exclusion constraints and foreign keys of the loaded tables
+dropped during the load and rebuilt once at the end. The same options
+always produce the same data.
+
+DESTRUCTIVE: drops and recreates every application table first, so it
+refuses to run without --drop-existing. Point DATABASE_URI at a
+throwaway database (Postgres, psycopg2 driver).
+"""
+import argparse
+import csv
+import io
+import logging
+import os
+import sys
+import time
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+from app.core.database import Base, engine
+from app.core.security import get_password_hash
+import app.models  # noqa: F401  (registers every table on Base.metadata)
+from app.models.leave import Holiday, LeaveRequest, LeaveType
+from app.models.ot import OTRequest
+from app.models.user import User
+from benchmarks.orgdata import (
+    HOLIDAY_COLUMNS, LEAVE_COLUMNS, LEAVE_TYPE_COLUMNS, OT_COLUMNS, PASSWORD, USER_COLUMNS,
+    MAX_LEAVES_PER_YEAR, OrgSpec, SyntheticOrg,
+)
+from rebuild_leave_balances import rebuild_leave_balances
+from rebuild_ot_rollups import rebuild_ot_rollups
+from rebuild_user_hierarchy import rebuild_user_hierarchy
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 50000
+# For the index and constraint builds after the load
+MAINTENANCE_WORK_MEM = "512MB"
+
+# Indexes not backing a constraint (those go with their constraint)
+_INDEXES = """
+    SELECT pg_get_indexdef(i.indexrelid), i.indexrelid::regclass::text
+    FROM pg_index i
+    WHERE i.indrelid = %s::regclass AND NOT i.indisprimary
+      AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = i.indexrelid)
+"""
+# Unique and exclusion constraints before foreign keys, which may need them
+_CONSTRAINTS = """
+    SELECT conname, pg_get_constraintdef(oid)
+    FROM pg_constraint
+    WHERE conrelid = %s::regclass AND contype IN ('u', 'x', 'f')
+    ORDER BY contype = 'f', conname
+"""
+
+def _defer_indexes(cursor, tables: Sequence[str]) -> List[str]:
+    """
+    Drop the tables' secondary indexes and non-primary-key constraints;
+    returns the statements that recreate them.
+    """
+    recreate = []
+    for table in tables:
+        cursor.execute(_CONSTRAINTS, (table,))
+        for name, definition in cursor.fetchall():
+            cursor.execute(f'ALTER TABLE {table} DROP CONSTRAINT "{name}"')
+            recreate.append(f'ALTER TABLE {table} ADD CONSTRAINT "{name}" {definition}')
+        cursor.execute(_INDEXES, (table,))
+        for definition, name in cursor.fetchall():
+            cursor.execute(f"DROP INDEX {name}")
+            recreate.insert(0, definition)
+    return recreate
+
+def _copy(cursor, table: str, columns: Sequence[str], batches: Iterable[List[Tuple]]) -> int:
+    sql = f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)"
+    count = 0
+    for batch in batches:
+        # csv writes None as an empty field (NULL) and str enums as their value
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator="\n").writerows(batch)
+        buffer.seek(0)
+        cursor.copy_expert(sql, buffer)
+        count += len(batch)
+    return count
+
+def load_org(spec: OrgSpec, batch_size: int = BATCH_SIZE, drop_existing: bool = False) -> Dict[str, int]:
+    """
+    Recreate the schema, COPY the org in and rebuild the derived tables
+    (hierarchy, balances, OT rollups). Returns the row count per table.
+    Dropping every table in DATABASE_URI must be asked for with
+    `drop_existing`.
+    """
+    if not drop_existing:
+        raise ValueError(f"load_org drops every table in {engine.url!r}; pass drop_existing=True")
+    org = SyntheticOrg(spec, get_password_hash(PASSWORD))
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    loads = (
+        (LeaveType.__table__.name, LEAVE_TYPE_COLUMNS, [org.leave_types()]),
+        (Holiday.__table__.name, HOLIDAY_COLUMNS, [org.holidays()]),
+        (User.__table__.name, USER_COLUMNS, org.users(batch_size)),
+        (LeaveRequest.__table__.name, LEAVE_COLUMNS, org.leave_requests(batch_size)),
+        (OTRequest.__table__.name, OT_COLUMNS, org.ot_requests(batch_size)),
+    )
+    counts = {}
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        cursor.execute(f"SET maintenance_work_mem = '{MAINTENANCE_WORK_MEM}'")
+        recreate = _defer_indexes(cursor, [table for table, _, _ in loads])
+
+        started = time.perf_counter()
+        for table, columns, batches in loads:
+            table_started = time.perf_counter()
+            counts[table] = _copy(cursor, table, columns, batches)
+            # Ids were explicit; move the sequence past them
+            cursor.execute(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                f"(SELECT coalesce(max(id), 0) + 1 FROM {table}), false)"
+            )
+            elapsed = time.perf_counter() - table_started
+            logger.info(f"{table}: {counts[table]} rows in {elapsed:.1f}s")
+        loaded = time.perf_counter() - started
+        total = sum(counts.values())
+        logger.info(f"Loaded {total} rows in {loaded:.1f}s ({total / loaded * 60:,.0f} rows/min)")
+
+        started = time.perf_counter()
+        for statement in recreate:
+            cursor.execute(statement)
+        logger.info(f"Rebuilt {len(recreate)} indexes and constraints in {time.perf_counter() - started:.1f}s")
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        connection.close()
+
+    rebuild_user_hierarchy()
+    rebuild_leave_balances()
+    rebuild_ot_rollups()
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("ANALYZE"))
+    return counts
+
+def add_spec_arguments(parser: argparse.ArgumentParser) -> None:
+    defaults = OrgSpec()
+    parser.add_argument("--users", type=int, default=defaults.users)
+    parser.add_argument("--fanout", type=int, default=defaults.fanout, help="direct reports per manager")
+    parser.add_argument("--years", type=int, default=defaults.years, help="years of history")
+    parser.add_argument("--leaves-per-year", type=int, default=defaults.leaves_per_year)
+    parser.add_argument("--ot-per-year", type=int, default=defaults.ot_per_year)
+    parser.add_argument("--end-year", type=int, default=defaults.end_year)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+
+def spec_from_args(parser: argparse.ArgumentParser, args: argparse.Namespace) -> OrgSpec:
+    if not 0 <= args.leaves_per_year <= MAX_LEAVES_PER_YEAR:
+        # More would leave slots too short for a leave, and leaves would overlap
+        parser.error(f"--leaves-per-year must be between 0 and {MAX_LEAVES_PER_YEAR}")
+    return OrgSpec(
+        users=args.users,
+        fanout=args.fanout,
+        years=args.years,
+        leaves_per_year=args.leaves_per_year,
+        ot_per_year=args.ot_per_year,
+        seed=args.seed,
+        end_year=args.end_year,
+    )
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_spec_arguments(parser)
+    parser.add_argument(
+        "--drop-existing", action="store_true", help="required: drop every table in DATABASE_URI first"
+    )
+    args = parser.parse_args()
+    spec = spec_from_args(parser, args)
+    if not args.drop_existing:
+        parser.error(f"this drops every table in {engine.url!r}; pass --drop-existing to confirm")
+    logging.basicConfig(level=logging.INFO)
+    load_org(spec, drop_existing=True)
+
+if __name__ == "__main__":
+    main()
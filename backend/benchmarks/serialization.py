@@ -0,0 +1,105 @@
+"""
+Serialization cost of list responses: the ORM + response_model path
+against flat rows rendered by orjson, on 100 / 1k / 10k row pages.
+
+    python benchmarks/serialization.py [--repeat 5]
+
+CPU only, no database: ORM objects are built in memory, so the time
+SQLAlchemy spends hydrating them from a result is not included here.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import namedtuple
+from datetime import date, datetime, timedelta, timezone
+from typing import Callable, List
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from app.core.responses import ORJSONResponse, rows_to_dicts
+from app.models.leave import LeaveRequest, LeaveStatus
+from app.models.user import User, UserRole
+from app.repositories.leave import ROW_COLUMNS
+from app.schemas.leave import LeaveRequest as LeaveRequestSchema
+
+SIZES = (100, 1000, 10000)
+
+adapter = TypeAdapter(List[LeaveRequestSchema])
+LeaveRow = namedtuple("LeaveRow", [c.key for c in ROW_COLUMNS])
+
+def make_data(n: int):
+    users = [
+        User(id=i, email=f"user{i}@example.com", full_name=f"User {i}", role=UserRole.EMPLOYEE)
+        for i in range(1, 51)
+    ]
+    created = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    objects, rows = [], []
+    for i in range(n):
+        user = users[i % len(users)]
+        start = date(2026, 1, 1) + timedelta(days=i % 300)
+        values = dict(
+            leave_type_id=1 + i % 4,
+            start_date=start,
+            end_date=start + timedelta(days=2),
+            reason="Family event" if i % 3 else None,
+            id=i + 1,
+            user_id=user.id,
+            total_days=3.0,
+            status=(LeaveStatus.APPROVED, LeaveStatus.PENDING, LeaveStatus.REJECTED)[i % 3],
+            manager_comment=None,
+            created_at=created + timedelta(minutes=i),
+            updated_at=created + timedelta(minutes=i, seconds=30),
+        )
+        objects.append(LeaveRequest(user=user, **values))
+        rows.append(LeaveRow(*values.values(), user.id, user.full_name, user.email))
+    return objects, rows
+
+def response_model_path(objects, rows) -> bytes:
+    # What FastAPI does for `response_model=List[LeaveRequest]`
+    return adapter.dump_json(adapter.validate_python(objects, from_attributes=True))
+
+def stdlib_encoder_path(objects, rows) -> bytes:
+    # Older FastAPI: validate, encode to plain Python, then json.dumps
+    value = adapter.validate_python(objects, from_attributes=True)
+    return json.dumps(jsonable_encoder(value)).encode()
+
+def rows_orjson_path(objects, rows) -> bytes:
+    return ORJSONResponse(rows_to_dicts(rows)).body
+
+PATHS = {
+    "response_model": response_model_path,
+    "stdlib_encoder": stdlib_encoder_path,
+    "rows_orjson": rows_orjson_path,
+}
+
+def best_of(fn: Callable, repeat: int, *args) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'rows':>6}  " + "  ".join(f"{name:>16}" for name in PATHS) + "  speedup")
+    for n in SIZES:
+        objects, rows = make_data(n)
+        # All paths must produce the same document
+        expected = json.loads(response_model_path(objects, rows))
+        for name, fn in PATHS.items():
+            if json.loads(fn(objects, rows)) != expected:
+                raise SystemExit(f"{name} output differs from response_model at {n} rows")
+        timings = {name: best_of(fn, args.repeat, objects, rows) for name, fn in PATHS.items()}
+        speedup = timings["response_model"] / timings["rows_orjson"]
+        print(f"{n:>6}  " + "  ".join(f"{t * 1000:>13.2f} ms" for t in timings.values()) + f"  {speedup:>6.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -28,7 +28,11 @@ def fix_constraints():
         
         # 6. Ensure leave_type_id in leave_requests is CASCADE (optional, but good for consistency)
         "ALTER TABLE leave_requests DROP CONSTRAINT IF EXISTS fk_leave_type",
-        "ALTER TABLE leave_requests ADD CONSTRAINT fk_leave_type FOREIGN KEY (leave_type_id) REFERENCES leave_types(id) ON DELETE CASCADE"
+        "ALTER TABLE leave_requests ADD CONSTRAINT fk_leave_type FOREIGN KEY (leave_type_id) REFERENCES leave_types(id) ON DELETE CASCADE",
+
+        # 7. Audit entries outlive the user who acted (user_id becomes NULL)
+        "ALTER TABLE audit_logs DROP CONSTRAINT IF EXISTS fk_audit_user",
+        "ALTER TABLE audit_logs ADD CONSTRAINT fk_audit_user FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE SET NULL"
     ]
     
     try:
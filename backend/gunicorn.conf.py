@@ -0,0 +1,27 @@
+"""
+gunicorn settings picked up from the working directory (render.yaml
+starts gunicorn from backend/).
+
+Sets up prometheus_client multiprocess mode: every worker writes its
+metrics to files in PROMETHEUS_MULTIPROC_DIR, and /metrics sums them
+over all workers, so any worker can answer a scrape.
+"""
+import os
+import shutil
+import tempfile
+
+# Set in the master before workers start and import prometheus_client
+multiproc_dir = os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "dexsini_prometheus")
+)
+
+def on_starting(server):
+    # Files left by a previous run would be summed into the new one's
+    shutil.rmtree(multiproc_dir, ignore_errors=True)
+    os.makedirs(multiproc_dir, exist_ok=True)
+
+def child_exit(server, worker):
+    # Drops the dead worker's live gauges (requests in progress); its
+    # counters and histograms stay and keep counting in the totals
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
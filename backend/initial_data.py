@@ -3,6 +3,7 @@ import sys
 from app.core.database import SessionLocal
 from app.core.security import get_password_hash
 from app.models.user import User, UserRole
+from app.repositories.hierarchy import hierarchy_repository
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -20,6 +21,8 @@ def init_db() -> None:
                 is_active=True,
             )
             db.add(user)
+            db.flush()
+            hierarchy_repository.link_users(db, [user.id])
             db.commit()
             logger.info("Admin user created: admin@dexsini.com / Admin@123")
         else:
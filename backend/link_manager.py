@@ -1,5 +1,6 @@
 from app.core.database import SessionLocal
 from sqlalchemy import text
+from app.repositories.hierarchy import hierarchy_repository
 
 def link_users():
     db = SessionLocal()
@@ -12,6 +13,7 @@ def link_users():
         
         # SQL Update
         db.execute(text("UPDATE users SET manager_id = 1 WHERE id = 3;"))
+        hierarchy_repository.move(db, 3, 1)
         db.commit()
         
         print("✅ Success! User 3 now reports to User 1.")
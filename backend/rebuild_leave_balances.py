@@ -0,0 +1,72 @@
+import logging
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from collections import defaultdict
+from sqlalchemy import select, delete
+from app.core.database import SessionLocal
+from app.models.leave import LeaveRequest, LeaveType, LeaveBalance, LeaveStatus, Holiday
+from app.repositories.balance import PENDING_STATUSES
+from app.services.working_days import build_calendar, days_by_year
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def rebuild_leave_balances() -> None:
+    """
+    Rebuild the leave_balances ledger from leave_requests, for the initial
+    backfill or to repair drift. A leave crossing a year end is split by
+    its working days in each year, as the ledger does. Years are processed
+    in order so each one can carry forward from the rebuilt year before it.
+    """
+    db = SessionLocal()
+    try:
+        requests = db.execute(
+            select(
+                LeaveRequest.user_id, LeaveRequest.leave_type_id, LeaveRequest.start_date,
+                LeaveRequest.end_date, LeaveRequest.total_days, LeaveRequest.status,
+            )
+            .where(LeaveRequest.status.in_((LeaveStatus.APPROVED,) + PENDING_STATUSES))
+        ).all()
+        leave_types = {t.id: t for t in db.query(LeaveType).all()}
+        calendar = None
+        if requests:
+            calendar = build_calendar(
+                db.query(Holiday).all(),
+                min(r.start_date.year for r in requests),
+                max(r.end_date.year for r in requests),
+            )
+        # (used, pending) per (user, type, year)
+        totals = defaultdict(lambda: [0.0, 0.0])
+        for r in requests:
+            for year, days in days_by_year(calendar, r.start_date, r.end_date, r.total_days):
+                index = 0 if r.status == LeaveStatus.APPROVED else 1
+                totals[(r.user_id, r.leave_type_id, year)][index] += days
+
+        db.execute(delete(LeaveBalance))
+        # Remaining days per (user, type) at the end of the last rebuilt year
+        remaining = {}
+        for (user_id, leave_type_id, year), (used, pending) in sorted(totals.items(), key=lambda item: item[0][2]):
+            leave_type = leave_types[leave_type_id]
+            key = (user_id, leave_type_id)
+            carried = 0.0
+            if leave_type.carry_forward and key in remaining and remaining[key][0] == year - 1:
+                carried = max(remaining[key][1], 0.0)
+            allotted = float(leave_type.default_days_per_year)
+            db.add(LeaveBalance(
+                user_id=user_id, leave_type_id=leave_type_id, year=year,
+                allotted_days=allotted, carried_forward_days=carried,
+                used_days=used, pending_days=pending,
+            ))
+            remaining[key] = (year, allotted + carried - used - pending)
+        db.commit()
+        logger.info(f"Rebuilt {len(totals)} leave balance rows")
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error rebuilding leave balances: {e}")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    rebuild_leave_balances()
@@ -0,0 +1,64 @@
+import logging
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import select, delete, insert, func, Date
+from app.core.database import SessionLocal
+from app.models.ot import OTRequest, OTMonthlyRollup, OTStatus
+from app.models.user import User
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Users per batch; each batch replaces those users' rollup rows in one transaction
+BATCH_SIZE = 1000
+
+def rebuild_ot_rollups() -> None:
+    """
+    Rebuild ot_monthly_rollups from overtime_requests, for the initial
+    backfill or to repair drift. Best run while OT requests are not being
+    actioned: a change committed during a user's batch may be missed.
+    """
+    db = SessionLocal()
+    try:
+        month = func.cast(func.date_trunc("month", OTRequest.ot_date), Date)
+        is_approved = OTRequest.status == OTStatus.APPROVED
+        is_pending = OTRequest.status == OTStatus.PENDING
+        last_id, written = 0, 0
+        while True:
+            user_ids = db.scalars(
+                select(User.id).where(User.id > last_id).order_by(User.id).limit(BATCH_SIZE)
+            ).all()
+            if not user_ids:
+                break
+
+            totals = select(
+                OTRequest.user_id,
+                month,
+                func.coalesce(func.sum(OTRequest.total_hours).filter(is_approved), 0.0),
+                func.coalesce(func.sum(OTRequest.total_hours).filter(is_pending), 0.0),
+                func.count().filter(is_approved),
+                func.count().filter(is_pending),
+            ).where(
+                OTRequest.user_id.in_(user_ids),
+                OTRequest.status.in_([OTStatus.APPROVED, OTStatus.PENDING]),
+            ).group_by(OTRequest.user_id, month)
+
+            db.execute(delete(OTMonthlyRollup).where(OTMonthlyRollup.user_id.in_(user_ids)))
+            result = db.execute(insert(OTMonthlyRollup).from_select(
+                ["user_id", "month", "approved_hours", "pending_hours", "approved_count", "pending_count"],
+                totals,
+            ))
+            db.commit()
+            written += result.rowcount
+            last_id = user_ids[-1]
+            logger.info(f"Processed users up to id {last_id}, {written} rollup rows written")
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error rebuilding OT rollups: {e}")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    rebuild_ot_rollups()
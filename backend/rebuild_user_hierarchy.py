@@ -0,0 +1,46 @@
+import logging
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import select, delete
+from app.core.database import SessionLocal
+from app.models.user import User, UserHierarchy
+from app.repositories.hierarchy import hierarchy_repository
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Users per batch; each batch walks its users' manager chains in one statement
+BATCH_SIZE = 1000
+
+def rebuild_user_hierarchy() -> None:
+    """
+    Rebuild user_hierarchy from users.manager_id, for the initial backfill
+    or after manager_id was changed outside the app. Runs as one
+    transaction, so readers keep seeing the old tree until it commits.
+    """
+    db = SessionLocal()
+    try:
+        db.execute(delete(UserHierarchy))
+        last_id, linked = 0, 0
+        while True:
+            user_ids = db.scalars(
+                select(User.id).where(User.id > last_id).order_by(User.id).limit(BATCH_SIZE)
+            ).all()
+            if not user_ids:
+                break
+            hierarchy_repository.link_users(db, user_ids)
+            linked += len(user_ids)
+            last_id = user_ids[-1]
+            logger.info(f"Linked {linked} users")
+        db.commit()
+        logger.info("User hierarchy rebuilt")
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error rebuilding user hierarchy: {e}")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    rebuild_user_hierarchy()
@@ -0,0 +1,72 @@
+import logging
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import select, update, func, bindparam
+from app.core.database import SessionLocal
+from app.models.leave import LeaveRequest, Holiday
+from app.services.working_days import build_calendar
+from rebuild_leave_balances import rebuild_leave_balances
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 5000
+
+def recompute_leave_days() -> None:
+    """
+    Recompute total_days for every leave request as working days, for rows
+    created before apply_leave stopped counting weekends and holidays, then
+    rebuild the leave_balances ledger, which sums total_days.
+    """
+    db = SessionLocal()
+    try:
+        first, last = db.execute(
+            select(func.min(LeaveRequest.start_date), func.max(LeaveRequest.end_date))
+        ).one()
+        if first is None:
+            logger.info("No leave requests found.")
+            return
+        calendar = build_calendar(db.query(Holiday).all(), first.year, last.year)
+
+        stmt = (
+            update(LeaveRequest.__table__)
+            .where(LeaveRequest.__table__.c.id == bindparam("row_id"))
+            .values(total_days=bindparam("new_days"))
+        )
+        last_id, changed = 0, 0
+        while True:
+            rows = db.execute(
+                select(LeaveRequest.id, LeaveRequest.start_date, LeaveRequest.end_date, LeaveRequest.total_days)
+                .where(LeaveRequest.id > last_id)
+                .order_by(LeaveRequest.id)
+                .limit(BATCH_SIZE)
+            ).all()
+            if not rows:
+                break
+            days = calendar.working_days_many((r.start_date, r.end_date) for r in rows)
+            params = [
+                {"row_id": r.id, "new_days": float(d)}
+                for r, d in zip(rows, days)
+                if d != r.total_days
+            ]
+            if params:
+                db.execute(stmt, params)
+                db.commit()
+            changed += len(params)
+            last_id = rows[-1].id
+            logger.info(f"Processed up to id {last_id}, {changed} rows updated")
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error recomputing leave days: {e}")
+        return
+    finally:
+        db.close()
+    if changed:
+        # Used and pending days, and what carries forward from them, are
+        # stale for every affected user and year
+        rebuild_leave_balances()
+
+if __name__ == "__main__":
+    recompute_leave_days()
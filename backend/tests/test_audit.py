@@ -0,0 +1,80 @@
+import asyncio
+import threading
+import time
+
+from sqlalchemy import select
+
+from app.core.audit import AuditWriter, audit_writer
+from app.models.audit import AuditAction, AuditEntity, AuditLog
+
+def logged(db, actor_id):
+    db.expire_all()
+    return db.execute(
+        select(AuditLog.action, AuditLog.entity, AuditLog.entity_id)
+        .where(AuditLog.user_id == actor_id)
+        .order_by(AuditLog.id)
+    ).all()
+
+def test_events_are_written_in_batches(db, make_user):
+    actor = make_user("ADMIN")
+    writer = AuditWriter(max_queue=100, batch_size=3, flush_interval=0.05, enqueue_timeout=1.0)
+    writer.collect(db, actor.id, AuditAction.USER_UPDATED, AuditEntity.USER, list(range(1, 8)))
+    asyncio.run(writer.publish(db))
+    writer.shutdown()
+
+    assert writer.stats()["written"] == 7
+    assert writer.stats()["batches"] == 3
+    assert [r.entity_id for r in logged(db, actor.id)] == list(range(1, 8))
+
+def test_full_queue_drops_after_one_deadline_without_blocking_the_loop(db, make_user):
+    actor = make_user("ADMIN")
+    writer = AuditWriter(max_queue=2, batch_size=1, flush_interval=0.05, enqueue_timeout=0.3)
+    # Stall the database side so the queue fills up
+    release = threading.Event()
+    write = writer._write
+    writer._write = lambda batch: (release.wait(), write(batch))
+
+    async def publish_while_ticking():
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticker = asyncio.create_task(tick())
+        started = time.monotonic()
+        writer.collect(db, actor.id, AuditAction.USER_CREATED, AuditEntity.USER, list(range(10)))
+        await writer.publish(db)
+        elapsed = time.monotonic() - started
+        ticker.cancel()
+        return elapsed, ticks
+
+    elapsed, ticks = asyncio.run(publish_while_ticking())
+    # One deadline for all the events, and the loop kept running meanwhile
+    assert elapsed < 1.0
+    assert ticks >= 10
+    dropped = writer.stats()["dropped"]
+    # One event is held by the stalled writer, two wait in the queue
+    assert dropped == 7
+
+    release.set()
+    writer.shutdown()
+    assert writer.stats()["written"] == 10 - dropped
+
+def test_status_changes_are_audited(client, db, make_user, auth, leave_type):
+    manager = make_user("MANAGER")
+    employee = make_user(manager=manager)
+    r = client.post("/api/v1/leaves/", headers=auth(employee), json={
+        "leave_type_id": leave_type.id, "start_date": "2038-03-01", "end_date": "2038-03-02",
+    })
+    leave_id = r.json()["id"]
+    client.put(f"/api/v1/leaves/{leave_id}", headers=auth(manager), json={"status": "APPROVED"})
+    client.post("/api/v1/leaves/bulk-status", headers=auth(manager), json={"ids": [leave_id], "status": "REJECTED"})
+    audit_writer.shutdown()
+
+    assert logged(db, manager.id) == [
+        (AuditAction.LEAVE_APPROVED, AuditEntity.LEAVE_REQUEST, leave_id),
+        (AuditAction.LEAVE_REJECTED, AuditEntity.LEAVE_REQUEST, leave_id),
+    ]
@@ -0,0 +1,58 @@
+from datetime import date
+
+YEAR = 2034
+
+def stats(client, headers, depth="direct"):
+    r = client.get(f"/api/v1/dashboard/stats?depth={depth}", headers=headers)
+    assert r.status_code == 200, r.text
+    return r.json()
+
+def test_writes_invalidate_the_managers_counters(client, make_user, auth, leave_type):
+    manager = make_user("MANAGER")
+    employee = make_user(manager=manager)
+    assert stats(client, auth(manager))["total_employees"] == 1
+
+    # Served from the cache until a write in this scope
+    make_user(manager=manager)
+    assert stats(client, auth(manager))["total_employees"] == 1
+
+    r = client.post("/api/v1/leaves/", headers=auth(employee), json={
+        "leave_type_id": leave_type.id, "start_date": f"{YEAR}-03-01", "end_date": f"{YEAR}-03-01",
+    })
+    assert r.status_code == 200, r.text
+    counters = stats(client, auth(manager))
+    assert (counters["total_employees"], counters["pending_leaves"]) == (2, 1)
+
+    client.put(f"/api/v1/leaves/{r.json()['id']}", headers=auth(manager), json={"status": "APPROVED"})
+    assert stats(client, auth(manager))["pending_leaves"] == 0
+
+    today = date.today().isoformat()
+    r = client.post("/api/v1/ot/", headers=auth(employee), json={
+        "ot_date": today, "start_time": "18:00:00", "end_time": "20:00:00", "reason": "release",
+    })
+    assert r.status_code == 200, r.text
+    assert stats(client, auth(manager))["pending_ot"] == 1
+
+def test_scopes_are_cached_separately(client, make_user, auth):
+    first = make_user("MANAGER")
+    second = make_user("MANAGER")
+    make_user(manager=first)
+    assert stats(client, auth(first))["total_employees"] == 1
+    assert stats(client, auth(second))["total_employees"] == 0
+
+def test_writes_below_a_manager_invalidate_their_subtree_counters(client, make_user, auth, leave_type):
+    director = make_user("MANAGER")
+    manager = make_user("MANAGER", manager=director)
+    employee = make_user(manager=manager)
+    assert stats(client, auth(director))["total_employees"] == 1
+    assert stats(client, auth(director), "all")["total_employees"] == 2
+
+    r = client.post("/api/v1/leaves/", headers=auth(employee), json={
+        "leave_type_id": leave_type.id, "start_date": f"{YEAR}-04-03", "end_date": f"{YEAR}-04-03",
+    })
+    assert r.status_code == 200, r.text
+    assert stats(client, auth(director), "all")["pending_leaves"] == 1
+
+    client.put(f"/api/v1/leaves/{r.json()['id']}", headers=auth(manager), json={"status": "APPROVED"})
+    assert stats(client, auth(director), "all")["pending_leaves"] == 0
+    assert stats(client, auth(director))["pending_leaves"] == 0
@@ -0,0 +1,178 @@
+import json
+import threading
+
+from sqlalchemy import delete, select
+
+from app.models.user import User, UserHierarchy
+from app.repositories.hierarchy import reports_filter
+
+YEAR = 2033
+
+def expected_paths(db, user_ids):
+    """
+    The closure rows for `user_ids`, derived by walking users.manager_id.
+    """
+    managers = dict(db.execute(select(User.id, User.manager_id)).all())
+    paths = set()
+    for user_id in user_ids:
+        current, depth = user_id, 0
+        while current is not None:
+            paths.add((current, user_id, depth))
+            current, depth = managers[current], depth + 1
+    return paths
+
+def stored_paths(db, user_ids):
+    return set(db.execute(
+        select(UserHierarchy.ancestor_id, UserHierarchy.descendant_id, UserHierarchy.depth)
+        .where(UserHierarchy.descendant_id.in_(user_ids))
+    ).all())
+
+def build_tree(make_user):
+    # director > manager > employee, and a second manager with no reports
+    director = make_user("MANAGER")
+    manager = make_user("MANAGER", manager=director)
+    employee = make_user(manager=manager)
+    other = make_user("MANAGER")
+    return director, manager, employee, other
+
+def test_closure_follows_create_move_and_delete(client, db, make_user, auth):
+    admin = make_user("ADMIN")
+    director, manager, employee, other = build_tree(make_user)
+    ids = [director.id, manager.id, employee.id, other.id]
+
+    r = client.post("/api/v1/users/", headers=auth(admin), json={
+        "email": "hierarchy-new@example.com", "full_name": "New", "password": "pw", "manager_id": employee.id,
+    })
+    assert r.status_code == 200, r.text
+    ids.append(r.json()["id"])
+    db.expire_all()
+    assert stored_paths(db, ids) == expected_paths(db, ids)
+
+    # Moving a manager moves their whole subtree
+    r = client.put(f"/api/v1/users/{manager.id}", headers=auth(admin), json={"manager_id": other.id})
+    assert r.status_code == 200, r.text
+    db.expire_all()
+    assert stored_paths(db, ids) == expected_paths(db, ids)
+
+    # Under one's own report would be a cycle
+    r = client.put(f"/api/v1/users/{manager.id}", headers=auth(admin), json={"manager_id": employee.id})
+    assert r.status_code == 400
+
+    # Deleting a manager makes their reports roots
+    assert client.delete(f"/api/v1/users/{other.id}", headers=auth(admin)).status_code == 200
+    ids.remove(other.id)
+    db.expire_all()
+    assert stored_paths(db, ids) == expected_paths(db, ids)
+
+def test_reports_filter_depth(db, make_user):
+    director, manager, employee, _ = build_tree(make_user)
+
+    def team(depth):
+        return set(db.scalars(select(User.id).where(reports_filter(User.id, director.id, depth))))
+
+    assert team("direct") == {manager.id}
+    assert team("all") == {manager.id, employee.id}
+
+def test_indirect_reports_can_be_actioned(client, make_user, auth, leave_type):
+    director, manager, employee, other = build_tree(make_user)
+    outsider = make_user(manager=other)
+    leaves = [
+        client.post("/api/v1/leaves/", headers=auth(user), json={
+            "leave_type_id": leave_type.id, "start_date": f"{YEAR}-03-0{day}", "end_date": f"{YEAR}-03-0{day}",
+        }).json()["id"]
+        for user, day in ((employee, 1), (employee, 2), (outsider, 1), (manager, 3))
+    ]
+    mine, bulk, outside, managers_own = leaves
+
+    listed = client.get("/api/v1/leaves/approvals?depth=all", headers=auth(director)).json()
+    assert {leave["id"] for leave in listed} == {mine, bulk, managers_own}
+
+    r = client.put(f"/api/v1/leaves/{mine}", headers=auth(director), json={"status": "APPROVED"})
+    assert r.status_code == 200, r.text
+    r = client.put(f"/api/v1/leaves/{outside}", headers=auth(director), json={"status": "APPROVED"})
+    assert r.status_code == 403
+    # A manager never actions their own request
+    r = client.put(f"/api/v1/leaves/{managers_own}", headers=auth(manager), json={"status": "APPROVED"})
+    assert r.status_code == 403
+
+    r = client.post(
+        "/api/v1/leaves/bulk-status", headers=auth(director), json={"ids": [bulk, outside], "status": "APPROVED"}
+    )
+    assert r.json() == {
+        "updated": [bulk],
+        "skipped": [{"id": outside, "detail": "Not authorized to action this request."}],
+    }
+
+def test_direct_reports_do_not_need_closure_rows(client, db, make_user, auth, leave_type):
+    # As before rebuild_user_hierarchy.py has backfilled existing users
+    manager = make_user("MANAGER")
+    employee = make_user(manager=manager)
+    db.execute(delete(UserHierarchy).where(UserHierarchy.descendant_id == employee.id))
+    db.commit()
+    ids = [
+        client.post("/api/v1/leaves/", headers=auth(employee), json={
+            "leave_type_id": leave_type.id, "start_date": f"{YEAR}-05-0{day}", "end_date": f"{YEAR}-05-0{day}",
+        }).json()["id"]
+        for day in (2, 3)
+    ]
+    r = client.put(f"/api/v1/leaves/{ids[0]}", headers=auth(manager), json={"status": "APPROVED"})
+    assert r.status_code == 200, r.text
+    r = client.post("/api/v1/leaves/bulk-status", headers=auth(manager), json={"ids": ids[1:], "status": "APPROVED"})
+    assert r.json() == {"updated": ids[1:], "skipped": []}
+
+def test_team_views_take_a_depth(client, make_user, auth, leave_type):
+    director, manager, employee, _ = build_tree(make_user)
+    r = client.post("/api/v1/leaves/", headers=auth(employee), json={
+        "leave_type_id": leave_type.id, "start_date": f"{YEAR}-06-01", "end_date": f"{YEAR}-06-01",
+    })
+    leave_id = r.json()["id"]
+    client.put(f"/api/v1/leaves/{leave_id}", headers=auth(manager), json={"status": "APPROVED"})
+
+    def calendar(depth):
+        r = client.get(
+            f"/api/v1/leaves/calendar?start={YEAR}-06-01&end={YEAR}-06-30&depth={depth}", headers=auth(director)
+        )
+        assert r.status_code == 200, r.text
+        return [leave["id"] for leave in r.json()]
+
+    assert calendar("direct") == []
+    assert calendar("all") == [leave_id]
+
+    def exported(depth):
+        r = client.get(f"/api/v1/leaves/export?format=ndjson&depth={depth}", headers=auth(director))
+        assert r.status_code == 200, r.text
+        return [json.loads(line)["id"] for line in r.text.splitlines()]
+
+    assert leave_id not in exported("direct")
+    assert leave_id in exported("all")
+
+def test_concurrent_moves_cannot_form_a_cycle(db, make_user):
+    from app.core.database import SessionLocal
+    from app.repositories.hierarchy import HierarchyCycle
+    from app.repositories.user import user_repository
+    from app.schemas.user import UserUpdate
+
+    ids = [make_user("MANAGER").id, make_user("MANAGER").id]
+    barrier = threading.Barrier(2, timeout=10)
+    cycles = []
+
+    def move(user_id, manager_id):
+        session = SessionLocal()
+        try:
+            obj = session.get(User, user_id)
+            barrier.wait()
+            user_repository.update(session, db_obj=obj, obj_in=UserUpdate(manager_id=manager_id))
+        except HierarchyCycle:
+            cycles.append(user_id)
+        finally:
+            session.close()
+
+    # Each under the other: one of the two must see the other's move
+    threads = [threading.Thread(target=move, args=pair) for pair in (ids, ids[::-1])]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(cycles) == 1
+    db.expire_all()
+    assert stored_paths(db, ids) == expected_paths(db, ids)
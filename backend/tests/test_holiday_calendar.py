@@ -0,0 +1,64 @@
+from datetime import date
+
+from app.models.leave import HolidayType
+from app.services.holiday_calendar import HolidayOccurrence, occurrences_in_year
+
+def occurrence(day, recurring=True, holiday_id=1):
+    return HolidayOccurrence(day, holiday_id, "Holiday", HolidayType.PUBLIC, recurring)
+
+def test_recurring_holidays_start_in_their_year():
+    holiday = occurrence(date(2030, 3, 17))
+    assert occurrences_in_year([holiday], 2029) == []
+    assert [o.date for o in occurrences_in_year([holiday], 2030)] == [date(2030, 3, 17)]
+    assert [o.date for o in occurrences_in_year([holiday], 2045)] == [date(2045, 3, 17)]
+
+def test_leap_day_and_one_off_precedence():
+    leap = occurrence(date(2028, 2, 29))
+    assert occurrences_in_year([leap], 2029) == []
+    assert [o.date for o in occurrences_in_year([leap], 2032)] == [date(2032, 2, 29)]
+
+    one_off = occurrence(date(2031, 3, 17), recurring=False, holiday_id=2)
+    found = occurrences_in_year([occurrence(date(2030, 3, 17)), one_off], 2031)
+    assert [o.holiday_id for o in found] == [2]
+
+def test_new_holiday_changes_leave_length_at_once(client, make_user, auth, leave_type):
+    admin = make_user("ADMIN")
+    employee = make_user()
+
+    def days(start, end):
+        r = client.post("/api/v1/leaves/", headers=auth(employee), json={
+            "leave_type_id": leave_type.id, "start_date": start, "end_date": end,
+        })
+        assert r.status_code == 200, r.text
+        return r.json()["total_days"]
+
+    # Warm the cached calendars for the years involved
+    assert days("2035-01-08", "2035-01-10") == 3
+    r = client.post("/api/v1/leaves/holidays", headers=auth(admin), json={
+        "name": "Founders Day", "date": "2036-01-15", "type": "PUBLIC", "is_recurring": True,
+    })
+    assert r.status_code == 200, r.text
+
+    # Tuesday 15 Jan 2036 is now off; 2035 is before the holiday existed
+    assert days("2036-01-14", "2036-01-16") == 2
+    assert days("2035-01-15", "2035-01-17") == 3
+    assert days("2037-01-14", "2037-01-16") == 2
+
+    calendar = client.get(
+        "/api/v1/leaves/holidays/calendar?start_year=2035&end_year=2037", headers=auth(employee)
+    ).json()
+    assert [h["date"] for h in calendar if h["name"] == "Founders Day"] == ["2036-01-15", "2037-01-15"]
+
+def test_one_off_on_a_recurring_day_is_allowed(client, make_user, auth):
+    admin = make_user("ADMIN")
+
+    def create(day, recurring):
+        return client.post("/api/v1/leaves/holidays", headers=auth(admin), json={
+            "name": "Harvest Day", "date": day, "type": "PUBLIC", "is_recurring": recurring,
+        })
+
+    assert create("2039-08-16", True).status_code == 200
+    assert create("2040-08-16", False).status_code == 200
+    r = create("2040-08-16", False)
+    assert r.status_code == 400
+    assert r.json()["detail"] == "2040-08-16 is already a holiday"
@@ -0,0 +1,122 @@
+import threading
+
+from app.models.leave import LeaveRequest
+from app.repositories.leave import leave_repository
+from app.schemas.leave import LeaveRequestUpdate
+
+YEAR = 2031
+
+def balance(client, headers, leave_type, year=YEAR):
+    balances = client.get(f"/api/v1/leaves/balances?year={year}", headers=headers).json()
+    return next(b for b in balances if b["leave_type_id"] == leave_type.id)
+
+def apply(client, headers, leave_type, start, end):
+    r = client.post(
+        "/api/v1/leaves/", headers=headers,
+        json={"leave_type_id": leave_type.id, "start_date": start, "end_date": end},
+    )
+    assert r.status_code == 200, r.text
+    return r.json()
+
+def test_transitions_move_days_between_pending_and_used(client, make_user, auth, leave_type):
+    manager = make_user("MANAGER")
+    employee = make_user(manager=manager)
+    # Mon..Fri and the following Mon: 6 working days
+    leave = apply(client, auth(employee), leave_type, f"{YEAR}-03-03", f"{YEAR}-03-10")
+    assert leave["total_days"] == 6
+    b = balance(client, auth(employee), leave_type)
+    assert (b["used_days"], b["pending_days"], b["available_days"]) == (0, 6, 14)
+
+    r = client.put(f"/api/v1/leaves/{leave['id']}", headers=auth(manager), json={"status": "APPROVED"})
+    assert r.status_code == 200, r.text
+    b = balance(client, auth(employee), leave_type)
+    assert (b["used_days"], b["pending_days"], b["available_days"]) == (6, 0, 14)
+
+    r = client.put(f"/api/v1/leaves/{leave['id']}", headers=auth(manager), json={"status": "REJECTED"})
+    assert r.status_code == 200, r.text
+    b = balance(client, auth(employee), leave_type)
+    assert (b["used_days"], b["pending_days"], b["available_days"]) == (0, 0, 20)
+
+def test_bulk_transitions(client, make_user, auth, leave_type):
+    manager = make_user("MANAGER")
+    employee = make_user(manager=manager)
+    ids = [
+        apply(client, auth(employee), leave_type, f"{YEAR}-04-0{day}", f"{YEAR}-04-0{day}")["id"]
+        for day in (7, 8, 9)
+    ]
+    r = client.post(
+        "/api/v1/leaves/bulk-status", headers=auth(manager), json={"ids": ids[:2], "status": "APPROVED"}
+    )
+    assert r.json()["updated"] == ids[:2]
+    b = balance(client, auth(employee), leave_type)
+    assert (b["used_days"], b["pending_days"]) == (2, 1)
+
+def test_concurrent_approvals_count_once(client, make_user, auth, leave_type):
+    from app.core.database import SessionLocal
+
+    manager = make_user("MANAGER")
+    employee = make_user(manager=manager)
+    leave = apply(client, auth(employee), leave_type, f"{YEAR}-05-05", f"{YEAR}-05-07")
+    barrier = threading.Barrier(2)
+
+    def approve():
+        db = SessionLocal()
+        try:
+            # Both load the request while it is still PENDING
+            obj = db.get(LeaveRequest, leave["id"])
+            barrier.wait()
+            leave_repository.update_leave_status(db, obj, LeaveRequestUpdate(status="APPROVED"), approver_id=manager.id)
+        finally:
+            db.close()
+
+    threads = [threading.Thread(target=approve) for _ in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    b = balance(client, auth(employee), leave_type)
+    assert (b["used_days"], b["pending_days"]) == (3, 0)
+
+def test_prior_year_changes_reach_the_carry_over(client, db, make_user, auth, leave_type):
+    manager = make_user("MANAGER")
+    employee = make_user(manager=manager)
+    leave_type.carry_forward = True
+    db.commit()
+    approved = apply(client, auth(employee), leave_type, f"{YEAR}-06-02", f"{YEAR}-06-04")
+    rejected = apply(client, auth(employee), leave_type, f"{YEAR}-06-09", f"{YEAR}-06-10")
+    # Pending days are not carried; before any request next year the
+    # carry-over is read from this year's row
+    b = balance(client, auth(employee), leave_type, YEAR + 1)
+    assert (b["carried_forward_days"], b["available_days"]) == (15, 35)
+
+    apply(client, auth(employee), leave_type, f"{YEAR + 1}-02-03", f"{YEAR + 1}-02-03")
+    for leave, status in ((approved, "APPROVED"), (rejected, "REJECTED")):
+        r = client.put(f"/api/v1/leaves/{leave['id']}", headers=auth(manager), json={"status": status})
+        assert r.status_code == 200, r.text
+    b = balance(client, auth(employee), leave_type, YEAR + 1)
+    assert (b["carried_forward_days"], b["pending_days"], b["available_days"]) == (17, 1, 36)
+
+def test_leave_across_a_year_end_is_charged_to_both_years(client, make_user, auth, leave_type):
+    manager = make_user("MANAGER")
+    employee = make_user(manager=manager)
+    # Mon 29 Dec .. Mon 5 Jan: 3 working days in each year
+    leave = apply(client, auth(employee), leave_type, f"{YEAR}-12-29", f"{YEAR + 1}-01-05")
+    assert leave["total_days"] == 6
+    client.put(f"/api/v1/leaves/{leave['id']}", headers=auth(manager), json={"status": "APPROVED"})
+    for year in (YEAR, YEAR + 1):
+        b = balance(client, auth(employee), leave_type, year)
+        assert (b["used_days"], b["pending_days"]) == (3, 0)
+
+
+def test_each_year_of_a_leave_is_checked_against_its_balance(client, make_user, auth, leave_type, monkeypatch):
+    from app.core.config import settings
+    monkeypatch.setattr(settings, "ENFORCE_LEAVE_BALANCE", True)
+    employee = make_user()
+    # 17 days, leaving 3 for the year
+    apply(client, auth(employee), leave_type, f"{YEAR + 1}-02-02", f"{YEAR + 1}-02-24")
+    # 8 working days before the year end, 5 after
+    r = client.post("/api/v1/leaves/", headers=auth(employee), json={
+        "leave_type_id": leave_type.id, "start_date": f"{YEAR}-12-22", "end_date": f"{YEAR + 1}-01-07",
+    })
+    assert r.status_code == 400
+    assert r.json()["detail"] == f"Insufficient leave balance for {YEAR + 1}: 3 day(s) available"
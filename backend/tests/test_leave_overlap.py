@@ -0,0 +1,38 @@
+YEAR = 2032
+
+def apply(client, headers, leave_type, start, end):
+    return client.post(
+        "/api/v1/leaves/", headers=headers,
+        json={"leave_type_id": leave_type.id, "start_date": start, "end_date": end},
+    )
+
+def test_overlapping_application_is_a_conflict(client, make_user, auth, leave_type):
+    employee = make_user(manager=make_user("MANAGER"))
+    first = apply(client, auth(employee), leave_type, f"{YEAR}-03-01", f"{YEAR}-03-05").json()
+
+    r = apply(client, auth(employee), leave_type, f"{YEAR}-03-05", f"{YEAR}-03-09")
+    assert r.status_code == 409
+    assert r.json()["detail"]["conflicting_ids"] == [first["id"]]
+
+    # Adjacent is fine, and so is someone else on the same days
+    assert apply(client, auth(employee), leave_type, f"{YEAR}-03-08", f"{YEAR}-03-09").status_code == 200
+    other = make_user()
+    assert apply(client, auth(other), leave_type, f"{YEAR}-03-01", f"{YEAR}-03-05").status_code == 200
+
+def test_rejected_leave_frees_its_dates(client, make_user, auth, leave_type):
+    manager = make_user("MANAGER")
+    employee = make_user(manager=manager)
+    first = apply(client, auth(employee), leave_type, f"{YEAR}-04-05", f"{YEAR}-04-07").json()
+    client.put(f"/api/v1/leaves/{first['id']}", headers=auth(manager), json={"status": "REJECTED"})
+    second = apply(client, auth(employee), leave_type, f"{YEAR}-04-06", f"{YEAR}-04-08")
+    assert second.status_code == 200
+
+    # Re-activating the rejected one would now overlap
+    r = client.put(f"/api/v1/leaves/{first['id']}", headers=auth(manager), json={"status": "APPROVED"})
+    assert r.status_code == 409
+    assert r.json()["detail"]["conflicting_ids"] == [second.json()["id"]]
+    r = client.post(
+        "/api/v1/leaves/bulk-status", headers=auth(manager), json={"ids": [first["id"]], "status": "PENDING"}
+    )
+    assert r.status_code == 409
+    assert r.json()["detail"]["conflicting_ids"] == [second.json()["id"]]
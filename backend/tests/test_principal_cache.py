@@ -0,0 +1,49 @@
+from app.core.principal import Principal, PrincipalCache, principal_cache
+
+def cached(headers):
+    return principal_cache.get(principal_cache.token_key(headers["Authorization"].split()[1]))
+
+def test_role_change_applies_to_cached_tokens(client, make_user, auth):
+    admin = make_user("ADMIN")
+    manager = make_user("MANAGER")
+    headers = auth(manager)
+    assert client.get("/api/v1/dashboard/stats", headers=headers).status_code == 200
+    assert cached(headers).role == "MANAGER"
+
+    r = client.put(f"/api/v1/users/{manager.id}", headers=auth(admin), json={"role": "EMPLOYEE"})
+    assert r.status_code == 200, r.text
+    assert cached(headers) is None
+    assert client.get("/api/v1/dashboard/stats", headers=headers).status_code == 400
+
+def test_deactivation_applies_to_cached_tokens(client, make_user, auth):
+    admin = make_user("ADMIN")
+    employee = make_user()
+    headers = auth(employee)
+    assert client.get("/api/v1/users/me", headers=headers).status_code == 200
+    client.put(f"/api/v1/users/{employee.id}", headers=auth(admin), json={"is_active": False})
+    assert client.get("/api/v1/users/me", headers=headers).status_code == 400
+
+def test_deleting_a_manager_invalidates_their_reports(client, make_user, auth):
+    admin = make_user("ADMIN")
+    manager = make_user("MANAGER")
+    employee = make_user(manager=manager)
+    headers = auth(employee)
+    client.get("/api/v1/users/me", headers=headers)
+    assert cached(headers).manager_id == manager.id
+
+    assert client.delete(f"/api/v1/users/{manager.id}", headers=auth(admin)).status_code == 200
+    assert cached(headers) is None
+    client.get("/api/v1/users/me", headers=headers)
+    assert cached(headers).manager_id is None
+
+def test_load_racing_an_invalidation_is_not_cached():
+    cache = PrincipalCache(maxsize=10, ttl=60)
+    principal = Principal(id=1, role="MANAGER", manager_id=None, is_active=True)
+    generation = cache.generation(1)
+    # The user changes between our SELECT and caching its result
+    cache.invalidate_user(1)
+    cache.set("token", principal, generation)
+    assert cache.get("token") is None
+
+    cache.set("token", principal, cache.generation(1))
+    assert cache.get("token") == principal
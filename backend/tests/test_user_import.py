@@ -0,0 +1,27 @@
+import io
+
+from app.services.user_import import parse_user_csv
+
+def parse(text):
+    return parse_user_csv(io.BytesIO(text.encode()), max_rows=10)
+
+def test_manager_email_is_normalized_like_email():
+    rows, errors = parse(
+        "email,full_name,password,manager_email\n"
+        "lead@Example.COM,Lead,pw,\n"
+        "dev@example.com,Dev,pw,lead@EXAMPLE.com\n"
+    )
+    assert errors == []
+    assert [(r.user_in.email, r.manager_email) for r in rows] == [
+        ("lead@example.com", None),
+        ("dev@example.com", "lead@example.com"),
+    ]
+
+def test_invalid_manager_email_is_reported_on_its_row():
+    rows, errors = parse(
+        "email,full_name,password,manager_email\n"
+        "dev@example.com,Dev,pw,not-an-email\n"
+    )
+    assert rows == []
+    assert [(e["row"], e["email"]) for e in errors] == [(2, "dev@example.com")]
+    assert errors[0]["detail"].startswith("manager_email: value is not a valid email address")
@@ -1,6 +1,6 @@
 -- 1. Create Enums
 CREATE TYPE user_role_enum AS ENUM ('EMPLOYEE', 'MANAGER', 'ADMIN');
-CREATE TYPE leave_status_enum AS ENUM ('PENDING', 'APPROVED', 'REJECTED', 'CANCELLED');
+CREATE TYPE leave_status_enum AS ENUM ('PENDING', 'PENDING_ADMIN', 'APPROVED', 'REJECTED', 'CANCELLED');
 CREATE TYPE ot_status_enum AS ENUM ('PENDING', 'APPROVED', 'REJECTED');
 CREATE TYPE holiday_type_enum AS ENUM ('PUBLIC', 'OPTIONAL');
 
@@ -21,6 +21,21 @@ CREATE TABLE users (
 );
 
 CREATE INDEX idx_users_email ON users(email);
+CREATE INDEX idx_users_created_id ON users(created_at, id);
+CREATE INDEX idx_users_manager_id ON users(manager_id);
+
+-- Reporting tree closure: every (ancestor, descendant) pair, self at depth 0
+CREATE TABLE user_hierarchy (
+    ancestor_id INT NOT NULL,
+    descendant_id INT NOT NULL,
+    depth INT NOT NULL,
+
+    PRIMARY KEY (ancestor_id, descendant_id),
+    CONSTRAINT fk_hierarchy_ancestor FOREIGN KEY (ancestor_id) REFERENCES users(id) ON DELETE CASCADE,
+    CONSTRAINT fk_hierarchy_descendant FOREIGN KEY (descendant_id) REFERENCES users(id) ON DELETE CASCADE
+);
+
+CREATE INDEX idx_user_hierarchy_descendant ON user_hierarchy(descendant_id, ancestor_id);
 
 CREATE TABLE leave_types (
     id SERIAL PRIMARY KEY,
@@ -46,11 +61,36 @@ CREATE TABLE leave_requests (
 
     CONSTRAINT fk_leave_user FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
     CONSTRAINT fk_leave_type FOREIGN KEY (leave_type_id) REFERENCES leave_types(id) ON DELETE CASCADE,
-    CONSTRAINT fk_leave_approver FOREIGN KEY (approver_id) REFERENCES users(id) ON DELETE SET NULL
+    CONSTRAINT fk_leave_approver FOREIGN KEY (approver_id) REFERENCES users(id) ON DELETE SET NULL,
+    -- No overlapping pending/approved leaves per user (plain GiST, no btree_gist)
+    CONSTRAINT excl_leave_user_active_range EXCLUDE USING gist (
+        int4range(user_id, user_id, '[]') WITH &&,
+        daterange(start_date, end_date, '[]') WITH &&
+    ) WHERE (status IN ('PENDING', 'PENDING_ADMIN', 'APPROVED'))
 );
 
 CREATE INDEX idx_leave_user_status ON leave_requests(user_id, status);
-CREATE INDEX idx_leave_date_range ON leave_requests(start_date, end_date);
+CREATE INDEX idx_leave_created_id ON leave_requests(created_at, id);
+CREATE INDEX idx_leave_user_created_id ON leave_requests(user_id, created_at, id);
+CREATE INDEX idx_leave_status_created_id ON leave_requests(status, created_at, id);
+CREATE INDEX idx_leave_status_dates ON leave_requests(status, start_date, end_date);
+CREATE INDEX idx_leave_approved_range ON leave_requests USING gist (daterange(start_date, end_date, '[]')) WHERE status = 'APPROVED';
+
+CREATE TABLE leave_balances (
+    id SERIAL PRIMARY KEY,
+    user_id INT NOT NULL,
+    leave_type_id INT NOT NULL,
+    year INT NOT NULL,
+    allotted_days FLOAT NOT NULL,
+    carried_forward_days FLOAT NOT NULL DEFAULT 0,
+    used_days FLOAT NOT NULL DEFAULT 0,
+    pending_days FLOAT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ DEFAULT NOW(),
+
+    CONSTRAINT fk_balance_user FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+    CONSTRAINT fk_balance_type FOREIGN KEY (leave_type_id) REFERENCES leave_types(id) ON DELETE CASCADE,
+    CONSTRAINT uq_leave_balance_user_type_year UNIQUE (user_id, leave_type_id, year)
+);
 
 CREATE TABLE overtime_requests (
     id SERIAL PRIMARY KEY,
@@ -69,6 +109,27 @@ CREATE TABLE overtime_requests (
     CONSTRAINT fk_ot_approver FOREIGN KEY (approver_id) REFERENCES users(id) ON DELETE SET NULL
 );
 
+CREATE INDEX idx_ot_created_id ON overtime_requests(created_at, id);
+CREATE INDEX idx_ot_user_created_id ON overtime_requests(user_id, created_at, id);
+CREATE INDEX idx_ot_status_created_id ON overtime_requests(status, created_at, id);
+CREATE INDEX idx_ot_user_status ON overtime_requests(user_id, status);
+
+CREATE TABLE ot_monthly_rollups (
+    id SERIAL PRIMARY KEY,
+    user_id INT NOT NULL,
+    month DATE NOT NULL,
+    approved_hours FLOAT NOT NULL DEFAULT 0,
+    pending_hours FLOAT NOT NULL DEFAULT 0,
+    approved_count INT NOT NULL DEFAULT 0,
+    pending_count INT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ DEFAULT NOW(),
+
+    CONSTRAINT fk_ot_rollup_user FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+    CONSTRAINT uq_ot_rollup_user_month UNIQUE (user_id, month)
+);
+
+CREATE INDEX idx_ot_rollup_month_user ON ot_monthly_rollups(month, user_id);
+
 CREATE TABLE holidays (
     id SERIAL PRIMARY KEY,
     date DATE UNIQUE NOT NULL,
@@ -85,7 +146,7 @@ CREATE TABLE audit_logs (
     entity_id INT,
     created_at TIMESTAMPTZ DEFAULT NOW(),
 
-    CONSTRAINT fk_audit_user FOREIGN KEY (user_id) REFERENCES users(id)
+    CONSTRAINT fk_audit_user FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE SET NULL
 );
 
 -- 3. Functions & Triggers
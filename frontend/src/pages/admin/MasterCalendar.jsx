@@ -18,12 +18,15 @@ const MasterCalendar = () => {
         setLoading(true)
         try {
             const token = localStorage.getItem('token')
-            // Fetch all leaves (Admin endpoint returns all)
-            const response = await axios.get('/api/v1/leaves/', {
-                headers: { Authorization: `Bearer ${token}` }
+            // Approved leaves overlapping the visible grid (whole weeks)
+            const response = await axios.get('/api/v1/leaves/calendar', {
+                headers: { Authorization: `Bearer ${token}` },
+                params: {
+                    start: format(startOfWeek(startOfMonth(currentDate)), 'yyyy-MM-dd'),
+                    end: format(endOfWeek(endOfMonth(currentDate)), 'yyyy-MM-dd')
+                }
             })
-            // Filter strictly for testing/demo or use all
-            setLeaves(response.data.filter(l => l.status === 'APPROVED'))
+            setLeaves(response.data)
         } catch (error) {
             console.error("Error fetching leaves:", error)
         } finally {